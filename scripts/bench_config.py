@@ -0,0 +1,61 @@
+"""bench_config.py
+
+Script to compare the time taken by config.load_config with a cold
+snapshot cache (YAML parsed and validated) and a warm one. Each run is
+made in a fresh interpreter so that import times are included.
+
+Run with the interpreter of the environment the package is installed
+in, e.g. after `pip install -e .`. Uses the configuration file of the
+current user, only removing its snapshot for the cold runs.
+"""
+
+import statistics
+import subprocess
+import sys
+
+RUNS = 10
+
+LOAD_SNIPPET = """
+import time
+start = time.perf_counter()
+from waifu.config import load_config
+load_config()
+print((time.perf_counter() - start) * 1000)
+"""
+
+REMOVE_SNAPSHOT_SNIPPET = """
+from waifu.config import SNAPSHOT_SUFFIX
+from waifu.exceptions import get_user_config_path
+get_user_config_path().with_suffix(SNAPSHOT_SUFFIX).unlink(missing_ok=True)
+"""
+
+
+def run(snippet: str) -> str:
+    """Run snippet in a fresh interpreter and return its output."""
+    result = subprocess.run([sys.executable, "-c", snippet],
+                            capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def measure(cold: bool) -> list[float]:
+    """Return the load times in milliseconds of RUNS fresh processes."""
+    times = []
+    for _ in range(RUNS):
+        if cold:
+            run(REMOVE_SNAPSHOT_SNIPPET)
+        times.append(float(run(LOAD_SNIPPET).splitlines()[-1]))
+    return times
+
+
+def main() -> None:
+    """Main driver function."""
+    run(LOAD_SNIPPET)  # Create the config file if needed
+    for label, cold in (("cold", True), ("warm", False)):
+        times = measure(cold)
+        print(f"[bench_config.py] {label}: "
+              f"median {statistics.median(times):6.1f} ms, "
+              f"min {min(times):6.1f} ms over {RUNS} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""bench_startup.py
+
+Script to check the import time of each command line path against a
+startup budget, using the -X importtime option of the interpreter. Exits
+with a nonzero status if any path goes over budget or imports a module
+it shouldn't.
+
+Run with the interpreter of the environment the package is installed
+in, e.g. after `pip install -e .`. Each path runs for a made up user
+whose home only holds the configuration template, so that your own
+configuration file is left alone. The test suite runs the same checks
+in tests/test_startup.py.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import NamedTuple
+
+
+class StartupPath(NamedTuple):
+    """A command line path and the budget it should start within."""
+    args: list[str]
+    budget_ms: float
+    forbidden: tuple[str, ...]
+
+
+HEAVY_MODULES = ("pyautogui", "keyboard", "yaml")
+
+PATHS = [
+    StartupPath(["--version"], 150.0, HEAVY_MODULES),
+    StartupPath(["--config"], 150.0, HEAVY_MODULES),
+    # Exits right away if no daemon is running, which is fine here
+    StartupPath(["roll", "--version"], 75.0, HEAVY_MODULES + ("rich",)),
+    # Argument errors still need the config file for defaults and tips, but
+    # only its snapshot once main() has built it in a warm-up run
+    StartupPath(["-n", "not-a-number"], 200.0, HEAVY_MODULES),
+    StartupPath(["--help"], 200.0, HEAVY_MODULES),
+]
+
+
+def measure(args: list[str],
+            env: dict[str, str] | None = None) -> tuple[float, set[str]]:
+    """Run the waifu command with -X importtime.
+
+    Args:
+        args (list[str]): Command line arguments to run it with.
+        env (dict[str, str] | None, optional): Environment variables to
+        run it with. Defaults to None (inherit them).
+
+    Returns:
+        tuple[float, set[str]]: Total import time in milliseconds and
+        the names of all modules imported.
+    """
+    cmd = [sys.executable, "-X", "importtime", "-m", "waifu.main", *args]
+    result = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    total_us = 0
+    modules: set[str] = set()
+    # Lines look like "import time:   self [us] | cumulative | package"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        total_us += int(self_us)
+        modules.add(name.strip())
+    return total_us / 1000, modules
+
+
+def make_env(home: Path) -> dict[str, str]:
+    """Set up a user home holding the configuration template, whose
+    snapshot is already built.
+
+    Args:
+        home (Path): Empty directory to use as the home of the user.
+
+    Returns:
+        dict[str, str]: Environment variables to run waifu as the user.
+    """
+    from waifu.config_template import CONFIG_TEMPLATE
+
+    config_path = home / ".config" / "waifu-roller" / "config.yaml"
+    config_path.parent.mkdir(parents=True)
+    config_path.write_text(CONFIG_TEMPLATE, encoding="utf-8")
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home))
+    measure(["-n", "not-a-number"], env)  # Builds the snapshot
+    return env
+
+
+def forbidden_imports(path: StartupPath, modules: set[str]) -> list[str]:
+    """Return the forbidden packages of path found among modules."""
+    return sorted(
+        name for name in path.forbidden
+        if any(module == name or module.startswith(name + ".")
+               for module in modules)
+    )
+
+
+def main() -> None:
+    """Main driver function."""
+    with tempfile.TemporaryDirectory() as home:
+        env = make_env(Path(home))
+        results = [measure(path.args, env) for path in PATHS]
+    failed = False
+    for path, (total_ms, modules) in zip(PATHS, results):
+        imported = forbidden_imports(path, modules)
+        ok = total_ms <= path.budget_ms and not imported
+        failed |= not ok
+        print(
+            f"[bench_startup.py] {'OK  ' if ok else 'FAIL'} "
+            f"waifu {' '.join(path.args):<20} {total_ms:7.1f} ms "
+            f"(budget {path.budget_ms:.0f} ms)"
+            + (f", imported {', '.join(imported)}" if imported else "")
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
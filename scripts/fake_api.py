@@ -0,0 +1,149 @@
+"""fake_api.py
+
+Script to serve a local stand-in for the message endpoint of the Discord
+API, for trying the http transport and `waifu accounts` without sending
+anything to Discord. Messages are only counted, per token, and every
+token can be rate limited like Discord does with HTTP 429. Rolls can be
+answered with a sample character like Mudae does, for the history and
+the wishlist to read.
+
+Point the transport or the account profiles at it with an api-base of
+http://127.0.0.1:PORT/api (the default port is 8765), then hit ^C to
+stop it and print what it received.
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MESSAGES_PATH = re.compile(r"/api/channels/(\w+)/messages(\?.*)?")
+
+SAMPLE_REPLY = {
+    "author": {"id": "mudae"},
+    "content": "",
+    "embeds": [{
+        "author": {"name": "Rem"},
+        "description": "Re:Zero kara Hajimeru Isekai Seikatsu\n"
+                       "**1204**<:kakera:469835869059153940>\n"
+                       "React with any emoji to claim!",
+    }],
+}
+"""Reply given to every message with --reply."""
+
+
+class Stats:
+    """Messages received so far, shared by the request threads."""
+
+    def __init__(self,
+                 limit: float | None,
+                 reply: dict | None = None) -> None:
+        self.limit = limit
+        self.reply = reply
+        self.lock = threading.Lock()
+        self.times: dict[str, list[float]] = defaultdict(list)
+        self.limited: dict[str, int] = defaultdict(int)
+
+    def receive(self, token: str) -> float | None:
+        """Count a message, returning the seconds to retry after
+        instead if it goes over the limit of its token.
+        """
+        now = time.monotonic()
+        with self.lock:
+            times = self.times[token]
+            if self.limit is not None and times:
+                wait = times[-1] + 1 / self.limit - now
+                if wait > 0:
+                    self.limited[token] += 1
+                    return wait
+            times.append(now)
+        return None
+
+
+def make_handler(stats: Stats) -> type[BaseHTTPRequestHandler]:
+    """Return the request handler class serving with stats."""
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keeps connections alive like Discord, for the transport to pool,
+        # without the headers and body of replies waiting on each other
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _reply(self, status: int, payload: object) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            match = MESSAGES_PATH.fullmatch(self.path)
+            length = int(self.headers.get("Content-Length", 0))
+            content = json.loads(self.rfile.read(length) or b"{}")
+            if match is None:
+                self._reply(404, {"message": "Unknown endpoint"})
+                return
+            token = self.headers.get("Authorization", "")
+            retry_after = stats.receive(token)
+            if retry_after is not None:
+                self._reply(429, {"message": "You are being rate limited.",
+                                  "retry_after": retry_after})
+                return
+            self._reply(200, {"id": str(time.time_ns()),
+                              "channel_id": match[1],
+                              "author": {"id": token},
+                              "content": content.get("content", "")})
+
+        def do_GET(self) -> None:
+            if MESSAGES_PATH.fullmatch(self.path) is None:
+                self._reply(404, {"message": "Unknown endpoint"})
+            elif stats.reply is None:
+                self._reply(200, [])
+            else:
+                # Always newer than the message it answers
+                self._reply(200, [dict(stats.reply, id=str(time.time_ns()))])
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass  # Keep the output for the summary
+
+    return Handler
+
+
+def main() -> None:
+    """Main driver function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("-p", "--port", type=int, default=8765)
+    parser.add_argument("--limit", type=float,
+                        help="Messages per second allowed per token, "
+                        "answering HTTP 429 beyond (default: no limit)")
+    parser.add_argument("--reply", action="store_true",
+                        help="Answer every message with a sample roll, "
+                        "like Mudae")
+    ns = parser.parse_args()
+
+    stats = Stats(ns.limit, SAMPLE_REPLY if ns.reply else None)
+    server = ThreadingHTTPServer(("127.0.0.1", ns.port), make_handler(stats))
+    print(f"[fake_api.py] Listening at http://127.0.0.1:{ns.port}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    every = sorted(t for times in stats.times.values() for t in times)
+    for token, times in sorted(stats.times.items()):
+        print(f"[fake_api.py] {token!r}: {len(times)} messages, "
+              f"{stats.limited[token]} rate limited")
+    if len(every) > 1:
+        rate = (len(every) - 1) / (every[-1] - every[0]) * 60
+        print(f"[fake_api.py] {len(every)} messages in total, "
+              f"{rate:.1f} per minute together")
+
+
+if __name__ == "__main__":
+    main()
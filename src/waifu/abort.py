@@ -11,23 +11,42 @@ import sys
 from types import FrameType
 from typing import NoReturn
 
-import keyboard
-import pyautogui
 import rich
 
+from . import metrics
+from .cancel import cancel_session
+
 ABORT_KEY = "esc"
 
 
-def _custom_abort_callback() -> NoReturn:
-    """Attempt to exit the program by interrupting main thread.
+def _custom_abort_callback(exit_when_idle: bool = True) -> None:
+    """Attempt to exit the program from the current (listener) thread.
+
+    A session in progress is cancelled, which stops it at its next wait
+    between actions, within a few milliseconds. Otherwise, signal SIGINT
+    is sent to the main thread, which only lands once it gets back to
+    running Python code.
 
-    It does this by sending signal SIGINT to the main thread from the
-    current (listener) thread, then exiting the thread.
+    Args:
+        exit_when_idle (bool, optional): Whether to exit if no session
+        is in progress. Processes running sessions one after another (the
+        daemon and the scheduler) only stop on ^C instead. Defaults to
+        True.
 
     Raises:
-        SystemExit: Exit the current thread silently.
+        SystemExit: Exit the current thread silently, once the main
+        thread was interrupted.
     """
+    # First, since the session stops as soon as it is cancelled
+    cancelled = cancel_session(ABORT_KEY)
+    if not cancelled and not exit_when_idle:
+        return
     rich.print(f"[bold red]Script interrupted with {ABORT_KEY.upper()} key[/]")
+    # Counted here since the main thread only sees a SystemExit
+    metrics.end_session("esc")
+    # The listener thread has to live on for the next sessions
+    if cancelled:
+        return
     # sys.exit() only interrupts keyboard listener thread
     _thread.interrupt_main()
     _thread.exit()
@@ -44,19 +63,36 @@ def _interrupt_handler(sig: int, frame: FrameType | None) -> NoReturn:
         SystemExit: Exits the program with sys.exit
     """
     rich.print("[bold red]Script terminated by SIGINT[/]")
+    metrics.end_session("sigint")
     sys.exit()
 
 
-def register_abort_handlers(failsafe: bool) -> None:
+def register_abort_handlers(failsafe: bool,
+                            gui: bool = True,
+                            exit_when_idle: bool = True) -> None:
     """Set up signal and hotkey listeners for program abortion.
 
     Args:
         failsafe (bool): Configuration preference.
+        gui (bool, optional): Whether the commands go through the
+        Discord window, which the fail-safe only applies to. Defaults
+        to True.
+        exit_when_idle (bool, optional): Whether ABORT_KEY exits the
+        program while no session is in progress. Defaults to True.
 
     Interface function to be called from main process.
     """
+    # Imported here since the info flags don't need it, see main.py
+    import keyboard
+
     signal.signal(signal.SIGINT, _interrupt_handler)
     # Set up custom abort handler
-    keyboard.add_hotkey(ABORT_KEY, _custom_abort_callback)
+    keyboard.add_hotkey(ABORT_KEY, _custom_abort_callback,
+                        args=(exit_when_idle,))
+    # Other transports don't touch the mouse, and need no display
+    if not gui:
+        return
     # Suppress pyautogui failsafe based on config
+    # Imported here since pyautogui cannot be imported without a display
+    import pyautogui
     pyautogui.FAILSAFE = failsafe
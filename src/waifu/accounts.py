@@ -0,0 +1,327 @@
+"""
+accounts.py
+18 October 2026 17:15:08
+
+Roll for several accounts at once, in a pool of worker processes.
+
+Every account sends through the HTTP transport with its own token and
+its own limiter, like a single run would. On top of those, a token
+bucket in shared memory caps the rate of commands across all the
+accounts together. Workers report every command they send to the
+parent process, which shows the progress of every account.
+"""
+
+import argparse
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+import rich
+
+from .cancel import cancel_session, session_scope
+from .parser import SessionEntry
+from .ratelimit import RateLimiter, SharedTokenBucket
+
+if TYPE_CHECKING:
+    from .config import ConfigDict
+
+PROGRESS_POLL_INTERVAL = 0.1  # seconds between checks of the workers
+
+STOPPED = "stopped"
+"""Error of the accounts stopped before they were done."""
+
+
+class AccountProfile(NamedTuple):
+    """One account to roll for, with every fallback resolved."""
+    name: str
+    transport: dict[str, Any]
+    """Options for HTTPTransport.from_config()."""
+    entry: SessionEntry
+
+    def commands(self) -> list[str]:
+        """Return the commands to send, in order."""
+        command, _, num, daily = self.entry
+        return [f"${command}"] * num + (["$daily", "$dk"] if daily else [])
+
+
+class AccountResult(NamedTuple):
+    """How rolling went for one account."""
+    name: str
+    sent: int
+    """Number of commands sent."""
+    elapsed: float
+    """Seconds spent rolling."""
+    error: str | None = None
+    """Why the account didn't send every command, if it didn't."""
+
+
+def profiles_from_config(config: "ConfigDict") -> list[AccountProfile]:
+    """Resolve the profiles of the validated accounts option.
+
+    Raises:
+        ConfigFormatError: A profile has no value for a session option,
+        and the defaults option has none either, or it has a bad one.
+    """
+    from .exceptions import ConfigFormatError
+
+    transport = config["transport"]
+    defaults = config["defaults"]
+    profiles = []
+    for index, profile in enumerate(config["accounts"]["profiles"]):
+        option = f"accounts.profiles.{index}"
+        values = {}
+        for key in ("mudae-command", "target-channel", "num-rolls"):
+            value = profile[key] if profile[key] is not None \
+                else defaults.get(key)
+            if value is None and key != "target-channel":
+                raise ConfigFormatError(
+                    f"Missing option '{option}.{key}' and no default value "
+                    "is set for it"
+                )
+            values[key] = value
+        if values["mudae-command"].startswith(("$", "/")):
+            raise ConfigFormatError(
+                f"{values['mudae-command']!r} is a bad value for option "
+                f"'{option}.mudae-command': should not be command-prefixed "
+                "(e.g. 'wa')"
+            )
+        if values["num-rolls"] < 0:
+            raise ConfigFormatError(
+                f"{values['num-rolls']!r} is a bad value for option "
+                f"'{option}.num-rolls': should be a non-negative integer"
+            )
+        channel_id = profile["channel-id"] if profile["channel-id"] \
+            is not None else transport["channel-id"]
+        profiles.append(AccountProfile(
+            profile["name"],
+            {"api-base": profile["api-base"] or transport["api-base"],
+             "token": profile["token"],
+             "channel-id": channel_id},
+            # The channel only names the bucket of the account's limiter
+            SessionEntry(values["mudae-command"],
+                         values["target-channel"] or str(channel_id),
+                         values["num-rolls"],
+                         profile["daily"])
+        ))
+    return profiles
+
+
+class _Worker:
+    """Global state of a worker process, set up by _init_worker."""
+    bucket: SharedTokenBucket | None = None
+    events: "multiprocessing.Queue[tuple[str, int]] | None" = None
+    stop: threading.Event | None = None
+
+
+def _init_worker(bucket: SharedTokenBucket,
+                 events: "multiprocessing.Queue[tuple[str, int]]",
+                 stop: threading.Event) -> None:
+    """Set up a worker process of the pool."""
+    # ^C reaches the whole process group, let the parent stop the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _Worker.bucket = bucket
+    _Worker.events = events
+    _Worker.stop = stop
+    threading.Thread(target=_watch_stop, args=(stop,), daemon=True).start()
+
+
+def _watch_stop(stop: threading.Event) -> None:
+    """Cancel the account being rolled once the parent says to stop."""
+    stop.wait()
+    cancel_session(STOPPED)
+
+
+def _roll_account(profile: AccountProfile,
+                  rate_limit: dict[str, Any]) -> AccountResult:
+    """Send the commands of an account, in a worker process.
+
+    Args:
+        profile (AccountProfile): The account to roll for.
+        rate_limit (dict[str, Any]): The validated rate-limit option,
+        which applies to the account on its own.
+
+    Returns:
+        AccountResult: How it went. Errors of the transport are
+        reported there instead of raised.
+    """
+    from .exceptions import SessionCancelled, TransportError
+    from .transport import HTTPTransport
+
+    assert _Worker.events is not None and _Worker.stop is not None
+    channel = profile.entry.channel
+    limiter = RateLimiter.from_config(rate_limit, shared=_Worker.bucket)
+    sent = 0
+    error = None
+    start = time.perf_counter()
+    with session_scope() as token:
+        # The stop may have come before this account started
+        if _Worker.stop.is_set():
+            token.cancel(STOPPED)
+        try:
+            transport = HTTPTransport.from_config(profile.transport)
+            transport.on_rate_limit = limiter.on_rate_limit
+            try:
+                for content in profile.commands():
+                    limiter.acquire(channel)
+                    transport.send(content)
+                    limiter.on_success()
+                    sent += 1
+                    _Worker.events.put((profile.name, sent))
+            finally:
+                transport.close()
+        except SessionCancelled:
+            error = STOPPED
+        except TransportError as e:
+            error = str(e)
+    return AccountResult(profile.name, sent, time.perf_counter() - start,
+                         error)
+
+
+def roll_accounts(profiles: list[AccountProfile],
+                  rate_limit: dict[str, Any],
+                  rate: float,
+                  burst: float,
+                  workers: int,
+                  on_progress: Callable[[str, int], None] | None = None
+                  ) -> list[AccountResult]:
+    """Roll for every account, workers accounts at a time.
+
+    ^C stops every account at its next command, after which the results
+    so far are returned.
+
+    Args:
+        profiles (list[AccountProfile]): The accounts to roll for.
+        rate_limit (dict[str, Any]): The validated rate-limit option,
+        which applies to each account on its own.
+        rate (float): Commands per second allowed across all accounts.
+        burst (float): Commands allowed back to back across all
+        accounts.
+        workers (int): Number of worker processes.
+        on_progress (Callable[[str, int], None] | None, optional):
+        Called with the name of an account and its number of commands
+        sent every time it sends one. Defaults to None.
+
+    Returns:
+        list[AccountResult]: How it went for each account, in order.
+    """
+    # Same start method everywhere, and the only one Windows has
+    context = multiprocessing.get_context("spawn")
+    bucket = SharedTokenBucket(rate, burst, context)
+    events: "multiprocessing.Queue[tuple[str, int]]" = context.Queue()
+    stop = context.Event()
+
+    with ProcessPoolExecutor(workers, context, initializer=_init_worker,
+                             initargs=(bucket, events, stop)) as pool:
+        futures: list[Future[AccountResult]] = [
+            pool.submit(_roll_account, profile, rate_limit)
+            for profile in profiles
+        ]
+        while not all(future.done() for future in futures):
+            try:
+                name, sent = events.get(timeout=PROGRESS_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            except KeyboardInterrupt:
+                if stop.is_set():
+                    raise
+                rich.print("[yellow]Stopping every account...[/]")
+                stop.set()
+                continue
+            if on_progress is not None:
+                on_progress(name, sent)
+        return [future.result() for future in futures]
+
+
+def run_accounts(argv: list[str]) -> int:
+    """Roll for the accounts of the configuration file at once.
+
+    Interface function to be called from main process.
+
+    Args:
+        argv (list[str]): Command line arguments after "accounts".
+
+    Returns:
+        int: The exit code, 1 if any account didn't send everything.
+    """
+    parser = argparse.ArgumentParser(
+        prog="waifu accounts",
+        description="Roll for several accounts at once through the HTTP "
+        "transport, from the profiles of the accounts option."
+    )
+    parser.add_argument("names", metavar="NAME", nargs="*",
+                        help="Accounts to roll for (default: every profile)")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="Processes rolling at once (default: "
+                        "accounts.workers, or one per account)")
+    ns = parser.parse_args(argv)
+    if ns.workers is not None and ns.workers < 1:
+        parser.error("the number of workers should be positive")
+
+    from rich.progress import Progress
+    from rich.table import Table
+
+    from .config import load_config
+    from .exceptions import RollerError
+
+    try:
+        config = load_config()
+        profiles = profiles_from_config(config)
+    except RollerError as e:
+        rich.print(f"[bold red]{type(e).__name__}:[/] {e}")
+        return 1
+    if ns.names:
+        known = {profile.name for profile in profiles}
+        for name in ns.names:
+            if name not in known:
+                parser.error(f"no account named {name!r} in the accounts "
+                             "option")
+        profiles = [profile for profile in profiles
+                    if profile.name in ns.names]
+    if not profiles:
+        rich.print("[yellow]The accounts option has no profiles to roll "
+                   "for.[/]")
+        return 1
+
+    options: dict = config["accounts"]
+    workers = min(ns.workers or options["workers"] or len(profiles),
+                  len(profiles))
+    rich.print(f"[green]Rolling for {len(profiles)} accounts with {workers} "
+               f"workers, at most {options['rolls-per-minute']} commands per "
+               "minute together. Hit ^C to stop.[/]")
+
+    start = time.perf_counter()
+    with Progress() as progress:
+        tasks = {profile.name: progress.add_task(
+                     profile.name, total=len(profile.commands()))
+                 for profile in profiles}
+        results = roll_accounts(
+            profiles,
+            config["rate-limit"],
+            options["rolls-per-minute"] / 60,
+            options["burst"],
+            workers,
+            lambda name, sent: progress.update(tasks[name], completed=sent)
+        )
+        # Progress events can trail behind the results
+        for result in results:
+            progress.update(tasks[result.name], completed=result.sent)
+    elapsed = time.perf_counter() - start
+
+    table = Table(title="Accounts")
+    table.add_column("Account")
+    table.add_column("Sent", justify="right")
+    table.add_column("Commands/minute", justify="right")
+    table.add_column("Error")
+    for result in results:
+        rate = result.sent / result.elapsed * 60 if result.elapsed else 0.0
+        table.add_row(result.name, str(result.sent), f"{rate:.1f}",
+                      result.error or "")
+    rich.print(table)
+    sent = sum(result.sent for result in results)
+    rich.print(f"[bright_black]Sent {sent} commands in {elapsed:.1f} "
+               f"seconds, {sent / elapsed * 60:.1f} per minute together[/]")
+    return 1 if any(result.error for result in results) else 0
@@ -0,0 +1,386 @@
+"""
+backend.py
+18 October 2026 10:02:17
+
+Abstract the input and window layer that rolling sessions go through.
+"""
+
+import ctypes
+import functools
+import sys
+import time
+from typing import (TYPE_CHECKING, Any, Callable, NamedTuple, ParamSpec,
+                    Protocol, TypeVar)
+
+from .exceptions import FailSafeError
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+
+class Window(Protocol):
+    """Interface of a desktop window, as modeled by PyGetWindow."""
+    title: str
+    isMinimized: bool
+
+    def activate(self) -> None: ...
+    def minimize(self) -> None: ...
+    def maximize(self) -> None: ...
+
+
+class Backend(Protocol):
+    """Interface of the key input, text input, and window operations
+    used by the session engine in core.py.
+    """
+
+    def hotkey(self, *keys: str) -> None:
+        """Press a key combination, e.g. hotkey("ctrl", "k")."""
+        ...
+
+    def typewrite(self, text: str, interval: float = 0.0) -> None:
+        """Type text one character at a time."""
+        ...
+
+    def write(self, text: str) -> None:
+        """Send a whole string in one call, including non-ASCII text."""
+        ...
+
+    def get_clipboard(self) -> str:
+        """Return the text content of the clipboard."""
+        ...
+
+    def set_clipboard(self, text: str) -> None:
+        """Replace the content of the clipboard with text."""
+        ...
+
+    def get_active_window(self) -> Window | None:
+        """Return the window that currently has focus, if any."""
+        ...
+
+    def get_active_window_title(self) -> str | None:
+        """Return the title of the window that currently has focus."""
+        ...
+
+    def get_windows_with_title(self, title: str) -> list[Window]:
+        """Return all windows with title as a substring of theirs."""
+        ...
+
+    def is_window_alive(self, win: Window) -> bool:
+        """Return whether the handle of a window still exists."""
+        ...
+
+    def activate_window(self, win: Window) -> None:
+        """Bring a window to the foreground and give it focus."""
+        ...
+
+    def add_hotkey(self,
+                   key: str,
+                   callback: Callable[..., Any],
+                   args: tuple = ()) -> None:
+        """Register a global hotkey for the rest of the process."""
+        ...
+
+    def capture(self, region: tuple[int, int, int, int]) -> "NDArray[Any]":
+        """Return the RGB pixels of a (left, top, width, height) area
+        of the screen, as an array of shape (height, width, 3).
+
+        Needs NumPy, which is an optional dependency.
+        """
+        ...
+
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def _translate_failsafe(func: Callable[P, R]) -> Callable[P, R]:
+    """Decorator re-raising the PyAutoGUI fail-safe as FailSafeError.
+
+    This way core.py can handle the fail-safe without importing
+    pyautogui itself.
+    """
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        import pyautogui
+        try:
+            return func(*args, **kwargs)
+        except pyautogui.FailSafeException as e:
+            raise FailSafeError from e
+    return wrapper
+
+
+class PyAutoGUIBackend:
+    """Backend controlling the real desktop with PyAutoGUI."""
+
+    def __init__(self) -> None:
+        """Import the hotkey and clipboard dependencies.
+
+        PyAutoGUI is only imported upon first use, since it cannot even
+        be imported on a machine without a display, which the http
+        transport runs fine on with just the hotkeys.
+        """
+        import keyboard
+        import pyperclip
+        self._keyboard = keyboard
+        self._clipboard = pyperclip
+
+    @functools.cached_property
+    def _gui(self) -> Any:
+        import pyautogui
+        return pyautogui
+
+    @_translate_failsafe
+    def hotkey(self, *keys: str) -> None:
+        self._gui.hotkey(*keys)
+
+    @_translate_failsafe
+    def typewrite(self, text: str, interval: float = 0.0) -> None:
+        self._gui.typewrite(text, interval=interval)
+
+    @_translate_failsafe
+    def write(self, text: str) -> None:
+        # pyautogui.write() is the same per-key loop as typewrite(), while
+        # keyboard.write() sends unicode text in a single call
+        self._gui.failSafeCheck()
+        self._keyboard.write(text, delay=0)
+
+    def get_clipboard(self) -> str:
+        return self._clipboard.paste()
+
+    def set_clipboard(self, text: str) -> None:
+        self._clipboard.copy(text)
+
+    def get_active_window(self) -> Window | None:
+        return self._gui.getActiveWindow()
+
+    def get_active_window_title(self) -> str | None:
+        return self._gui.getActiveWindowTitle()
+
+    def get_windows_with_title(self, title: str) -> list[Window]:
+        return self._gui.getWindowsWithTitle(title)
+
+    def is_window_alive(self, win: Window) -> bool:
+        # Only the Win32 backend exposes a raw handle to check, and a dead
+        # window on any backend also fails the title check anyway
+        hwnd = getattr(win, "_hWnd", None)
+        if hwnd is None or sys.platform != "win32":
+            return True
+        return bool(ctypes.windll.user32.IsWindow(hwnd))
+
+    def activate_window(self, win: Window) -> None:
+        from pygetwindow import PyGetWindowException
+        try:
+            # Restore first since activating alone leaves a minimized window
+            if win.isMinimized:
+                win.maximize()
+            win.activate()
+        except PyGetWindowException:
+            # minimize -> maximize trick is a workaround to the
+            # PyGetWinException problem that happens when I try to accept
+            # input before activate()ing a window:
+            # https://github.com/asweigart/PyGetWindow/issues/36#issuecomment-919332733
+            win.minimize()
+            win.maximize()
+            win.activate()
+
+    def add_hotkey(self,
+                   key: str,
+                   callback: Callable[..., Any],
+                   args: tuple = ()) -> None:
+        self._keyboard.add_hotkey(key, callback, args)
+
+    def capture(self, region: tuple[int, int, int, int]) -> "NDArray[Any]":
+        import numpy as np
+        return np.asarray(self._gui.screenshot(region=region).convert("RGB"))
+
+
+class Action(NamedTuple):
+    """A backend call captured by RecordingBackend."""
+    timestamp: float
+    """Seconds since the backend was created."""
+    kind: str
+    """Name of the backend method that was called."""
+    args: tuple
+    """Positional arguments of the call."""
+
+
+class FakeWindow:
+    """In-memory window for use with RecordingBackend."""
+
+    def __init__(self, title: str, backend: "RecordingBackend") -> None:
+        self.title = title
+        self.isMinimized = False
+        self.alive = True
+        self._backend = backend
+
+    def activate(self) -> None:
+        self.isMinimized = False
+        self._backend.active = self
+
+    def minimize(self) -> None:
+        self.isMinimized = True
+        if self._backend.active is self:
+            self._backend.active = None
+
+    def maximize(self) -> None:
+        self.isMinimized = False
+
+    def __repr__(self) -> str:
+        return f"FakeWindow({self.title!r})"
+
+
+class RecordingBackend:
+    """Headless backend that records every call instead of acting.
+
+    Windows are simulated with FakeWindow, so focus changes made through
+    this backend are reflected in later window queries. The Discord
+    quick switcher is simulated too: a query submitted after Ctrl+K
+    renames the active window like Discord does when changing channels.
+    Backspace erases the last character entered. Hotkeys can be fired
+    with press_hotkey(). Captures return the queued up frames in order,
+    then a blank frame.
+    """
+
+    def __init__(self, *titles: str) -> None:
+        """Create the backend with some open windows.
+
+        Args:
+            *titles (str): Titles of the windows to simulate. The first
+            one starts out as the active window.
+        """
+        self.actions: list[Action] = []
+        self.windows = [FakeWindow(title, self) for title in titles]
+        self.active: FakeWindow | None = \
+            self.windows[0] if self.windows else None
+        self.hotkeys: dict[str, tuple[Callable[..., Any], tuple]] = {}
+        self.clipboard = ""
+        self.frames: list["NDArray[Any]"] = []
+        """Frames for the next captures to return, cropped to size."""
+        self._text: list[str] = []
+        self._switcher_open = False
+        self._query = ""
+        self._start = time.perf_counter()
+
+    def _record(self, kind: str, *args: Any) -> None:
+        timestamp = time.perf_counter() - self._start
+        self.actions.append(Action(timestamp, kind, args))
+
+    def count(self, kind: str) -> int:
+        """Return how many calls of a kind were recorded."""
+        return sum(1 for action in self.actions if action.kind == kind)
+
+    def typed_text(self) -> str:
+        """Return all text entered so far by any means, concatenated."""
+        return "".join(self._text)
+
+    def _enter(self, text: str) -> None:
+        self._text.append(text)
+        if not self._switcher_open:
+            return
+        self._query += text
+        if self._query.endswith("\n"):
+            self._switcher_open = False
+            if self.active is not None:
+                channel = self._query.strip().lstrip("#")
+                self.active.title = f"#{channel} | Fake Server - Discord"
+
+    def _erase(self) -> None:
+        while self._text and not self._text[-1]:
+            self._text.pop()
+        if self._text:
+            self._text[-1] = self._text[-1][:-1]
+        if self._switcher_open:
+            self._query = self._query[:-1]
+
+    def press_hotkey(self, key: str) -> None:
+        """Simulate the user pressing a registered global hotkey."""
+        callback, args = self.hotkeys[key]
+        callback(*args)
+
+    def hotkey(self, *keys: str) -> None:
+        self._record("hotkey", *keys)
+        if keys == ("ctrl", "k"):
+            self._switcher_open = True
+            self._query = ""
+        elif keys == ("esc",):
+            self._switcher_open = False
+        elif keys == ("ctrl", "v"):
+            self._enter(self.clipboard)
+        elif keys == ("enter",):
+            self._enter("\n")
+        elif keys == ("backspace",):
+            self._erase()
+
+    def typewrite(self, text: str, interval: float = 0.0) -> None:
+        self._record("typewrite", text, interval)
+        self._enter(text)
+
+    def write(self, text: str) -> None:
+        self._record("write", text)
+        self._enter(text)
+
+    def get_clipboard(self) -> str:
+        self._record("get_clipboard")
+        return self.clipboard
+
+    def set_clipboard(self, text: str) -> None:
+        self._record("set_clipboard", text)
+        self.clipboard = text
+
+    def get_active_window(self) -> Window | None:
+        self._record("get_active_window")
+        return self.active
+
+    def get_active_window_title(self) -> str | None:
+        self._record("get_active_window_title")
+        return self.active.title if self.active is not None else None
+
+    def get_windows_with_title(self, title: str) -> list[Window]:
+        self._record("get_windows_with_title", title)
+        return [win for win in self.windows
+                if win.alive and title in win.title]
+
+    def is_window_alive(self, win: Window) -> bool:
+        self._record("is_window_alive", win)
+        return getattr(win, "alive", True)
+
+    def activate_window(self, win: Window) -> None:
+        self._record("activate_window", win)
+        win.activate()
+
+    def add_hotkey(self,
+                   key: str,
+                   callback: Callable[..., Any],
+                   args: tuple = ()) -> None:
+        self._record("add_hotkey", key)
+        self.hotkeys[key] = (callback, args)
+
+    def capture(self, region: tuple[int, int, int, int]) -> "NDArray[Any]":
+        import numpy as np
+        self._record("capture", region)
+        _, _, width, height = region
+        if not self.frames:
+            return np.zeros((height, width, 3), dtype=np.uint8)
+        return self.frames.pop(0)[:height, :width]
+
+
+class _Current:
+    """Global holder of the backend used by the session engine."""
+    backend: Backend | None = None
+
+
+def get_backend() -> Backend:
+    """Return the backend in use, defaulting to PyAutoGUIBackend."""
+    if _Current.backend is None:
+        _Current.backend = PyAutoGUIBackend()
+    return _Current.backend
+
+
+def set_backend(backend: Backend | None) -> None:
+    """Replace the backend in use.
+
+    Args:
+        backend (Backend | None): The new backend. None resets to the
+        default PyAutoGUIBackend on next use.
+    """
+    _Current.backend = backend
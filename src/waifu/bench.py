@@ -0,0 +1,257 @@
+"""
+bench.py
+18 October 2026 16:49:51
+
+Benchmark the phases of a rolling session against a headless backend.
+
+Sleeps go through a VirtualClock, so the wall and CPU times measured are
+the overhead of the session engine itself, not the waits it asks for.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from collections import Counter
+from functools import partial
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import rich
+from rich.table import Table
+
+from . import core
+from .backend import RecordingBackend, set_backend
+from .clock import VirtualClock, set_clock
+from .parser import SessionEntry
+from .plan import Interpreter, compile_plan, optimize, split_phases
+from .ratelimit import RateLimiter
+from .transport import GUITransport
+from .wishlist import Automaton, load_automaton, normalize, parse_entries
+
+SESSION_SIZES = (10, 100, 1000)
+ROLL_BUDGET_US = 100.0  # microseconds of overhead allowed per roll
+TITLE_QUERIES_PER_ROLL = 2  # get_active_window_title calls allowed per roll
+
+WISHLIST_MATCH_BUDGET_US = 1000.0  # microseconds allowed to check a reply
+WISHLIST_REPLIES = 200  # replies matched per wishlist benchmark
+
+BENCH_CHANNEL = "waifu-spam"
+BENCH_COMMAND = "wa"
+
+PHASE_NAMES = {
+    None: "open",
+    "navigate_to_channel": "navigate",
+    "start_rolling": "roll",
+    "revert_window": "revert",
+}
+"""Names of the phases of the plan in the results."""
+
+
+class PhaseResult(NamedTuple):
+    """Measurements of one phase of a benchmarked session."""
+    phase: str
+    wall: float
+    """Seconds of real time spent."""
+    cpu: float
+    """Seconds of CPU time spent by the process."""
+    virtual: float
+    """Seconds of time the phase waited for, as seen by the engine."""
+    calls: Counter[str]
+    """Number of calls to each backend method."""
+
+
+def _measure(phase: str,
+             func: Callable[[], None],
+             backend: RecordingBackend,
+             clock: VirtualClock) -> PhaseResult:
+    """Run one phase and measure it."""
+    first_action = len(backend.actions)
+    virtual_start = clock.now
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    func()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    calls = Counter(action.kind for action in backend.actions[first_action:])
+    return PhaseResult(phase, wall, cpu, clock.now - virtual_start, calls)
+
+
+def bench_session(rolls: int) -> list[PhaseResult]:
+    """Run every phase of a session of rolls against RecordingBackend.
+
+    Args:
+        rolls (int): Number of times to roll.
+
+    Returns:
+        list[PhaseResult]: Measurements of the open, navigate, roll and
+        revert phases in order.
+    """
+    backend = RecordingBackend("Terminal",
+                               "#general | Bench Server - Discord")
+    clock = VirtualClock()
+    set_backend(backend)
+    set_clock(clock)
+    # Start from a cold window cache like a fresh process would
+    core._WindowRegistry.invalidate()
+    try:
+        caller = backend.get_active_window()
+        assert caller is not None
+        rate = 1 / core.ROLLING_COOLDOWN
+        limiter = RateLimiter(rate, 1, rate, 1)
+        interpreter = Interpreter(GUITransport("batch"), limiter, False,
+                                  caller=caller)
+        entry = SessionEntry(BENCH_COMMAND, BENCH_CHANNEL, rolls, False)
+        plan = optimize(compile_plan([entry], revert=True))
+        # Every phase runs as its own plan, measured on its own
+        return [_measure(PHASE_NAMES[name], partial(interpreter.run, steps),
+                         backend, clock)
+                for name, steps in split_phases(plan)]
+    finally:
+        set_backend(None)
+        set_clock(None)
+        core._WindowRegistry.invalidate()
+
+
+def _synthetic_wishlist(size: int) -> list[str]:
+    """Return size wishlist lines of made up names with accents and an
+    alias each, always the same for a given size.
+    """
+    rng = random.Random(size)
+    syllables = ["ka", "ri", "mé", "sö", "lu", "na", "tō", "ai", "ren", "yū"]
+
+    def word() -> str:
+        return "".join(rng.choices(syllables, k=rng.randint(2, 4))).title()
+
+    return [f"{word()} {word()} | {word()}" for _ in range(size)]
+
+
+def _synthetic_replies(lines: list[str]) -> list[str]:
+    """Return roll replies looking like Mudae's, a tenth of them with a
+    name from the wishlist.
+    """
+    rng = random.Random(len(lines))
+    replies = []
+    for index in range(WISHLIST_REPLIES):
+        name = (lines[rng.randrange(len(lines))].split("|")[0].strip()
+                if index % 10 == 0 else "Nobody In Particular")
+        replies.append(f"{name}\nAnother Series Title: Season "
+                       f"{index}\n**{rng.randint(30, 900)}**:kakera:\n"
+                       "React with any emoji to claim her!")
+    return replies
+
+
+def bench_wishlist(size: int) -> int:
+    """Benchmark compiling, caching and matching a wishlist of size
+    names, against matching every name with a substring search.
+
+    Returns:
+        int: 1 if matching went over budget, 0 otherwise.
+    """
+    lines = _synthetic_wishlist(size)
+    replies = _synthetic_replies(lines)
+    timings: list[tuple[str, float]] = []
+
+    start = time.perf_counter()
+    automaton = Automaton.compile(parse_entries(lines))
+    timings.append(("Compile", time.perf_counter() - start))
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = Path(directory) / "wishlist.cache"
+        load_automaton(lines, cache_path)
+        start = time.perf_counter()
+        load_automaton(lines, cache_path)
+        timings.append(("Load from cache", time.perf_counter() - start))
+
+    start = time.perf_counter()
+    found = sum(bool(automaton.find(reply)) for reply in replies)
+    per_reply = (time.perf_counter() - start) / len(replies)
+    timings.append(("Match one reply", per_reply))
+
+    patterns = [normalize(pattern) for pattern, _ in parse_entries(lines)]
+    start = time.perf_counter()
+    naive_found = 0
+    for reply in replies:
+        text = normalize(reply)
+        naive_found += any(pattern in text for pattern in patterns)
+    timings.append(("Match one reply by substring search",
+                    (time.perf_counter() - start) / len(replies)))
+    assert found == naive_found
+
+    table = Table(title=f"Wishlist of {size} names")
+    table.add_column("Step")
+    table.add_column("Time (ms)", justify="right")
+    for step, seconds in timings:
+        table.add_row(step, f"{seconds * 1000:.3f}")
+    rich.print(table)
+
+    per_reply_us = per_reply * 1e6
+    ok = per_reply_us <= WISHLIST_MATCH_BUDGET_US
+    rich.print(
+        f"[{'green' if ok else 'bold red'}]Per reply: {per_reply_us:.1f} us "
+        f"(budget {WISHLIST_MATCH_BUDGET_US:.0f} us), {found} of "
+        f"{len(replies)} replies matched[/]\n"
+    )
+    return 0 if ok else 1
+
+
+def _format_calls(calls: Counter[str]) -> str:
+    return ", ".join(f"{kind} {count}" for kind, count in calls.most_common())
+
+
+def run_bench(argv: list[str]) -> int:
+    """Benchmark sessions of various sizes and print the results.
+
+    Interface function to be called from main process.
+
+    Args:
+        argv (list[str]): Command line arguments after "bench".
+
+    Returns:
+        int: The exit code, 1 if the roll phase went over budget.
+    """
+    parser = argparse.ArgumentParser(
+        prog="waifu bench",
+        description="Benchmark the rolling session engine headlessly."
+    )
+    parser.add_argument("sizes", metavar="ROLLS", type=int, nargs="*",
+                        default=list(SESSION_SIZES),
+                        help="Numbers of rolls per session to benchmark "
+                        f"(default: {' '.join(map(str, SESSION_SIZES))})")
+    parser.add_argument("--wishlist", metavar="NAMES", type=int,
+                        help="Also benchmark matching replies against a "
+                        "wishlist of this many names, e.g. 50000")
+    ns = parser.parse_args(argv)
+
+    over_budget = False
+    for rolls in ns.sizes:
+        results = bench_session(rolls)
+        table = Table(title=f"Session of {rolls} rolls")
+        table.add_column("Phase")
+        table.add_column("Wall (ms)", justify="right")
+        table.add_column("CPU (ms)", justify="right")
+        table.add_column("Waited (s)", justify="right")
+        table.add_column("Backend calls")
+        for result in results:
+            table.add_row(result.phase,
+                          f"{result.wall * 1000:.2f}",
+                          f"{result.cpu * 1000:.2f}",
+                          f"{result.virtual:.2f}",
+                          _format_calls(result.calls))
+        rich.print(table)
+
+        roll = next(result for result in results if result.phase == "roll")
+        per_roll_us = roll.wall / max(rolls, 1) * 1e6
+        title_queries = (roll.calls["get_active_window_title"]
+                         / max(rolls, 1))
+        ok = (per_roll_us <= ROLL_BUDGET_US
+              and title_queries <= TITLE_QUERIES_PER_ROLL)
+        over_budget |= not ok
+        rich.print(
+            f"[{'green' if ok else 'bold red'}]Per roll: "
+            f"{per_roll_us:.1f} us (budget {ROLL_BUDGET_US:.0f} us), "
+            f"{title_queries:.2f} window title queries "
+            f"(budget {TITLE_QUERIES_PER_ROLL})[/]\n"
+        )
+    if ns.wishlist:
+        over_budget |= bool(bench_wishlist(ns.wishlist))
+    return 1 if over_budget else 0
@@ -0,0 +1,181 @@
+"""
+cancel.py
+18 October 2026 17:11:12
+
+Cancellation of the rolling session in progress.
+
+Every wait of a session goes through the token of the session, so that
+cancelling it from another thread (the abort hotkey's) wakes the wait
+up right away, whether it blocks or is awaited on an event loop. The
+session then stops at that wait, which always lies between two actions,
+instead of wherever the main thread happens to be when interrupted.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from .clock import Clock, get_clock
+from .exceptions import SessionCancelled
+
+
+class CancelToken:
+    """Cancellation state of one session, shared between threads."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self.reason: str | None = None
+        """What cancelled the session, e.g. "esc", if cancelled."""
+        self.cancelled_at: float | None = None
+        """time.perf_counter() of the cancellation, if cancelled."""
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the session was cancelled."""
+        return self._event.is_set()
+
+    def cancel(self, reason: str) -> None:
+        """Cancel the session, waking up its wait in progress if any.
+        Safe to call from any thread, only the first call counts.
+
+        Args:
+            reason (str): What cancelled the session, e.g. "esc".
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self.cancelled_at = time.perf_counter()
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Call callback upon cancellation, from the cancelling thread,
+        or right away if already cancelled.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """Stop calling a callback added with add_callback()."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self) -> None:
+        """Raise if the session was cancelled.
+
+        Raises:
+            SessionCancelled: The session was cancelled.
+        """
+        if self._event.is_set():
+            raise SessionCancelled(self.reason or "cancelled")
+
+    def sleep(self, seconds: float, clock: Clock | None = None) -> None:
+        """Sleep like the clock does, unless cancelled meanwhile.
+
+        Args:
+            seconds (float): Time to sleep.
+            clock (Clock | None, optional): Clock to sleep on. Defaults
+            to None (use the clock of the session engine).
+
+        Raises:
+            SessionCancelled: The session was cancelled, before or
+            while sleeping.
+        """
+        self.check()
+        clock = clock if clock is not None else get_clock()
+        clock.wait(self._event, seconds)
+        self.check()
+
+    async def asleep(self, seconds: float, clock: Clock | None = None) -> None:
+        """Like sleep(), but suspends the current task instead of
+        blocking.
+
+        Raises:
+            SessionCancelled: The session was cancelled, before or
+            while sleeping.
+        """
+        # Imported here since only the asyncio engine needs it
+        import asyncio
+
+        self.check()
+        if seconds <= 0:
+            return
+        clock = clock if clock is not None else get_clock()
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+
+        def wake() -> None:
+            # From the cancelling thread, which may outlive the loop
+            try:
+                loop.call_soon_threadsafe(woken.set)
+            except RuntimeError:
+                pass
+
+        self.add_callback(wake)
+        sleeping = asyncio.ensure_future(clock.asleep(seconds))
+        waking = asyncio.ensure_future(woken.wait())
+        try:
+            await asyncio.wait((sleeping, waking),
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.remove_callback(wake)
+            sleeping.cancel()
+            waking.cancel()
+        self.check()
+
+    def latency(self) -> float | None:
+        """Return the seconds elapsed since the cancellation, if any."""
+        if self.cancelled_at is None:
+            return None
+        return time.perf_counter() - self.cancelled_at
+
+
+class _Current:
+    """Global holder of the token of the session in progress."""
+    token: CancelToken | None = None
+    # Handed out between sessions, never cancelled
+    idle = CancelToken()
+
+
+def get_token() -> CancelToken:
+    """Return the token of the session in progress, or a token that is
+    never cancelled if there is none.
+    """
+    return _Current.token if _Current.token is not None else _Current.idle
+
+
+@contextmanager
+def session_scope() -> Iterator[CancelToken]:
+    """Give the session run within a fresh token for its duration."""
+    token = CancelToken()
+    _Current.token = token
+    try:
+        yield token
+    finally:
+        _Current.token = None
+
+
+def cancel_session(reason: str) -> bool:
+    """Cancel the session in progress, from any thread.
+
+    Args:
+        reason (str): What cancelled the session, e.g. "esc".
+
+    Returns:
+        bool: Whether there was a session in progress to cancel.
+    """
+    token = _Current.token
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
@@ -0,0 +1,120 @@
+"""
+clock.py
+18 October 2026 15:12:51
+
+Time source used for the timing of rolling sessions.
+"""
+
+import threading
+import time
+from typing import Protocol
+
+
+class Clock(Protocol):
+    """Interface of a monotonic time source that can be slept on."""
+
+    def monotonic(self) -> float:
+        """Return the current time in seconds, never going backwards."""
+        ...
+
+    def time(self) -> float:
+        """Return the current wall clock time in seconds since the epoch."""
+        ...
+
+    def sleep(self, seconds: float) -> None:
+        """Block for the given number of seconds."""
+        ...
+
+    async def asleep(self, seconds: float) -> None:
+        """Suspend the current task for the given number of seconds."""
+        ...
+
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        """Block for the given number of seconds or until event is set,
+        returning whether it is.
+        """
+        ...
+
+
+class SystemClock:
+    """Clock backed by the real time of the system."""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    async def asleep(self, seconds: float) -> None:
+        # Imported here since only the asyncio engine needs it
+        import asyncio
+        await asyncio.sleep(seconds)
+
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        return event.wait(max(seconds, 0.0))
+
+
+class VirtualClock:
+    """Clock whose time only moves when slept on or advanced.
+
+    Sleeping returns immediately after moving the time forward, so code
+    timed with this clock runs as fast as it can while still seeing the
+    time pass as if it had really waited. The same time is used as the
+    wall clock time, so start can be set to a timestamp.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.now = start
+        """The current virtual time in seconds."""
+        self.slept = 0.0
+        """Total virtual seconds spent sleeping."""
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            self.now += seconds
+            self.slept += seconds
+
+    async def asleep(self, seconds: float) -> None:
+        import asyncio
+        self.sleep(seconds)
+        # Still let the other tasks run, like a real sleep would
+        await asyncio.sleep(0)
+
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        # Nothing can set the event while the time jumps forward
+        if not event.is_set():
+            self.sleep(seconds)
+        return event.is_set()
+
+    def advance(self, seconds: float) -> None:
+        """Move the time forward without counting it as sleep."""
+        self.now += max(seconds, 0.0)
+
+
+class _Current:
+    """Global holder of the clock used by the session engine."""
+    clock: Clock = SystemClock()
+
+
+def get_clock() -> Clock:
+    """Return the clock in use, SystemClock unless replaced."""
+    return _Current.clock
+
+
+def set_clock(clock: Clock | None) -> None:
+    """Replace the clock in use.
+
+    Args:
+        clock (Clock | None): The new clock. None resets to the
+        SystemClock.
+    """
+    _Current.clock = clock if clock is not None else SystemClock()
@@ -5,15 +5,20 @@ config.py
 Handle configuration setup.
 """
 
+import copy
+import marshal
+import os
 from pathlib import Path
 from typing import Any
 
 import rich
-import yaml
 
+from . import __version__
 from .config_template import CONFIG_TEMPLATE
 from .exceptions import (ConfigFileError, ConfigFormatError,
                          get_user_config_path)
+from .inject import INJECTION_MODES
+from .transport import TRANSPORT_MODES
 
 # Updated 0.0.3: Remember to update this when a new field is added
 CONFIG_FILE_SCHEMA: dict[str, type] = {
@@ -21,9 +26,128 @@ CONFIG_FILE_SCHEMA: dict[str, type] = {
     "revert-window": bool,
     "keep-failsafe": bool,
     "skip-confirmation": bool,
-    "defaults": dict  # subkeys validated in parser.Parser
+    "defaults": dict  # subkeys validated in parser.validate_defaults
 }
 
+# 0.2.0: Options added after 0.1.0 are optional so that existing config files
+# keep working. Maps each option to its type and the value used if omitted.
+OPTIONAL_CONFIG_SCHEMA: dict[str, tuple[type, Any]] = {
+    "text-injection": (str, "batch"),
+    "verify-navigation": (bool, True),
+    "transport": (dict, {}),  # subkeys validated in _validate_transport
+    "rate-limit": (dict, {}),  # subkeys validated in _validate_rate_limit
+    "manifest": (list, []),  # entries validated in parser.validate_defaults
+    "schedule": (dict, {}),  # subkeys validated in _validate_schedule
+    "reader": (dict, {}),  # subkeys validated in _validate_reader
+    "pacing": (dict, {}),  # subkeys validated in _validate_pacing
+    "metrics": (dict, {}),  # subkeys validated in _validate_metrics
+    "history": (dict, {}),  # subkeys validated in _validate_history
+    "wishlist": (dict, {}),  # subkeys validated in _validate_wishlist
+    "accounts": (dict, {}),  # subkeys validated in _validate_accounts
+    "macros": (dict, {}),  # steps validated in _validate_macros
+}
+
+MappingSchema = dict[str, tuple[tuple[type, ...], Any]]
+"""Maps each subkey of a mapping option to its types and default."""
+
+TRANSPORT_SCHEMA: MappingSchema = {
+    "mode": ((str,), "gui"),
+    "api-base": ((str,), None),
+    "token": ((str,), None),
+    "channel-id": ((str, int), None),
+}
+
+RATE_LIMIT_SCHEMA: MappingSchema = {
+    "rolls-per-minute": ((int, float), 60),
+    "burst": ((int, float), 1),
+    "global-rolls-per-minute": ((int, float), 60),
+    "global-burst": ((int, float), 1),
+}
+
+SCHEDULE_SCHEMA: MappingSchema = {
+    "interval-minutes": ((int, float), 60),
+    "offset-minutes": ((int, float), 0),
+    # $daily and $dk have a 20 hour cooldown
+    "daily-interval-minutes": ((int, float), 1200),
+    "daily-offset-minutes": ((int, float), 0),
+}
+
+READER_SCHEMA: MappingSchema = {
+    "enabled": ((bool,), False),
+    "region": ((list,), None),
+    "colours": ((dict,), {}),
+    "templates": ((dict,), {}),
+    "threshold": ((int, float), 0.8),
+    "pause-on": ((list,), []),
+}
+
+PACING_MODES = ("fixed", "response")
+"""Valid values for the pacing.mode configuration option."""
+
+PACING_SCHEMA: MappingSchema = {
+    "mode": ((str,), "fixed"),
+    "region": ((list,), None),
+    "min-gap": ((int, float), 0.25),
+    "timeout": ((int, float), 3.0),
+    "threshold": ((int, float), 0.2),
+}
+
+METRICS_SCHEMA: MappingSchema = {
+    "textfile": ((str,), None),
+    "port": ((int,), None),
+}
+
+HISTORY_SCHEMA: MappingSchema = {
+    "enabled": ((bool,), False),
+    "path": ((str,), None),
+    "reply-timeout": ((int, float), 2.0),
+}
+
+WISHLIST_SCHEMA: MappingSchema = {
+    "names": ((list,), []),
+    "files": ((list,), []),
+    "reply-timeout": ((int, float), 2.0),
+}
+
+ACCOUNTS_SCHEMA: MappingSchema = {
+    "workers": ((int,), None),
+    "rolls-per-minute": ((int, float), 120),
+    "burst": ((int, float), 1),
+    "profiles": ((list,), []),
+}
+
+# Omitted subkeys fall back to the transport and defaults options
+ACCOUNT_PROFILE_SCHEMA: MappingSchema = {
+    "name": ((str,), None),
+    "token": ((str,), None),
+    "api-base": ((str,), None),
+    "channel-id": ((str, int), None),
+    "mudae-command": ((str,), None),
+    "target-channel": ((str,), None),
+    "num-rolls": ((int,), None),
+    "daily": ((bool,), False),
+}
+
+# Every step of a macro maps one of these kinds to its value, see plan.py
+MACRO_STEP_SCHEMA: dict[str, tuple[type, ...]] = {
+    "key": (str,),
+    "text": (str,),
+    "wait": (int, float),
+    "send": (str,),
+    "rolls": (int, type(None)),
+}
+
+SNAPSHOT_SUFFIX = ".snapshot"
+"""Suffix of the validated snapshot cached next to config.yaml."""
+
+# Snapshots built by another version or with other schemas are rebuilt
+_SNAPSHOT_FORMAT = repr((__version__, CONFIG_FILE_SCHEMA,
+                         OPTIONAL_CONFIG_SCHEMA, TRANSPORT_SCHEMA,
+                         RATE_LIMIT_SCHEMA, SCHEDULE_SCHEMA, READER_SCHEMA,
+                         PACING_SCHEMA, METRICS_SCHEMA, HISTORY_SCHEMA,
+                         WISHLIST_SCHEMA, ACCOUNTS_SCHEMA,
+                         ACCOUNT_PROFILE_SCHEMA, MACRO_STEP_SCHEMA))
+
 
 def _set_up_config_file() -> Path:
     """Set up the config.yaml file if it does not exist yet.
@@ -64,6 +188,8 @@ def _validate_config_format(config: ConfigDict) -> None:
     YAML but I would like finer control over the errors. Also, this is
     dependency hell enough.
 
+    Also fill in any omitted optional options with their default.
+
     Args:
         config (ConfigDict): The configuration loaded from config.yaml.
 
@@ -95,10 +221,478 @@ def _validate_config_format(config: ConfigDict) -> None:
                 f"got {loaded_type.__name__} instead"
             )
 
+    for key, (expected_type, default) in OPTIONAL_CONFIG_SCHEMA.items():
+        if config.get(key) is None:
+            # Copy so mutable defaults aren't shared between loads
+            config[key] = copy.deepcopy(default)
+            continue
+        loaded_type = type(config[key])
+        if loaded_type is not expected_type:
+            raise ConfigFormatError(
+                f"Option {key!r} should be type {expected_type.__name__}, "
+                f"got {loaded_type.__name__} instead"
+            )
+
+    if config["text-injection"] not in INJECTION_MODES:
+        raise ConfigFormatError(
+            f"{config['text-injection']!r} is a bad value for option "
+            f"'text-injection': should be one of {', '.join(INJECTION_MODES)}"
+        )
+    _validate_transport(config["transport"])
+    _validate_rate_limit(config["rate-limit"])
+    _validate_schedule(config["schedule"])
+    _validate_reader(config["reader"])
+    _validate_pacing(config["pacing"])
+    _validate_metrics(config["metrics"])
+    _validate_history(config["history"])
+    _validate_wishlist(config["wishlist"])
+    _validate_accounts(config["accounts"], config["transport"])
+    _validate_macros(config["macros"], config["transport"])
+
+
+def _validate_mapping(option: str,
+                      mapping: dict[str, Any],
+                      schema: MappingSchema) -> None:
+    """Raise helpful errors for any type violation in a mapping option.
+
+    Also fill in any omitted subkeys with their default.
+
+    Args:
+        option (str): Name of the option, for error messages.
+        mapping (dict[str, Any]): The loaded option.
+        schema (MappingSchema): Expected subkeys of the option.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    for key, (expected_types, default) in schema.items():
+        if mapping.get(key) is None:
+            mapping[key] = copy.deepcopy(default)
+        value = mapping[key]
+        if value is not None and type(value) not in expected_types:
+            names = " or ".join(t.__name__ for t in expected_types)
+            raise ConfigFormatError(
+                f"Option '{option}.{key}' should be type {names}, "
+                f"got {type(value).__name__} instead"
+            )
+
+
+def _validate_transport(transport: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the transport option.
+
+    Args:
+        transport (dict[str, Any]): The loaded transport option.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    _validate_mapping("transport", transport, TRANSPORT_SCHEMA)
+
+    mode = transport["mode"]
+    if mode not in TRANSPORT_MODES:
+        raise ConfigFormatError(
+            f"{mode!r} is a bad value for option 'transport.mode': "
+            f"should be one of {', '.join(TRANSPORT_MODES)}"
+        )
+    # The HTTP transport has nothing to fall back on for these
+    if mode == "http":
+        for key in ("api-base", "token", "channel-id"):
+            if transport[key] is None:
+                raise ConfigFormatError(
+                    f"Option 'transport.{key}' is required when "
+                    "'transport.mode' is 'http'"
+                )
+
+
+def _validate_rate_limit(rate_limit: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the rate-limit option.
+
+    Args:
+        rate_limit (dict[str, Any]): The loaded rate-limit option.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    _validate_mapping("rate-limit", rate_limit, RATE_LIMIT_SCHEMA)
+    for key, value in rate_limit.items():
+        if key in RATE_LIMIT_SCHEMA and value <= 0:
+            raise ConfigFormatError(
+                f"{value!r} is a bad value for option 'rate-limit.{key}': "
+                "should be a positive number"
+            )
+
+
+def _validate_schedule(schedule: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the schedule option.
+
+    Args:
+        schedule (dict[str, Any]): The loaded schedule option.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    _validate_mapping("schedule", schedule, SCHEDULE_SCHEMA)
+    if schedule["interval-minutes"] <= 0:
+        raise ConfigFormatError(
+            f"{schedule['interval-minutes']!r} is a bad value for option "
+            "'schedule.interval-minutes': should be a positive number"
+        )
+    # A daily interval of 0 turns the daily commands off
+    for key in ("offset-minutes", "daily-interval-minutes",
+                "daily-offset-minutes"):
+        if schedule[key] < 0:
+            raise ConfigFormatError(
+                f"{schedule[key]!r} is a bad value for option "
+                f"'schedule.{key}': should be a non-negative number"
+            )
+
+
+def _validate_region(option: str, region: list | None) -> None:
+    """Raise a helpful error if region isn't a screen area.
+
+    Args:
+        option (str): Name of the option with the region subkey.
+        region (list | None): The loaded region subkey.
+
+    Raises:
+        ConfigFormatError: If region is set to anything but a list of
+        left, top, width and height.
+    """
+    if region is not None and not (
+        len(region) == 4
+        and all(type(value) is int for value in region)
+        and region[2] > 0 and region[3] > 0
+    ):
+        raise ConfigFormatError(
+            f"{region!r} is a bad value for option '{option}.region': "
+            "should be a list of left, top, width, height in pixels"
+        )
+
+
+def _validate_reader(reader: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the reader option.
+
+    Args:
+        reader (dict[str, Any]): The loaded reader option.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    _validate_mapping("reader", reader, READER_SCHEMA)
+
+    region = reader["region"]
+    _validate_region("reader", region)
+    for label, colour in reader["colours"].items():
+        if not (type(colour) is list and len(colour) == 3
+                and all(type(value) is int and 0 <= value <= 255
+                        for value in colour)):
+            raise ConfigFormatError(
+                f"{colour!r} is a bad value for option "
+                f"'reader.colours.{label}': should be a list of red, green, "
+                "blue from 0 to 255"
+            )
+    for label, path in reader["templates"].items():
+        if type(path) is not str:
+            raise ConfigFormatError(
+                f"Option 'reader.templates.{label}' should be type str, "
+                f"got {type(path).__name__} instead"
+            )
+    if not 0 < reader["threshold"] <= 1:
+        raise ConfigFormatError(
+            f"{reader['threshold']!r} is a bad value for option "
+            "'reader.threshold': should be a number from 0 to 1"
+        )
+    labels = reader["colours"].keys() | reader["templates"].keys()
+    for label in reader["pause-on"]:
+        if label not in labels:
+            raise ConfigFormatError(
+                f"{label!r} in option 'reader.pause-on' is not the label of "
+                "any of 'reader.colours' or 'reader.templates'"
+            )
+
+    # The reader has nothing to fall back on for these
+    if reader["enabled"]:
+        if region is None:
+            raise ConfigFormatError(
+                "Option 'reader.region' is required when 'reader.enabled' "
+                "is true"
+            )
+        if not labels:
+            raise ConfigFormatError(
+                "Options 'reader.colours' and 'reader.templates' can't both "
+                "be empty when 'reader.enabled' is true"
+            )
+
+
+def _validate_pacing(pacing: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the pacing option.
+
+    Args:
+        pacing (dict[str, Any]): The loaded pacing option.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    _validate_mapping("pacing", pacing, PACING_SCHEMA)
+
+    mode = pacing["mode"]
+    if mode not in PACING_MODES:
+        raise ConfigFormatError(
+            f"{mode!r} is a bad value for option 'pacing.mode': "
+            f"should be one of {', '.join(PACING_MODES)}"
+        )
+    _validate_region("pacing", pacing["region"])
+    for key in ("min-gap", "timeout"):
+        if pacing[key] < 0:
+            raise ConfigFormatError(
+                f"{pacing[key]!r} is a bad value for option 'pacing.{key}': "
+                "should be a non-negative number"
+            )
+    if not 0 < pacing["threshold"] <= 1:
+        raise ConfigFormatError(
+            f"{pacing['threshold']!r} is a bad value for option "
+            "'pacing.threshold': should be a number from 0 to 1"
+        )
+    # The response mode has nothing to fall back on for this
+    if mode == "response" and pacing["region"] is None:
+        raise ConfigFormatError(
+            "Option 'pacing.region' is required when 'pacing.mode' is "
+            "'response'"
+        )
+
+
+def _validate_metrics(metrics: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the metrics option.
+
+    Args:
+        metrics (dict[str, Any]): The loaded metrics option.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    _validate_mapping("metrics", metrics, METRICS_SCHEMA)
+    port = metrics["port"]
+    if port is not None and not 0 < port < 65536:
+        raise ConfigFormatError(
+            f"{port!r} is a bad value for option 'metrics.port': should be "
+            "a port number from 1 to 65535"
+        )
+
+
+def _validate_history(history: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the history option.
+
+    Args:
+        history (dict[str, Any]): The loaded history option.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    _validate_mapping("history", history, HISTORY_SCHEMA)
+    if history["reply-timeout"] < 0:
+        raise ConfigFormatError(
+            f"{history['reply-timeout']!r} is a bad value for option "
+            "'history.reply-timeout': should be a non-negative number"
+        )
+
+
+def _validate_wishlist(wishlist: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the wishlist option.
+
+    Args:
+        wishlist (dict[str, Any]): The loaded wishlist option.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    _validate_mapping("wishlist", wishlist, WISHLIST_SCHEMA)
+    for key in ("names", "files"):
+        for item in wishlist[key]:
+            if type(item) is not str:
+                raise ConfigFormatError(
+                    f"{item!r} is a bad value in option 'wishlist.{key}': "
+                    "should be a string"
+                )
+    if wishlist["reply-timeout"] < 0:
+        raise ConfigFormatError(
+            f"{wishlist['reply-timeout']!r} is a bad value for option "
+            "'wishlist.reply-timeout': should be a non-negative number"
+        )
+
+
+def _validate_accounts(accounts: dict[str, Any],
+                       transport: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the accounts option.
+
+    The session subkeys of the profiles are checked once the defaults
+    they fall back to are, see accounts.profiles_from_config.
+
+    Args:
+        accounts (dict[str, Any]): The loaded accounts option.
+        transport (dict[str, Any]): The already validated transport
+        option, which the profiles fall back to.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    _validate_mapping("accounts", accounts, ACCOUNTS_SCHEMA)
+    workers = accounts["workers"]
+    if workers is not None and workers < 1:
+        raise ConfigFormatError(
+            f"{workers!r} is a bad value for option 'accounts.workers': "
+            "should be a positive integer"
+        )
+    for key in ("rolls-per-minute", "burst"):
+        if accounts[key] <= 0:
+            raise ConfigFormatError(
+                f"{accounts[key]!r} is a bad value for option "
+                f"'accounts.{key}': should be a positive number"
+            )
+
+    names = set()
+    for index, profile in enumerate(accounts["profiles"]):
+        option = f"accounts.profiles.{index}"
+        if type(profile) is not dict:
+            raise ConfigFormatError(
+                f"Option {option!r} should be a mapping, got "
+                f"{type(profile).__name__} instead"
+            )
+        _validate_mapping(option, profile, ACCOUNT_PROFILE_SCHEMA)
+        for key in ("name", "token"):
+            if profile[key] is None:
+                raise ConfigFormatError(f"Option '{option}.{key}' is required")
+        if profile["name"] in names:
+            raise ConfigFormatError(
+                f"Option '{option}.name' repeats the account name "
+                f"{profile['name']!r}"
+            )
+        names.add(profile["name"])
+        for key in ("api-base", "channel-id"):
+            if profile[key] is None and transport[key] is None:
+                raise ConfigFormatError(
+                    f"Option '{option}.{key}' is required when "
+                    f"'transport.{key}' is not set"
+                )
+
+
+def _validate_macros(macros: dict[str, Any],
+                     transport: dict[str, Any]) -> None:
+    """Raise helpful errors for any violation in the macros option.
+
+    Args:
+        macros (dict[str, Any]): The loaded macros option.
+        transport (dict[str, Any]): The already validated transport
+        option, since only the gui mode can press keys in Discord.
+
+    Raises:
+        ConfigFormatError: If there is any format violation.
+    """
+    kinds = ", ".join(MACRO_STEP_SCHEMA)
+    for name, steps in macros.items():
+        option = f"macros.{name}"
+        if type(steps) is not list or not steps:
+            raise ConfigFormatError(
+                f"Option {option!r} should be a non-empty list of steps"
+            )
+        for index, step in enumerate(steps):
+            step_option = f"{option}.{index}"
+            if (type(step) is not dict or len(step) != 1
+                    or next(iter(step)) not in MACRO_STEP_SCHEMA):
+                raise ConfigFormatError(
+                    f"Option {step_option!r} should be a mapping of one of "
+                    f"{kinds} to its value"
+                )
+            ((kind, value),) = step.items()
+            expected_types = MACRO_STEP_SCHEMA[kind]
+            if type(value) not in expected_types:
+                names = " or ".join(t.__name__ for t in expected_types)
+                raise ConfigFormatError(
+                    f"Option '{step_option}.{kind}' should be type {names}, "
+                    f"got {type(value).__name__} instead"
+                )
+            if kind in ("wait", "rolls") and value is not None and value < 0:
+                raise ConfigFormatError(
+                    f"{value!r} is a bad value for option "
+                    f"'{step_option}.{kind}': should be non-negative"
+                )
+            if kind == "key" and not all(value.split("+")):
+                raise ConfigFormatError(
+                    f"{value!r} is a bad value for option "
+                    f"'{step_option}.key': should be keys joined by +, e.g. "
+                    "'ctrl+k'"
+                )
+            if kind in ("key", "text") and transport["mode"] != "gui":
+                raise ConfigFormatError(
+                    f"Option '{step_option}.{kind}' needs the gui transport "
+                    "to enter input into Discord, but 'transport.mode' is "
+                    f"{transport['mode']!r}"
+                )
+
+
+def _parse_config(content: bytes) -> ConfigDict:
+    """Parse and fully validate the content of the configuration file.
+
+    Raises:
+        ConfigFormatError: There was a formatting error in the content.
+    """
+    # Imported here since a fresh snapshot makes them unnecessary
+    import yaml
+
+    from .parser import validate_defaults
+
+    config = yaml.safe_load(content)
+    _validate_config_format(config)
+    validate_defaults(config["defaults"], config["manifest"])
+    return config
+
+
+def _hash_content(content: bytes) -> bytes:
+    """Return the digest identifying a version of the configuration."""
+    import hashlib
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def _read_snapshot(path: Path) -> tuple[Any, ...] | None:
+    """Return the snapshot at path, or None if missing or unusable.
+
+    A snapshot is a (format, stamp, digest, config) tuple where stamp is
+    the (mtime_ns, size) of the configuration file it was built from.
+    """
+    try:
+        with open(path, "rb") as fp:
+            snapshot = marshal.load(fp)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if (not isinstance(snapshot, tuple) or len(snapshot) != 4
+            or snapshot[0] != _SNAPSHOT_FORMAT):
+        return None
+    return snapshot
+
+
+def _write_snapshot(path: Path,
+                    stamp: tuple[int, int],
+                    digest: bytes,
+                    config: ConfigDict) -> None:
+    """Atomically replace the snapshot at path, failing silently.
+
+    The snapshot is only an optimization, so not being able to write it
+    (read-only directory, unmarshallable values) is not an error.
+    """
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        data = marshal.dumps((_SNAPSHOT_FORMAT, stamp, digest, config))
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+    except (OSError, ValueError):
+        temp_path.unlink(missing_ok=True)
+
 
 def load_config() -> ConfigDict:
     """Load configuration options from YAML file.
 
+    The validated options are cached in a snapshot next to the file, so
+    that YAML is only parsed and validated again after the file changes.
+
     Interface function to be called from main process.
 
     Raises:
@@ -112,11 +706,23 @@ def load_config() -> ConfigDict:
     """
     # Set up config.yaml file in .config directory if doesn't exist yet
     config_path = _set_up_config_file()
+    snapshot_path = config_path.with_suffix(SNAPSHOT_SUFFIX)
     try:
-        with open(config_path, "rt") as fp:
-            config = yaml.safe_load(fp)
-            _validate_config_format(config)
-            return config
+        stat = config_path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        snapshot = _read_snapshot(snapshot_path)
+        if snapshot is not None and snapshot[1] == stamp:
+            return snapshot[3]
+
+        content = config_path.read_bytes()
+        digest = _hash_content(content)
+        if snapshot is not None and snapshot[2] == digest:
+            # Touched but unchanged, no need to parse and validate again
+            config = snapshot[3]
+        else:
+            config = _parse_config(content)
+        _write_snapshot(snapshot_path, stamp, digest, config)
+        return config
     # Shouldn't happen but who knows
     except OSError as e:
         rich.print("[bold red]An unexpected OSError occurred:[/]")
@@ -15,6 +15,120 @@ revert-window: false
 keep-failsafe: true
 # Automatically start rolling, skipping confirmation text
 skip-confirmation: false
+# How to enter text: batch (all at once), paste (via clipboard), or type
+text-injection: batch
+# Check the Discord window title to confirm the channel was navigated to
+verify-navigation: true
+
+# How to deliver commands: gui (type into the Discord app) or http
+transport:
+  mode: gui
+  # Only used by the http mode: Discord-compatible API to send messages to
+  api-base:
+  token:
+  channel-id:
+
+# Pacing of commands, per channel and across all channels
+rate-limit:
+  rolls-per-minute: 60
+  # Commands that may go out back to back after being idle
+  burst: 1
+  global-rolls-per-minute: 60
+  global-burst: 1
+
+# When `waifu schedule` rolls, in minutes. Sessions start every interval,
+# offset from midnight UTC, e.g. an offset of 5 with an interval of 60 rolls
+# at 5 minutes past every hour. The daily commands run on their own cadence,
+# set daily-interval-minutes to 0 to not run them.
+schedule:
+  interval-minutes: 60
+  offset-minutes: 0
+  daily-interval-minutes: 1200
+  daily-offset-minutes: 0
+
+# Classify the reply to every roll from a capture of the screen. Needs the
+# reader extra: pip install waifu-roller[reader]
+reader:
+  enabled: false
+  # Area of the screen with the latest message: [left, top, width, height]
+  region:
+  # Labels for embed sidebar colours, e.g. unclaimed: [255, 156, 44]
+  colours: {}
+  # Labels for icon images to look for, e.g. kakera: ~/kakera.png
+  templates: {}
+  # How closely an icon has to match, from 0 to 1
+  threshold: 0.8
+  # Labels to pause rolling for, e.g. [kakera]
+  pause-on: []
+
+# How to time rolls: fixed (the rate-limit above) or response (also wait for
+# Mudae's reply to show up on screen first). Needs the reader extra too.
+pacing:
+  mode: fixed
+  # Area of the screen just above the message box, about as tall as an embed
+  region:
+  # Seconds to wait after a reply shows up before the next roll
+  min-gap: 0.25
+  # Seconds to wait for a reply before going on anyway
+  timeout: 3.0
+  # Fraction of the region that has to change to count as a reply
+  threshold: 0.2
+
+# Prometheus metrics of the rolling sessions (rolls, aborts, paused time...)
+metrics:
+  # File to write the metrics to after every run, for the node exporter's
+  # textfile collector
+  textfile:
+  # Local port to serve the metrics at /metrics on while running
+  port:
+
+# Database of every roll, queried with waifu history. The character, series and
+# kakera of each roll are only stored with the http transport.
+history:
+  enabled: false
+  # SQLite file to keep the rolls in, next to this file if empty
+  path:
+  # Seconds to wait for the reply to a roll before storing it without
+  reply-timeout: 2.0
+
+# Characters and series to pause rolling for when they show up. Needs the
+# http transport to read the replies.
+wishlist:
+  # Names to look for, each optionally followed by aliases: Rem | Remu
+  names: []
+  # Text files with one name (and its aliases) per line
+  files: []
+  # Seconds to wait for the reply to a roll before giving up on checking it
+  reply-timeout: 2.0
+
+# Accounts to roll for at the same time with `waifu accounts`, each through the
+# http transport. Omitted profile options fall back to the transport and
+# defaults options. Example profile:
+#   - name: alt
+#     token: <token of the account>
+#     num-rolls: 10
+#     daily: true
+accounts:
+  # Processes rolling at once, one per account if empty
+  workers:
+  # Pacing of commands across all the accounts together, on top of the
+  # rate-limit option above, which applies to each account
+  rolls-per-minute: 120
+  burst: 1
+  profiles: []
+
+# Macros to roll with instead of num-rolls roll attempts, chosen with the
+# --macro flag. Each step is one of key (keys pressed together, e.g. ctrl+k),
+# text (entered into Discord, a trailing \\n submits it), wait (seconds), send
+# (a command, paced like the rolls) or rolls (the roll command of the session,
+# that many times or num-rolls times if empty). Example, rolling again once
+# the rolls are reset with $rolls:
+#   refresh:
+#     - send: $p
+#     - rolls:
+#     - send: $rolls
+#     - rolls:
+macros: {}
 
 # Values to use when command line arguments are omitted
 defaults:
@@ -24,4 +138,12 @@ defaults:
   target-channel:
   # Number of times to send the command
   num-rolls:
+
+# Sessions to roll back to back with the -m/--manifest flag. Each entry takes
+# mudae-command, target-channel, num-rolls (falling back to the defaults
+# above if omitted) and daily (false if omitted). Example:
+#   - target-channel: waifu-spam server1
+#     num-rolls: 10
+#     daily: true
+manifest: []
 """
@@ -2,55 +2,232 @@
 core.py
 20 August 2022 13:13:59
 
-The bulk of the pyautogui calls.
+The bulk of the GUI automation calls, made through the backend.
 """
 
 import signal
-import time
+import threading
+from typing import TYPE_CHECKING, Any, Callable
 
-import keyboard
-import pyautogui
 import rich
 
-from .abort import ABORT_KEY
-from .exceptions import DiscordNotOpenError
+from . import metrics
+from .backend import Backend, Window, get_backend, set_backend
+from .cancel import CancelToken, get_token, session_scope
+from .clock import get_clock
+from .exceptions import DiscordNotOpenError, FailSafeError, SessionCancelled
+from .parser import SessionEntry
+from .ratelimit import RateLimiter
+from .trace import get_tracer, traced
+from .transport import GUITransport, HTTPTransport, Transport, message_text
+
+if TYPE_CHECKING:
+    from .history import HistoryWriter
+    from .journal import Journal
+    from .pacing import ReplyPacer
+    from .plan import Interpreter, Plan
+    from .reader import Reader, Reading
+    from .wishlist import Wishlist
 
 # todo: Make configurable later? maybe not
 # The sleep calls are to prevent potential latency problems
 # and to not appear suspicious.
 ACTION_COOLDOWN = 0.1  # seconds to wait between actions
 TYPING_COOLDOWN = 0.05  # seconds to wait between character input
-ROLLING_COOLDOWN = 1.0  # seconds to wait between waifu roll attempts
+ROLLING_COOLDOWN = 1.0  # default seconds between waifu roll attempts
 
 PAUSE_KEY = "capslock"
 REVERT_WINDOW_DELAY = 3.0  # seconds to wait before reverting window
+NAVIGATION_RETRIES = 2  # extra attempts if navigation lands elsewhere
+NAVIGATION_BACKOFF = 0.5  # seconds before first retry, doubled each time
+READ_DELAY = 0.5  # seconds for Mudae to reply before reading the result
+
+# Bounds how long a blocked _wait goes without rechecking its conditions.
+# There is no event to subscribe to for window focus changes, so focus has to
+# be polled, and a bounded wait on the pause event also keeps the main thread
+# responsive to the abort handlers (an unbounded Event.wait() cannot be
+# interrupted on Windows).
+FOCUS_POLL_INTERVAL = 0.25  # seconds between checks while suspended
 
 
 class _Pauser:
-    """Global flag manager for if autogui process is paused or not."""
-    paused = False
+    """Global pause state manager for the autogui process.
+
+    The state is kept in an event that is set while running and cleared
+    while paused, so the main thread can block on it instead of
+    spinning on a flag.
+    """
+    _running = threading.Event()
+    _running.set()
+
+    # Preferences of the current session, read by the hotkey callback
+    _verbose = True
+    _focus = True
+    # Backend the hotkey is registered with, to only register it once
+    _registered: Backend | None = None
+    # Called with the new paused state from whichever thread changed it
+    _listeners: list[Callable[[bool], None]] = []
+
+    @classmethod
+    def register(cls, backend: Backend, verbose: bool, focus: bool) -> None:
+        """Register PAUSE_KEY for the session about to start.
+
+        The hotkey itself is only registered once per backend, so that
+        processes running several sessions don't stack up callbacks.
+
+        Args:
+            backend (Backend): The backend to register the hotkey with.
+            verbose (bool): Configuration preference.
+            focus (bool): Whether to bring Discord back into focus upon
+            resuming.
+        """
+        cls._verbose = verbose
+        cls._focus = focus
+        # Wrappers like TracingBackend come and go around the same backend
+        target = getattr(backend, "wrapped", backend)
+        if cls._registered is not target:
+            backend.add_hotkey(PAUSE_KEY, cls._on_hotkey)
+            cls._registered = target
+
+    @classmethod
+    def _on_hotkey(cls) -> None:
+        cls.toggle(cls._verbose, cls._focus)
+
+    @classmethod
+    def is_paused(cls) -> bool:
+        """Return whether the autogui process is currently paused."""
+        return not cls._running.is_set()
+
+    @classmethod
+    def pause(cls) -> None:
+        """Pause the autogui process at its next wait."""
+        cls._running.clear()
+        for listener in cls._listeners:
+            listener(True)
+
+    @classmethod
+    def resume(cls) -> None:
+        """Wake up any waits blocked on the paused state."""
+        cls._running.set()
+        for listener in cls._listeners:
+            listener(False)
+
+    @classmethod
+    def add_listener(cls, listener: Callable[[bool], None]) -> None:
+        """Call listener with the paused state whenever it changes.
+
+        Args:
+            listener (Callable[[bool], None]): Called with True upon
+            pausing and False upon resuming, from the thread that did
+            it, which is the hotkey thread for PAUSE_KEY.
+        """
+        cls._listeners.append(listener)
+
+    @classmethod
+    def remove_listener(cls, listener: Callable[[bool], None]) -> None:
+        """Stop calling a listener added with add_listener()."""
+        cls._listeners.remove(listener)
+
+    @classmethod
+    def wait_until_resumed(cls, timeout: float | None = None) -> bool:
+        """Block until the process is not paused.
+
+        Args:
+            timeout (float | None, optional): Maximum time in seconds
+            to block. Defaults to None (block indefinitely).
+
+        Returns:
+            bool: True if the process is running, False if the timeout
+            elapsed while still paused.
+        """
+        return cls._running.wait(timeout)
 
     @classmethod
-    def toggle(cls, verbose: bool) -> None:
-        """Toggle the internal flag."""
-        cls.paused = not cls.paused
-        if cls.paused:
+    def toggle(cls, verbose: bool, focus: bool = True) -> None:
+        """Toggle the paused state.
+
+        Args:
+            verbose (bool): Configuration preference.
+            focus (bool, optional): Whether to bring Discord back into
+            focus upon resuming. Defaults to True.
+        """
+        if not cls.is_paused():
+            cls.pause()
             rich.print("[yellow]Program has been paused.[/]")
         else:
+            cls.resume()
             rich.print("[yellow]Program resumed.[/]")
             # 0.0.4: Move back to Discord if unfocused
-            if not _is_discord_active():
+            if focus and not _is_discord_active():
                 _open_discord(verbose)
                 _wait(0.1)
 
 
-def _is_discord_active() -> bool:
-    title: str | None = pyautogui.getActiveWindowTitle()
+def _is_discord_title(title: str | None) -> bool:
+    """Return whether a window title looks like the Discord desktop app."""
     return (title is not None and
             (title == "Discord" or title.endswith("- Discord")))
 
 
-def _wait(delay: float) -> None:
+def _is_discord_active() -> bool:
+    title: str | None = get_backend().get_active_window_title()
+    return _is_discord_title(title)
+
+
+class _WindowRegistry:
+    """Global cache of the Discord desktop application window.
+
+    Enumerating every window to find Discord is slow, so the window is
+    resolved once and reused for as long as it stays valid.
+    """
+    _discord: Window | None = None
+
+    @classmethod
+    def _is_valid(cls, win: Window) -> bool:
+        """Return whether a cached window is still the Discord app."""
+        try:
+            return (get_backend().is_window_alive(win) and
+                    _is_discord_title(win.title))
+        except Exception:
+            return False
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Forget the cached window so the next lookup enumerates."""
+        cls._discord = None
+
+    @classmethod
+    def get_discord(cls) -> Window:
+        """Return the Discord window, enumerating only if necessary.
+
+        Raises:
+            DiscordNotOpenError: Could not locate the Discord desktop
+            application as an open window.
+
+        Returns:
+            Window: The window of the Discord desktop app.
+        """
+        if cls._discord is not None and cls._is_valid(cls._discord):
+            return cls._discord
+        cls.invalidate()
+
+        # Filter list to find the one that's most likely the desktop app
+        win_list: list[Window] = \
+            get_backend().get_windows_with_title("Discord")
+        for win in win_list:
+            if _is_discord_title(win.title):
+                break
+        else:
+            raise DiscordNotOpenError(
+                "Could not find a window resembling the Discord desktop "
+                "application out of the windows with 'Discord' in the title: "
+                f"{win_list or '<empty>'}"
+            )
+        cls._discord = win
+        return win
+
+
+def _wait(delay: float, focus: bool = True) -> None:
     """Wait for at least delay seconds and some conditions.
 
     After waiting for delay seconds, wait for after the paused flag is
@@ -58,18 +235,59 @@ def _wait(delay: float) -> None:
 
     Args:
         delay (float): Minimum time in seconds to wait.
+        focus (bool, optional): Whether to also wait for the Discord
+        window to be active. Defaults to True.
     """
-    time.sleep(delay)
-    # 0.0.4: Notify if Discord window lost focus
-    if not _is_discord_active():
-        rich.print(
-            "[bright_black]Discord not in focus, program suspended...[/]"
-        )
-    # Block until unpaused and focused
-    while _Pauser.paused or not _is_discord_active():
-        pass
+    tracer = get_tracer()
+    token = get_token()
+    with tracer.span("wait", delay=delay):
+        token.sleep(delay)
+        # 0.0.4: Notify if Discord window lost focus
+        if focus and not _is_discord_active():
+            rich.print(
+                "[bright_black]Discord not in focus, program suspended...[/]"
+            )
+        # Block until unpaused and focused, sleeping between checks instead
+        # of spinning so that a suspended session costs next to no CPU time
+        with tracer.span("blocked"):
+            clock = get_clock()
+            while True:
+                if _Pauser.is_paused():
+                    paused_at = clock.monotonic()
+                    _wait_until_resumed(token)
+                    metrics.PAUSED_SECONDS.inc(clock.monotonic() - paused_at)
+                    continue
+                if not focus or _is_discord_active():
+                    return
+                token.sleep(FOCUS_POLL_INTERVAL)
+                metrics.UNFOCUSED_SECONDS.inc(FOCUS_POLL_INTERVAL)
+
+
+def _wait_until_resumed(token: CancelToken) -> None:
+    """Block while paused for up to FOCUS_POLL_INTERVAL, waking up as
+    soon as resumed or cancelled.
 
+    Raises:
+        SessionCancelled: The session was cancelled.
+    """
+    wake = threading.Event()
 
+    def on_pause_change(paused: bool) -> None:
+        if not paused:
+            wake.set()
+
+    _Pauser.add_listener(on_pause_change)
+    token.add_callback(wake.set)
+    try:
+        if _Pauser.is_paused():
+            wake.wait(FOCUS_POLL_INTERVAL)
+    finally:
+        token.remove_callback(wake.set)
+        _Pauser.remove_listener(on_pause_change)
+    token.check()
+
+
+@traced("open_discord")
 def _open_discord(verbose: bool) -> None:
     """Move to the Discord desktop application.
 
@@ -80,136 +298,134 @@ def _open_discord(verbose: bool) -> None:
         DiscordNotOpenError: Could not locate the Discord desktop
         application as an open window.
     """
-    # Filter list to find the one that's most likely the desktop app
-    win_list: list[pyautogui.Window] = \
-        pyautogui.getWindowsWithTitle("Discord")
-    for win in win_list:
-        title: str = win.title
-        if title == "Discord" or title.endswith("- Discord"):
-            break
-    else:
-        raise DiscordNotOpenError(
-            "Could not find a window resembling the Discord desktop "
-            "application out of the windows with 'Discord' in the title: "
-            f"{win_list or '<empty>'}"
-        )
-    # minimize -> maximize trick is a workaround to the PyGetWinException
-    # problem that happens when I try to accept input before activate()ing a
-    # window: https://github.com/asweigart/PyGetWindow/issues/36#issuecomment-919332733
-    win.minimize()
-    win.maximize()
-    win.activate()
+    win = _WindowRegistry.get_discord()
+    get_backend().activate_window(win)
     if verbose:
         rich.print("[bright_black]Moved to the Discord desktop application[/]")
 
 
-def _navigate_to_channel(channel: str, verbose: bool) -> None:
-    """Navigate to the target channel within Discord to roll in.
-
-    This function does not guarantee that focus is brought to the
-    desired channel is the argument is ill-defined.
+def _channel_in_title(title: str | None, channel: str) -> bool | None:
+    """Return whether a window title shows Discord in the channel.
 
     Args:
-        channel (str): The command line argument that specifies the
-        query string to submit to the Discord search bar to locate the
-        channel to roll in.
-        verbose (bool): Configuration preference.
+        title (str | None): The window title, which looks like
+        "#general | Server - Discord" in a server channel.
+        channel (str): The query string used to search for the channel.
+        It is considered matched if each of its words appears in the
+        title, ignoring case.
+
+    Returns:
+        bool | None: None if the title says nothing about the current
+        channel (not Discord, or just "Discord" like on its home page).
     """
-    # In case user put the # in there themselves
-    search = "#" + channel.removeprefix("#")
-    if verbose:
-        rich.print(
-            "[bright_black]Navigating by searching for channel with query "
-            f"{search!r}...[/]"
-        )
+    if not _is_discord_title(title):
+        return None
+    location = title.removesuffix("Discord").removesuffix(" - ").casefold()
+    if not location:
+        return None
+    words = channel.removeprefix("#").casefold().split()
+    return all(word in location for word in words)
+
 
-    # In case search bar was already up for some reason
-    pyautogui.hotkey("esc")
-    _wait(ACTION_COOLDOWN)
+@traced("read_result")
+def _read_result(reader: "Reader", verbose: bool) -> "Reading":
+    """Classify the reply to the roll just sent, once Mudae had the time
+    to reply.
 
-    # Bring up quick switcher
-    pyautogui.hotkey("ctrl", "k")
-    _wait(ACTION_COOLDOWN)
+    Pauses if it has any of the labels the reader should pause on, to
+    give the user a chance to react.
 
-    # Input search and enter
-    # Note: sometimes this opens the stupid Quick Switcher help webpage
-    # and I don't know why
-    pyautogui.typewrite(search + "\n", interval=TYPING_COOLDOWN)
-    _wait(ACTION_COOLDOWN)
+    Args:
+        reader (Reader): Captures and classifies the reply.
+        verbose (bool): Configuration preference.
 
-    # Focus text area
-    pyautogui.hotkey("esc")
-    _wait(ACTION_COOLDOWN)
+    Returns:
+        Reading: What was found in the reply.
+    """
+    reading = reader.read()
     if verbose:
+        found = ", ".join(sorted(reading.labels)) or "nothing"
         rich.print(
-            "[bright_black]Finished navigating, focused text area, and ready "
-            "to roll[/]"
+            f"[bright_black]Read {found} in "
+            f"{reading.latency * 1000:.1f} ms[/]"
         )
+    wanted = reading.labels & reader.pause_on
+    if wanted:
+        rich.print(
+            f"[bold yellow]Found {', '.join(sorted(wanted))}, pausing. "
+            f"Hit {PAUSE_KEY.upper()} to resume.[/]"
+        )
+        _Pauser.pause()
+    return reading
 
 
-def _start_rolling(command: str, num: int, daily: bool, verbose: bool) -> None:
-    """Repeatedly enter the roll command into the channel.
+@traced("fetch_reply")
+def _fetch_reply(transport: HTTPTransport,
+                 timeout: float,
+                 verbose: bool) -> dict[str, Any] | None:
+    """Fetch the reply to the roll just sent, for the wishlist and the
+    history.
 
     Args:
-        command (str): The command line argument specifying the name of
-        the Mudae command to use to roll for characters. It should be
-        unprefixed (no $, /, etc.).
-        num (int): The command line argument specifying the number of
-        times to roll in this session.
-        daily (bool): The command line flag specifying whether the
-        daily Mudae commands, $daily and $dailykakera, should be run in
-        addition to the rolling this session.
+        transport (HTTPTransport): Transport the roll was sent with.
+        timeout (float): Seconds to wait for the reply.
         verbose (bool): Configuration preference.
     """
-    if verbose:
-        rich.print(f"[bright_black]Starting to roll with {command=}...[/]")
-    for attempt_num in range(1, num + 1):
-        pyautogui.typewrite(f"${command}\n")
-        if verbose:
-            rich.print(
-                f"[bright_black]Attempted to roll ({attempt_num}/{num})[/]"
-            )
-        _wait(ROLLING_COOLDOWN)
-    if verbose:
-        rich.print("[green]Finished rolling.[/]")
+    reply = transport.fetch_reply(timeout)
+    if reply is None and verbose:
+        rich.print("[bright_black]No reply to the roll in time[/]")
+    return reply
 
-    if daily:
-        pyautogui.typewrite(f"$daily\n")
-        _wait(ROLLING_COOLDOWN)
-        pyautogui.typewrite(f"$dk\n")
-        if verbose:
-            rich.print("[green]Finished running daily commands.[/]")
 
-
-def _revert_window(win: pyautogui.Window, verbose: bool) -> None:
-    """Restore focus to the window script was called from.
+@traced("check_wishlist")
+def _check_wishlist(wishlist: "Wishlist",
+                    reply: dict[str, Any]) -> None:
+    """Pause if the reply to a roll has any name of the wishlist, to give
+    the user a chance to claim it.
 
     Args:
-        win (pyautogui.Window): The window to restore focus to.
-        verbose (bool): Configuration preference.
+        wishlist (Wishlist): Names to look for.
+        reply (dict[str, Any]): The reply, see _fetch_reply.
     """
-    if verbose:
+    found = wishlist.find(message_text(reply))
+    if found:
+        # The bell gets the attention of users looking elsewhere
         rich.print(
-            "[bright_black]"
-            f"Waiting for a delay of {REVERT_WINDOW_DELAY} seconds "
-            f"before restoring your window '{win.title}'"
-            "[/]\n"
-            "[yellow]"
-            "[TIP] You can cancel the window focus change with the "
-            f"{ABORT_KEY.upper()} hotkey during this delay if you want "
-            "to react to a Mudae message or review your rolls."
-            "[/]"
+            f"\a[bold yellow]Wishlist match: {', '.join(found)}! Pausing, "
+            f"hit {PAUSE_KEY.upper()} to resume.[/]"
         )
-    _wait(REVERT_WINDOW_DELAY)
-    win.activate()
-    if verbose:
+        _Pauser.pause()
+
+
+def _report_pacing(pacer: "ReplyPacer", commands: int, elapsed: float) -> None:
+    """Print reply latencies and how long the sessions took compared to
+    sending one command every ROLLING_COOLDOWN seconds.
+    """
+    latencies = sorted(pacer.latencies)
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
         rich.print(
-            f"[bright_black]Returned focus to window '{win.title}'"
+            f"[bright_black]Replies rendered after "
+            f"{pacer.mean_latency() * 1000:.0f} ms on average, "
+            f"{p95 * 1000:.0f} ms at the 95th percentile, with "
+            f"{pacer.timeouts} timeouts[/]"
         )
+    rich.print(
+        f"[bright_black]Rolled for {elapsed:.1f} seconds, compared to "
+        f"{commands * ROLLING_COOLDOWN:.1f} seconds with fixed pacing[/]"
+    )
+
+
+def _report_cancel(token: CancelToken) -> None:
+    """Print how quickly the session stopped after being cancelled."""
+    latency = token.latency()
+    if latency is not None:
+        rich.print(f"[bright_black]Session stopped {latency * 1000:.1f} ms "
+                   "after being cancelled[/]")
 
 
 def _raise_corner_abort() -> None:
-    """Customize behavior of pyautogui.FailSafeException."""
+    """Customize behavior of the PyAutoGUI fail-safe."""
     rich.print(
         "\n[bold red]"
         "Fail-safe triggered from mouse moving to a corner of the screen.[/]\n"
@@ -219,15 +435,155 @@ def _raise_corner_abort() -> None:
     signal.raise_signal(signal.SIGINT)
 
 
+def run_manifest(entries: list[SessionEntry],
+                 verbose: bool,
+                 revert: bool,
+                 injection: str = "batch",
+                 backend: Backend | None = None,
+                 transport: Transport | None = None,
+                 limiter: RateLimiter | None = None,
+                 verify: bool = True,
+                 reader: "Reader | None" = None,
+                 pacer: "ReplyPacer | None" = None,
+                 journal: "Journal | None" = None,
+                 history: "HistoryWriter | None" = None,
+                 wishlist: "Wishlist | None" = None,
+                 macro: "list[dict[str, Any]] | None" = None,
+                 runner: "Callable[[Interpreter, Plan], None] | None" = None
+                 ) -> None:
+    """Roll several sessions back to back in one Discord activation.
+
+    Interface function to be called from main process. The sessions are
+    compiled into an action plan, which is optimized and run, see
+    plan.py.
+
+    Args:
+        entries (list[SessionEntry]): Sessions to roll in order.
+        verbose (bool): Configuration preference.
+        revert (bool): Configuration preference.
+        injection (str, optional): Configuration preference. Defaults
+        to "batch".
+        backend (Backend | None, optional): Input and window layer to
+        go through. Defaults to None (use PyAutoGUI).
+        transport (Transport | None, optional): How to deliver the
+        commands. Defaults to None (type them into Discord).
+        limiter (RateLimiter | None, optional): Paces the commands.
+        Defaults to None (one command every ROLLING_COOLDOWN seconds).
+        verify (bool, optional): Configuration preference. Defaults to
+        True.
+        reader (Reader | None, optional): Classifies the result of
+        every roll. Defaults to None (don't read results).
+        pacer (ReplyPacer | None, optional): Holds off every command
+        until the reply to the last one rendered, with the limiter only
+        pacing commands after a timeout. Defaults to None (only pace
+        with the limiter).
+        journal (Journal | None, optional): Records every command sent,
+        and what an earlier run already sent, which is skipped.
+        Defaults to None (send everything, don't record it).
+        history (HistoryWriter | None, optional): Stores every roll.
+        Defaults to None (don't store rolls).
+        wishlist (Wishlist | None, optional): Names to pause for when
+        they show up in the reply to a roll. Defaults to None (don't
+        check replies).
+        macro (list[dict[str, Any]] | None, optional): Validated steps
+        of the macro to roll every session with, see the macros option.
+        Runs with a macro don't resume from the journal. Defaults to
+        None (roll num-rolls times).
+        runner (Callable[[Interpreter, Plan], None] | None, optional):
+        Runs the plan with the interpreter, like engine.run_plan does
+        on asyncio. Defaults to None (Interpreter.run, blocking).
+    """
+    # Imported here since plan.py builds on this module
+    from .plan import Interpreter, compile_plan, optimize
+
+    if backend is not None:
+        set_backend(backend)
+    backend = get_backend()
+    if transport is None:
+        transport = GUITransport(injection)
+    # Other transports don't go through the Discord window at all
+    gui = transport.requires_focus
+    if limiter is None:
+        rate = 1 / ROLLING_COOLDOWN
+        limiter = RateLimiter(rate, 1, rate, 1)
+    if isinstance(transport, HTTPTransport):
+        transport.on_rate_limit = limiter.on_rate_limit
+
+    # Register PAUSE_KEY as a hotkey for pausing/resuming this function
+    _Pauser.register(backend, verbose, gui)
+
+    # The abort handlers count the sessions they end, see abort.py
+    with session_scope() as token:
+        metrics.start_session()
+        try:
+            caller_win = backend.get_active_window() if gui else None
+            plan = optimize(compile_plan(
+                entries, gui, verify, revert and caller_win is not None,
+                macro, journal.progress if journal is not None else None
+            ))
+            interpreter = Interpreter(transport, limiter, verbose, injection,
+                                      reader, pacer, journal, history,
+                                      wishlist, caller_win)
+            start = get_clock().monotonic()
+            if runner is None:
+                interpreter.run(plan)
+            else:
+                runner(interpreter, plan)
+            if journal is not None:
+                journal.finish()
+            if verbose and pacer is not None:
+                _report_pacing(pacer, limiter.acquired,
+                               get_clock().monotonic() - start)
+            if verbose and isinstance(transport, HTTPTransport):
+                rich.print(
+                    f"[bright_black]Sent {transport.sent} messages at "
+                    f"{transport.messages_per_second():.1f} "
+                    "messages/second[/]"
+                )
+            if verbose and reader is not None:
+                rich.print(
+                    f"[bright_black]Read {len(reader.latencies)} results in "
+                    f"{reader.mean_latency() * 1000:.1f} ms on average[/]"
+                )
+            metrics.end_session("completed")
+        except FailSafeError:
+            # Before the SIGINT it raises, which would count as one otherwise
+            metrics.end_session("failsafe")
+            _raise_corner_abort()
+        except SessionCancelled as e:
+            metrics.end_session(e.reason)
+            if verbose:
+                _report_cancel(token)
+            raise
+        except KeyboardInterrupt:
+            metrics.end_session("sigint")
+            raise
+        except Exception:
+            metrics.end_session("error")
+            raise
+
+
 def run_autogui(command: str,
                 channel: str,
                 num: int,
                 daily: bool,
                 verbose: bool,
-                revert: bool) -> None:
+                revert: bool,
+                injection: str = "batch",
+                backend: Backend | None = None,
+                transport: Transport | None = None,
+                limiter: RateLimiter | None = None,
+                verify: bool = True,
+                reader: "Reader | None" = None,
+                pacer: "ReplyPacer | None" = None,
+                journal: "Journal | None" = None,
+                history: "HistoryWriter | None" = None,
+                wishlist: "Wishlist | None" = None,
+                macro: "list[dict[str, Any]] | None" = None) -> None:
     """Bundle PyAutoGUI actions used to accomplish script.
 
-    Interface function to be called from main process.
+    Interface function to be called from main process. Runs a single
+    session on the asyncio engine, see engine.py.
 
     Args:
         command (str): Arg extracted from parser namespace.
@@ -236,19 +592,21 @@ def run_autogui(command: str,
         daily (bool): Arg extracted from parser namespace.
         verbose (bool): Configuration preference.
         revert (bool): Configuration preference.
+        injection (str, optional): Configuration preference. Defaults
+        to "batch".
+        backend (Backend | None, optional): Input and window layer to
+        go through. Defaults to None (use PyAutoGUI).
+        transport (Transport | None, optional): How to deliver the
+        commands. Defaults to None (type them into Discord).
+        limiter (RateLimiter | None, optional): Paces the commands.
+        Defaults to None (one command every ROLLING_COOLDOWN seconds).
+        verify, reader, pacer, journal, history, wishlist, macro
+        (optional): See run_manifest.
     """
-    # Register PAUSE_KEY as a hotkey for pausing/resuming this function
-    keyboard.add_hotkey(PAUSE_KEY, _Pauser.toggle, (verbose,))
-
-    try:
-        caller_win = pyautogui.getActiveWindow()
-
-        _open_discord(verbose)
-        _navigate_to_channel(channel, verbose)
-        _start_rolling(command, num, daily, verbose)
+    # Imported here to keep asyncio out of the startup path
+    from .engine import run_plan
 
-        # Restore window script was called from if configured
-        if revert and caller_win is not None:
-            _revert_window(caller_win, verbose)
-    except pyautogui.FailSafeException:
-        _raise_corner_abort()
+    run_manifest([SessionEntry(command, channel, num, daily)],
+                 verbose, revert, injection, backend, transport, limiter,
+                 verify, reader, pacer, journal, history, wishlist, macro,
+                 runner=run_plan)
@@ -0,0 +1,281 @@
+"""
+daemon.py
+18 October 2026 16:38:05
+
+Resident process running roll jobs sent by thin command line clients.
+
+The client side of this module only uses the standard library so that
+`waifu roll` starts quickly. Everything heavy is imported by serve().
+"""
+
+import sys
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import (Client, Connection, Listener,
+                                        answer_challenge, deliver_challenge)
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .exceptions import get_user_config_path
+
+if TYPE_CHECKING:
+    import queue
+
+JOB_POLL_INTERVAL = 0.25  # seconds between checks for signals while idle
+REQUEST_TIMEOUT = 5.0  # seconds for a client to send its job once connected
+
+
+def _get_address() -> str:
+    """Return the address of the daemon for this user.
+
+    This is a named pipe on Windows and a Unix domain socket next to the
+    configuration file elsewhere.
+    """
+    if sys.platform == "win32":
+        return r"\\.\pipe\waifu-roller-" + Path.home().name
+    return str(get_user_config_path().parent / "daemon.sock")
+
+
+def _get_authkey_path() -> Path:
+    """Return the path to the key authenticating clients."""
+    return get_user_config_path().parent / "daemon.key"
+
+
+class _ConnectionWriter:
+    """File-like object forwarding written text to a client."""
+
+    def __init__(self, conn: Connection, tty: bool) -> None:
+        self._conn = conn
+        self._tty = tty
+
+    def write(self, text: str) -> int:
+        try:
+            self._conn.send(("output", text))
+        except OSError:
+            pass  # Client went away, keep running the job anyway
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        # Lets rich keep its colors if the client is in a terminal
+        return self._tty
+
+
+def run_client(argv: list[str]) -> int:
+    """Send a roll job to the daemon and stream its output.
+
+    Args:
+        argv (list[str]): The same arguments the waifu command takes.
+
+    Returns:
+        int: The exit code of the job.
+    """
+    try:
+        authkey = _get_authkey_path().read_bytes()
+        conn = Client(_get_address(), authkey=authkey)
+    except (OSError, EOFError):
+        print("No waifu daemon is running, start one with 'waifu daemon'.",
+              file=sys.stderr)
+        return 1
+
+    with conn:
+        conn.send(("roll", argv, sys.stdout.isatty()))
+        while True:
+            try:
+                kind, payload = conn.recv()
+            except EOFError:
+                print("The waifu daemon exited during the job.",
+                      file=sys.stderr)
+                return 1
+            if kind == "queued" and payload > 0:
+                print(f"Waiting for {payload} job(s) ahead in the queue...")
+            elif kind == "output":
+                sys.stdout.write(payload)
+                sys.stdout.flush()
+            elif kind == "done":
+                return payload
+
+
+class _Job:
+    """A roll job received from a client."""
+
+    def __init__(self, conn: Connection, argv: list[str], tty: bool) -> None:
+        self.conn = conn
+        self.argv = argv
+        self.tty = tty
+
+
+def _receive_job(conn: Connection,
+                 authkey: bytes,
+                 jobs: "queue.Queue[_Job]") -> None:
+    """Authenticate a client and queue up its job.
+
+    Meant to be run in a thread of its own for every client, so that a
+    client that never sends anything only holds up itself.
+    """
+    try:
+        deliver_challenge(conn, authkey)
+        answer_challenge(conn, authkey)
+        if not conn.poll(REQUEST_TIMEOUT):
+            conn.close()
+            return
+        kind, argv, tty = conn.recv()
+    except (AuthenticationError, OSError, EOFError, ValueError):
+        conn.close()  # Failed authentication or malformed request
+        return
+    if kind != "roll":
+        conn.close()
+        return
+    conn.send(("queued", jobs.qsize()))
+    jobs.put(_Job(conn, argv, tty))
+
+
+def _accept_jobs(listener: Listener,
+                 authkey: bytes,
+                 jobs: "queue.Queue[_Job]") -> None:
+    """Keep accepting clients and queue up their jobs.
+
+    Meant to be run in a daemon thread for the life of the process. The
+    listener doesn't authenticate clients itself, since that waits on
+    them, see _receive_job().
+    """
+    import threading
+
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError:
+            continue
+        threading.Thread(target=_receive_job, args=(conn, authkey, jobs),
+                         daemon=True).start()
+
+
+def _open_listener() -> tuple[Listener, bytes]:
+    """Listen at the daemon address, cleaning up after a dead daemon.
+
+    Raises:
+        SystemExit: Another daemon is already listening.
+
+    Returns:
+        tuple[Listener, bytes]: The listener, and the key clients have
+        to authenticate with.
+    """
+    import os
+    import secrets
+
+    address = _get_address()
+    authkey_path = _get_authkey_path()
+    if sys.platform != "win32" and Path(address).exists():
+        # Stale socket file unless someone is still listening on it
+        try:
+            Client(address, authkey=authkey_path.read_bytes()).close()
+        except (OSError, EOFError):
+            Path(address).unlink()
+        else:
+            raise SystemExit("A waifu daemon is already running.")
+
+    authkey = secrets.token_bytes(32)
+    authkey_path.parent.mkdir(parents=True, exist_ok=True)
+    authkey_path.touch(mode=0o600)
+    # touch() leaves the mode of an existing key alone, which could have
+    # been readable by others, so tighten it before writing the new key
+    os.chmod(authkey_path, 0o600)
+    authkey_path.write_bytes(authkey)
+    return Listener(address), authkey
+
+
+def _run_job(job: _Job, config: dict[str, Any]) -> int:
+    """Run a roll job with its output redirected to its client.
+
+    Returns:
+        int: The exit code of the job.
+    """
+    from contextlib import redirect_stderr, redirect_stdout
+
+    import rich
+
+    from .exceptions import RollerError
+    from .main import config_callback, run_entries, version_callback
+    from .parser import Parser
+
+    writer = _ConnectionWriter(job.conn, job.tty)
+    with redirect_stdout(writer), redirect_stderr(writer):  # type: ignore
+        try:
+            parser = Parser(config["defaults"], config["verbose"],
+                            config["manifest"], sorted(config["macros"]))
+            ns = parser.parse_args(job.argv)
+            macro = config["macros"][ns.macro] if ns.macro else None
+            if ns.version:
+                version_callback()
+            if ns.config:
+                config_callback()
+            if ns.version or ns.config:
+                return 0
+            if ns.show_plan:
+                from .plan import show_plan
+                show_plan(config, ns.entries, macro)
+                return 0
+            if ns.simulate:
+                from .simulate import run_simulation
+                run_simulation(config, ns.entries, ns.trace, macro)
+                return 0
+            run_entries(config, ns.entries, ns.trace, ns.resume, macro)
+            rich.print("[green]Script terminated successfully.[/]")
+            return 0
+        # Parser errors and the abort handlers exit, which only ends the job
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except RollerError as e:
+            rich.print(f"[bold red]{type(e).__name__}:[/] {e}")
+            return 1
+
+
+def serve() -> None:
+    """Run the daemon until interrupted while idle.
+
+    Interface function to be called from main process.
+    """
+    import queue
+    import threading
+
+    import rich
+
+    from .abort import ABORT_KEY, register_abort_handlers
+    from .backend import get_backend
+    from .config import load_config
+    from .main import start_metrics_server
+
+    config = load_config()
+    # ESC only aborts the current job, never the daemon itself
+    register_abort_handlers(config["keep-failsafe"],
+                            config["transport"]["mode"] == "gui",
+                            exit_when_idle=False)
+    start_metrics_server(config)
+    # Import the GUI automation dependencies now instead of upon first job
+    get_backend()
+
+    jobs: queue.Queue[_Job] = queue.Queue()
+    listener, authkey = _open_listener()
+    with listener:
+        threading.Thread(target=_accept_jobs,
+                         args=(listener, authkey, jobs),
+                         daemon=True).start()
+        rich.print(
+            "[green]Daemon listening for jobs from 'waifu roll'. "
+            f"{ABORT_KEY.upper()} aborts the current job, ^C while idle "
+            "stops the daemon.[/]"
+        )
+        while True:
+            # Time out regularly so that ^C is handled while idle
+            try:
+                job = jobs.get(timeout=JOB_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            with job.conn:
+                code = _run_job(job, config)
+                try:
+                    job.conn.send(("done", code))
+                except OSError:
+                    pass
+            rich.print(f"[bright_black]Finished job {job.argv} ({code=})[/]")
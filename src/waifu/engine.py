@@ -0,0 +1,198 @@
+"""
+engine.py
+18 October 2026 18:12:40
+
+Session engine running plans on asyncio, as cooperating tasks.
+
+The plan interpreter yields the waits and blocking calls of a plan
+instead of carrying them out, see plan.Interpreter.effects. Here, every
+wait is awaited, cancellable through the token of the session, and
+blocking calls like typing or reading a result run in a worker thread.
+Meanwhile, one task follows the pause hotkey and the cancellation of
+the session, and another polls the focus of Discord while the session
+waits for it. Hotkey and abort callbacks come from the listener threads
+of the keyboard module and are handed to the event loop thread-safely.
+"""
+
+import asyncio
+from typing import Any
+
+import rich
+
+from . import metrics
+from .cancel import get_token
+from .clock import get_clock
+from .core import FOCUS_POLL_INTERVAL, _is_discord_active, _Pauser
+from .exceptions import SessionCancelled
+from .plan import Acquire, Effect, Interpreter, Plan, Sleep
+from .trace import get_tracer
+
+
+class AsyncEngine:
+    """Runs plans with an interpreter on the running event loop."""
+
+    def __init__(self, interpreter: Interpreter) -> None:
+        """Initialize the engine. Nothing happens until run().
+
+        Args:
+            interpreter (Interpreter): Runs the steps of the plans.
+        """
+        self._interpreter = interpreter
+        self._clock = get_clock()
+        # Bound to the event loop of run() once waited on
+        self._resumed = asyncio.Event()
+        self._focused = asyncio.Event()
+        self._lost_focus = asyncio.Event()
+
+    async def _monitor_hotkeys(self,
+                               changes: "asyncio.Queue[bool | None]") -> None:
+        """Mirror the paused state of _Pauser until cancelled.
+
+        Args:
+            changes (asyncio.Queue[bool | None]): The new paused states,
+            in order, and None once the session is cancelled.
+        """
+        while True:
+            paused = await changes.get()
+            if paused is None:
+                # Wake up every wait, which raises upon seeing the token
+                self._resumed.set()
+                self._focused.set()
+                return
+            if paused:
+                self._resumed.clear()
+            else:
+                self._resumed.set()
+
+    async def _monitor_focus(self) -> None:
+        """Poll the focus of Discord whenever the session waits for it.
+
+        There is no event to subscribe to for window focus changes, and
+        polling only while the session is blocked keeps it from costing
+        anything otherwise.
+        """
+        token = get_token()
+        while True:
+            await self._lost_focus.wait()
+            try:
+                while not _is_discord_active():
+                    await token.asleep(FOCUS_POLL_INTERVAL, self._clock)
+                    metrics.UNFOCUSED_SECONDS.inc(FOCUS_POLL_INTERVAL)
+            # Left for the session to raise, which the event loop would stop
+            # for right away otherwise, since it is a SystemExit
+            except SessionCancelled:
+                return
+            self._lost_focus.clear()
+            self._focused.set()
+
+    async def _sleep(self, seconds: float, focus: bool) -> None:
+        """Wait like core._wait, with every wait awaited."""
+        tracer = get_tracer()
+        token = get_token()
+        with tracer.span("wait", delay=seconds):
+            await token.asleep(seconds, self._clock)
+            # 0.0.4: Notify if Discord window lost focus
+            if focus and not _is_discord_active():
+                rich.print(
+                    "[bright_black]Discord not in focus, program "
+                    "suspended...[/]"
+                )
+            with tracer.span("blocked"):
+                while True:
+                    token.check()
+                    if _Pauser.is_paused():
+                        # Cleared here too in case the change is still queued
+                        self._resumed.clear()
+                    if not self._resumed.is_set():
+                        paused_at = self._clock.monotonic()
+                        await self._resumed.wait()
+                        metrics.PAUSED_SECONDS.inc(self._clock.monotonic()
+                                                   - paused_at)
+                        continue
+                    if not focus or _is_discord_active():
+                        return
+                    self._focused.clear()
+                    self._lost_focus.set()
+                    await self._focused.wait()
+
+    async def _perform(self, effect: Effect) -> Any:
+        """Carry out an effect, see Interpreter.perform."""
+        if isinstance(effect, Sleep):
+            await self._sleep(effect.seconds, effect.focus)
+            return None
+        if isinstance(effect, Acquire):
+            return await effect.limiter.acquire_async(effect.channel,
+                                                      effect.paced)
+        try:
+            return await asyncio.to_thread(effect.function, *effect.args)
+        except asyncio.CancelledError:
+            # The loop is going away (SIGINT), which waits for the thread
+            get_token().cancel("sigint")
+            raise
+
+    async def run(self, plan: Plan) -> None:
+        """Run every step of a plan, see Interpreter.effects.
+
+        Raises:
+            NavigationError: The window title still didn't show the
+            channel after the last attempt to navigate to it.
+            SessionCancelled: The session was cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        token = get_token()
+        changes: "asyncio.Queue[bool | None]" = asyncio.Queue()
+
+        def notify(paused: bool | None) -> None:
+            # From the hotkey threads, which may outlive the loop
+            try:
+                loop.call_soon_threadsafe(changes.put_nowait, paused)
+            except RuntimeError:
+                pass
+
+        def on_cancel() -> None:
+            notify(None)
+
+        # Listening first, so that no change is missed after reading the state
+        _Pauser.add_listener(notify)
+        token.add_callback(on_cancel)
+        if not _Pauser.is_paused():
+            self._resumed.set()
+        monitors = [asyncio.create_task(self._monitor_hotkeys(changes)),
+                    asyncio.create_task(self._monitor_focus())]
+        try:
+            await self._drive(plan)
+        finally:
+            token.remove_callback(on_cancel)
+            _Pauser.remove_listener(notify)
+            for monitor in monitors:
+                monitor.cancel()
+            await asyncio.gather(*monitors, return_exceptions=True)
+
+    async def _drive(self, plan: Plan) -> None:
+        """Carry out the effects of the plan one after the other."""
+        effects = self._interpreter.effects(plan)
+        result: Any = None
+        error: BaseException | None = None
+        while True:
+            try:
+                effect = effects.send(result) if error is None \
+                    else effects.throw(error)
+            except StopIteration:
+                return
+            result, error = None, None
+            try:
+                result = await self._perform(effect)
+            except BaseException as e:
+                error = e
+
+
+def run_plan(interpreter: Interpreter, plan: Plan) -> None:
+    """Run a plan on a new event loop, blocking until it ran. Meant as
+    the runner of core.run_manifest.
+
+    Raises:
+        NavigationError: The window title still didn't show the channel
+        after the last attempt to navigate to it.
+        SessionCancelled: The session was cancelled.
+    """
+    asyncio.run(AsyncEngine(interpreter).run(plan))
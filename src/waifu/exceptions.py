@@ -64,6 +64,48 @@ class DiscordNotOpenError(RollerError):
     pass
 
 
+class NavigationError(RollerError):
+    """Error for when Discord didn't end up in the target channel."""
+    pass
+
+
 class CommandError(RollerError):
     """Error relating to command input. Meant to be caught."""
     pass
+
+
+class FailSafeError(RollerError):
+    """Error for when the PyAutoGUI fail-safe was triggered."""
+    pass
+
+
+class TransportError(RollerError):
+    """Error delivering a message to the target channel."""
+    pass
+
+
+class ReaderError(RollerError):
+    """Error setting up reading from the screen."""
+    pass
+
+
+class HistoryError(RollerError):
+    """Error reading or writing the roll history database."""
+    pass
+
+
+class WishlistError(RollerError):
+    """Error loading the wishlist."""
+    pass
+
+
+class SessionCancelled(SystemExit):
+    """The rolling session was cancelled, by the abort key for one.
+
+    Exits like the abort handlers always have, which for the daemon
+    only ends the job.
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__()
+        self.reason = reason
@@ -0,0 +1,416 @@
+"""
+history.py
+18 October 2026 16:58:32
+
+Store every roll in a local SQLite database and query it.
+
+Rolls sent through the http transport are stored with the character,
+series, kakera value and claim status of the reply, when it shows up in
+time. Rolls are buffered and inserted in batches, each in one transaction, so
+that the rolling loop barely notices the database. The indexes cover
+the common queries, which only read the index over the time range asked
+for instead of every row.
+"""
+
+import argparse
+import re
+import socket
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import rich
+from rich.table import Table
+
+from .clock import Clock, get_clock
+from .exceptions import HistoryError, get_user_config_path
+
+HISTORY_BATCH = 50  # rolls buffered before a transaction is committed
+HISTORY_FLUSH_INTERVAL = 30.0  # seconds after which buffered rolls commit
+
+TOP_COLUMNS = ("series", "character", "channel", "command", "labels")
+"""Columns the top query can count rolls by."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rolls (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    host TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    command TEXT NOT NULL,
+    character TEXT,
+    series TEXT,
+    kakera INTEGER,
+    claimed INTEGER,
+    labels TEXT
+);
+-- Lets histories from several machines be merged without duplicates
+CREATE UNIQUE INDEX IF NOT EXISTS rolls_host_time ON rolls (host, time);
+-- Cover the top queries over a time range without reading the table
+CREATE INDEX IF NOT EXISTS rolls_time ON rolls (time, series, character);
+CREATE INDEX IF NOT EXISTS rolls_channel
+    ON rolls (channel, time, series, character);
+CREATE INDEX IF NOT EXISTS rolls_character ON rolls (character, time);
+"""
+
+_INSERT = ("INSERT OR IGNORE INTO rolls (time, host, channel, command, "
+           "character, series, kakera, claimed, labels) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+# Mudae shows the value of a roll in bold before its kakera emoji
+_KAKERA_PATTERN = re.compile(r"\*\*([\d,]+)\*\*\s*<:kakera:")
+_CLAIMED_PREFIX = "Belongs to "  # footer of claimed characters
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)([mhdw])")
+_DURATION_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+class RollRecord(NamedTuple):
+    """One roll, as stored in the history."""
+    time: float
+    """Unix timestamp of when the roll was sent."""
+    host: str
+    """Name of the machine that rolled."""
+    channel: str
+    command: str
+    character: str | None = None
+    series: str | None = None
+    kakera: int | None = None
+    claimed: bool | None = None
+    labels: str | None = None
+    """Comma-separated labels the reader found in the reply, if read."""
+
+
+class RollDetails(NamedTuple):
+    """What the reply to a roll tells about the character rolled."""
+    character: str | None = None
+    series: str | None = None
+    kakera: int | None = None
+    claimed: bool | None = None
+
+
+def parse_reply(message: dict[str, Any]) -> RollDetails:
+    """Read the character rolled off Mudae's reply to a roll.
+
+    Args:
+        message (dict[str, Any]): The reply, as returned by the API.
+
+    Returns:
+        RollDetails: The details found, all None if the reply has no
+        character embed, e.g. when out of rolls.
+    """
+    embeds = message.get("embeds") or []
+    if not embeds:
+        return RollDetails()
+    embed = embeds[0]
+    character = (embed.get("author") or {}).get("name") or None
+    description = embed.get("description") or ""
+    # The series comes first, then the kakera value or claim instructions
+    series = description.split("\n", 1)[0].strip() or None
+    match = _KAKERA_PATTERN.search(description)
+    kakera = int(match[1].replace(",", "")) if match is not None else None
+    footer = (embed.get("footer") or {}).get("text") or ""
+    return RollDetails(character, series, kakera,
+                       footer.startswith(_CLAIMED_PREFIX))
+
+
+def get_history_path(options: dict[str, Any]) -> Path:
+    """Return the path to the database from the validated history option,
+    next to the configuration file unless configured otherwise.
+    """
+    if options["path"] is not None:
+        return Path(options["path"]).expanduser()
+    return get_user_config_path().parent / "history.sqlite3"
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Open the history database, creating it if needed.
+
+    Raises:
+        HistoryError: The database could not be opened.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(path)
+        # Readers don't block the writer, and commits don't wait on disk
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+    except (OSError, sqlite3.Error) as e:
+        raise HistoryError(
+            f"Could not open the roll history at {str(path)!r}: {e}"
+        ) from e
+    return connection
+
+
+class HistoryWriter:
+    """Buffers rolls and writes them to the history in batches."""
+
+    def __init__(self,
+                 connection: sqlite3.Connection,
+                 reply_timeout: float = 2.0,
+                 clock: Clock | None = None) -> None:
+        """Initialize the writer.
+
+        Args:
+            connection (sqlite3.Connection): Open history database.
+            reply_timeout (float, optional): Seconds to wait for the
+            reply to a roll sent through the http transport. Defaults
+            to 2.0.
+            clock (Clock | None, optional): Time source for timestamps.
+            Defaults to None (use the clock of the session engine).
+        """
+        self._connection = connection
+        self.reply_timeout = reply_timeout
+        self._clock = clock if clock is not None else get_clock()
+        self._host = socket.gethostname()
+        self._pending: list[RollRecord] = []
+        self._last_flush = time.monotonic()
+        self.written = 0
+        """Number of rolls committed so far."""
+
+    @classmethod
+    def open(cls, options: dict[str, Any]) -> "HistoryWriter":
+        """Open the history configured by the validated history option.
+
+        Raises:
+            HistoryError: The database could not be opened.
+        """
+        return cls(connect(get_history_path(options)),
+                   options["reply-timeout"])
+
+    def record(self,
+               channel: str,
+               command: str,
+               labels: frozenset[str] | None = None,
+               reply: dict[str, Any] | None = None) -> None:
+        """Buffer a roll sent just now.
+
+        Args:
+            channel (str): The channel rolled in.
+            command (str): The unprefixed Mudae command.
+            labels (frozenset[str] | None, optional): What the reader
+            found in the reply. Defaults to None (not read).
+            reply (dict[str, Any] | None, optional): Mudae's reply, as
+            returned by the API. Defaults to None (not fetched).
+        """
+        details = parse_reply(reply) if reply is not None else RollDetails()
+        self._pending.append(RollRecord(
+            self._clock.time(), self._host, channel, command, *details,
+            labels=",".join(sorted(labels)) if labels is not None else None
+        ))
+        if (len(self._pending) >= HISTORY_BATCH
+                or time.monotonic() - self._last_flush
+                >= HISTORY_FLUSH_INTERVAL):
+            # Keep rolling, the rolls stay buffered for the next attempt
+            try:
+                self.flush()
+            except HistoryError as e:
+                rich.print(f"[yellow]{e}[/]")
+
+    def flush(self) -> None:
+        """Commit every buffered roll in one transaction.
+
+        Raises:
+            HistoryError: The rolls could not be written.
+        """
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        try:
+            with self._connection:
+                self._connection.executemany(_INSERT, self._pending)
+        except sqlite3.Error as e:
+            raise HistoryError(f"Could not write to the roll history: {e}") \
+                from e
+        self.written += len(self._pending)
+        self._pending.clear()
+
+    def close(self) -> None:
+        """Commit any buffered roll and close the database."""
+        try:
+            self.flush()
+        finally:
+            self._connection.close()
+
+
+def parse_since(value: str, now: float | None = None) -> float:
+    """Convert a --since argument to a Unix timestamp.
+
+    Args:
+        value (str): A duration back from now like "7d", "12h", "30m"
+        or "2w", or a date like "2026-10-01".
+        now (float | None, optional): Current Unix timestamp. Defaults
+        to None (the time of the system).
+
+    Raises:
+        ValueError: The value is neither a duration nor a date.
+    """
+    now = time.time() if now is None else now
+    match = _DURATION_PATTERN.fullmatch(value)
+    if match is not None:
+        return now - float(match[1]) * _DURATION_UNITS[match[2]]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def top(connection: sqlite3.Connection,
+        column: str,
+        since: float,
+        channel: str | None = None,
+        limit: int = 10) -> list[tuple[str, int]]:
+    """Return the most frequent values of a column since a timestamp.
+
+    Args:
+        connection (sqlite3.Connection): Open history database.
+        column (str): One of TOP_COLUMNS.
+        since (float): Unix timestamp to count rolls from.
+        channel (str | None, optional): Only count rolls in this
+        channel. Defaults to None (every channel).
+        limit (int, optional): Number of values to return. Defaults to
+        10.
+
+    Returns:
+        list[tuple[str, int]]: Values and their number of rolls, most
+        rolled first. Rolls without a value are left out.
+    """
+    if column not in TOP_COLUMNS:
+        raise ValueError(f"Can't count rolls by {column!r}")
+    where = f"time >= ? AND {column} IS NOT NULL"
+    params: list[Any] = [since]
+    if channel is not None:
+        where += " AND channel = ?"
+        params.append(channel)
+    # The + keeps SQLite from grouping along the character index, which
+    # reads every row in the table instead of just the time range
+    return connection.execute(
+        f"SELECT {column}, COUNT(*) AS rolls FROM rolls WHERE {where} "
+        f"GROUP BY +{column} ORDER BY rolls DESC, {column} LIMIT ?",
+        (*params, limit)
+    ).fetchall()
+
+
+def recent(connection: sqlite3.Connection,
+           channel: str | None = None,
+           limit: int = 20) -> list[RollRecord]:
+    """Return the latest rolls, latest first."""
+    where, params = ("WHERE channel = ?", [channel]) if channel is not None \
+        else ("", [])
+    rows = connection.execute(
+        f"SELECT {', '.join(RollRecord._fields)} FROM rolls {where} "
+        "ORDER BY time DESC LIMIT ?",
+        (*params, limit)
+    ).fetchall()
+    return [RollRecord(*row) for row in rows]
+
+
+def merge(connection: sqlite3.Connection, other: Path) -> int:
+    """Copy the rolls of another history in, skipping those already in.
+
+    Returns:
+        int: Number of rolls copied.
+    """
+    before = connection.total_changes
+    with connection:
+        connection.execute("ATTACH DATABASE ? AS other", (str(other),))
+    try:
+        with connection:
+            columns = ", ".join(RollRecord._fields)
+            connection.execute(
+                f"INSERT OR IGNORE INTO rolls ({columns}) "
+                f"SELECT {columns} FROM other.rolls"
+            )
+    finally:
+        connection.execute("DETACH DATABASE other")
+    return connection.total_changes - before
+
+
+def _format_timestamp(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def run_history(argv: list[str]) -> int:
+    """Answer a query about the roll history.
+
+    Interface function to be called from main process.
+
+    Args:
+        argv (list[str]): Command line arguments after "history".
+
+    Returns:
+        int: The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="waifu history",
+        description="Query the history of your rolls."
+    )
+    queries = parser.add_subparsers(dest="query", required=True)
+    top_parser = queries.add_parser(
+        "top", help="Count rolls by series, character, etc."
+    )
+    top_parser.add_argument("column", choices=TOP_COLUMNS)
+    top_parser.add_argument("--since", default="7d",
+                            help="Duration like 7d, 12h or 2w, or a date "
+                            "like 2026-10-01 (default: 7d)")
+    recent_parser = queries.add_parser("recent", help="List the latest rolls")
+    for query_parser in (top_parser, recent_parser):
+        query_parser.add_argument("-c", "--channel",
+                                  help="Only count rolls in this channel")
+        query_parser.add_argument("-n", "--num", type=int, default=None,
+                                  help="Number of results (default: 10 "
+                                  "for top, 20 for recent)")
+    merge_parser = queries.add_parser(
+        "merge", help="Copy the rolls of another machine's history in"
+    )
+    merge_parser.add_argument("file", type=Path)
+    ns = parser.parse_args(argv)
+
+    from .config import load_config
+    from .exceptions import RollerError
+
+    try:
+        connection = connect(get_history_path(load_config()["history"]))
+    except RollerError as e:
+        rich.print(f"[bold red]{type(e).__name__}:[/] {e}")
+        return 1
+
+    start = time.perf_counter()
+    try:
+        if ns.query == "top":
+            try:
+                since = parse_since(ns.since)
+            except ValueError:
+                parser.error(f"bad --since value {ns.since!r}")
+            rows = top(connection, ns.column, since, ns.channel, ns.num or 10)
+            table = Table(title=f"Top {ns.column} since "
+                          f"{_format_timestamp(since)}")
+            table.add_column(ns.column.capitalize())
+            table.add_column("Rolls", justify="right")
+            for value, count in rows:
+                table.add_row(value, str(count))
+        elif ns.query == "recent":
+            table = Table(title="Latest rolls")
+            for column in ("Time", "Channel", "Command", "Character",
+                           "Series", "Labels"):
+                table.add_column(column)
+            for roll in recent(connection, ns.channel, ns.num or 20):
+                table.add_row(_format_timestamp(roll.time), roll.channel,
+                              f"${roll.command}", roll.character or "",
+                              roll.series or "", roll.labels or "")
+        else:
+            try:
+                copied = merge(connection, ns.file)
+            except sqlite3.Error as e:
+                rich.print(f"[bold red]Could not merge {str(ns.file)!r}:[/] "
+                           f"{e}")
+                return 1
+            rich.print(f"[green]Merged {copied} new rolls from "
+                       f"{str(ns.file)!r}.[/]")
+            return 0
+    finally:
+        connection.close()
+    elapsed = time.perf_counter() - start
+    rich.print(table)
+    rich.print(f"[bright_black]Answered in {elapsed * 1000:.1f} ms[/]")
+    return 0
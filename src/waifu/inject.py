@@ -0,0 +1,122 @@
+"""
+inject.py
+18 October 2026 11:26:40
+
+Strategies for entering text into the focused Discord text box.
+"""
+
+import threading
+
+from .backend import Backend, get_backend
+from .cancel import get_token
+from .clock import get_clock
+from .exceptions import SessionCancelled
+
+INJECTION_MODES = ("type", "batch", "paste")
+"""Valid values for the text-injection configuration option."""
+
+# Discord reads the clipboard asynchronously after receiving Ctrl+V, so give
+# it a moment before putting the user's clipboard content back
+PASTE_SETTLE_DELAY = 0.05  # seconds to wait before restoring clipboard
+
+
+def _erase(count: int, backend: Backend | None = None) -> None:
+    """Delete the last count characters entered, so that a cancelled
+    session doesn't leave a partial command in the text box.
+    """
+    backend = backend if backend is not None else get_backend()
+    for _ in range(count):
+        backend.hotkey("backspace")
+
+
+def _undo_paste(backend: Backend, count: int, saved: str) -> None:
+    """Erase a cancelled paste and put the user's clipboard content
+    back, once Discord is done reading the clipboard.
+    """
+    _erase(count, backend)
+    backend.set_clipboard(saved)
+
+
+def _paste(text: str) -> None:
+    """Enter text through the clipboard, preserving its old content.
+
+    Args:
+        text (str): The text to enter. A trailing newline is sent as an
+        ENTER key press since pasting it would not submit the message.
+
+    Raises:
+        SessionCancelled: The session was cancelled before the text
+        was submitted. It is erased in the background once Discord is
+        done reading the clipboard.
+    """
+    backend = get_backend()
+    token = get_token()
+    clock = get_clock()
+    body = text.removesuffix("\n")
+    saved = backend.get_clipboard()
+    backend.set_clipboard(body)
+    settled_at = clock.monotonic() + PASTE_SETTLE_DELAY
+    try:
+        backend.hotkey("ctrl", "v")
+        token.sleep(PASTE_SETTLE_DELAY, clock)
+    except SessionCancelled:
+        # Discord could still paste after erasing or paste the restored
+        # clipboard instead, so the session stops right away and the paste
+        # is undone once settled. Not a daemon, so that exiting waits for it.
+        threading.Timer(max(settled_at - clock.monotonic(), 0.0),
+                        _undo_paste, (backend, len(body), saved)).start()
+        raise
+    except BaseException:
+        backend.set_clipboard(saved)
+        raise
+    backend.set_clipboard(saved)
+    if body != text:
+        backend.hotkey("enter")
+
+
+def _type(text: str, interval: float) -> None:
+    """Type text one character at a time, interval seconds apart.
+
+    Raises:
+        SessionCancelled: The session was cancelled while typing, and
+        what was typed is erased.
+    """
+    backend = get_backend()
+    token = get_token()
+    typed = 0
+    try:
+        for char in text:
+            if typed:
+                token.sleep(interval)
+            backend.typewrite(char)
+            typed += 1
+    except SessionCancelled:
+        _erase(typed)
+        raise
+
+
+def inject_text(text: str, mode: str, interval: float = 0.0) -> None:
+    """Enter text into the focused window with the chosen strategy.
+
+    Text is either entered completely or not at all, even if the
+    session is cancelled midway.
+
+    Args:
+        text (str): The text to enter. A trailing newline submits it.
+        mode (str): One of INJECTION_MODES. "type" presses one key per
+        character, "batch" sends the whole string in a single call, and
+        "paste" goes through the clipboard. Only "type" is limited to
+        ASCII text.
+        interval (float, optional): Seconds to wait between characters
+        in "type" mode. Defaults to 0.0.
+
+    Raises:
+        SessionCancelled: The session was cancelled before the text
+        was entered completely.
+    """
+    if mode == "paste":
+        _paste(text)
+    elif mode == "batch":
+        get_backend().write(text)
+    else:
+        _type(text, interval)
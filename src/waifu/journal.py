@@ -0,0 +1,203 @@
+"""
+journal.py
+18 October 2026 16:55:11
+
+Append-only journal of the commands sent by a run, to resume it after a
+crash or an abort without rolling twice.
+
+The journal is a text file with one short record per line:
+
+    begin <fingerprint>   sessions of the run, see _fingerprint
+    r <entry> <attempt>   roll attempt of a session sent
+    d <entry>             $daily sent
+    k <entry>             $dk sent
+    end                   every session finished
+
+Every record is flushed to the OS as it is written, so that a killed
+process loses nothing. Syncing to disk is batched, so that the OS
+crashing loses at most the last few records.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import TextIO
+
+from .exceptions import get_user_config_path
+from .parser import SessionEntry
+
+FSYNC_BATCH = 16  # records written between syncs to disk
+FSYNC_INTERVAL = 5.0  # seconds after which a record is synced regardless
+MAX_JOURNAL_BYTES = 64 * 1024  # size past which the journal is compacted
+
+
+def get_journal_path() -> Path:
+    """Return the path to the journal, next to the configuration file."""
+    return get_user_config_path().parent / "journal.log"
+
+
+def _fingerprint(entries: list[SessionEntry]) -> str:
+    """Return a short digest identifying the sessions of a run."""
+    return hashlib.blake2b(repr(entries).encode(), digest_size=8).hexdigest()
+
+
+class EntryProgress:
+    """What has been sent of one session of a run."""
+
+    def __init__(self, journal: "Journal", index: int) -> None:
+        self._journal = journal
+        self.index = index
+        self.rolled = 0
+        """Number of roll attempts sent."""
+        self.sent: set[str] = set()
+        """Daily commands sent, out of "$daily" and "$dk"."""
+
+    def is_done(self, entry: SessionEntry) -> bool:
+        """Return whether nothing of entry is left to send."""
+        return (self.rolled >= entry.num
+                and (not entry.daily or len(self.sent) == 2))
+
+    def record_roll(self) -> None:
+        """Record the next roll attempt as sent."""
+        self.rolled += 1
+        self._journal._append(f"r {self.index} {self.rolled}")
+
+    def record_daily(self, content: str) -> None:
+        """Record a daily command ("$daily" or "$dk") as sent."""
+        self.sent.add(content)
+        kind = "d" if content == "$daily" else "k"
+        self._journal._append(f"{kind} {self.index}")
+
+
+class Journal:
+    """Journal of the run in progress, see the module docstring."""
+
+    def __init__(self, path: Path, entries: list[SessionEntry]) -> None:
+        self.path = path
+        self._fingerprint = _fingerprint(entries)
+        self.progress = [EntryProgress(self, index)
+                         for index in range(len(entries))]
+        """Progress of each session of the run, in order."""
+        self.finished = False
+        self._size = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._fp: TextIO | None = None
+
+    @classmethod
+    def open(cls,
+             path: Path,
+             entries: list[SessionEntry],
+             resume: bool) -> "Journal":
+        """Start the journal of a run.
+
+        Args:
+            path (Path): Where to keep the journal.
+            entries (list[SessionEntry]): Sessions of the run.
+            resume (bool): Whether to pick up the progress recorded by
+            an unfinished earlier run of the same sessions. Otherwise,
+            the earlier journal is discarded.
+
+        Raises:
+            OSError: The journal could not be written.
+
+        Returns:
+            Journal: The journal, with the progress of the earlier run
+            if resumed.
+        """
+        journal = cls(path, entries)
+        if resume:
+            journal._replay()
+        # Rewriting also drops the torn record of a crash, if any
+        journal._rewrite()
+        return journal
+
+    def _replay(self) -> None:
+        """Load the progress recorded in the journal file, if it was for
+        the same sessions and unfinished.
+        """
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError):
+            return
+        if not lines or lines[0] != f"begin {self._fingerprint}":
+            return
+        for line in lines[1:]:
+            try:
+                kind, *fields = line.split()
+                if kind == "end":
+                    self.finished = True
+                    continue
+                entry = self.progress[int(fields[0])]
+                if kind == "r":
+                    entry.rolled = max(entry.rolled, int(fields[1]))
+                elif kind in ("d", "k"):
+                    entry.sent.add("$daily" if kind == "d" else "$dk")
+            # The last record may have been cut off by a crash
+            except (IndexError, ValueError):
+                continue
+
+    def _records(self) -> list[str]:
+        """Return the fewest records describing the progress so far."""
+        records = [f"begin {self._fingerprint}"]
+        for entry in self.progress:
+            if entry.rolled:
+                records.append(f"r {entry.index} {entry.rolled}")
+            records.extend(f"{'d' if content == '$daily' else 'k'} "
+                           f"{entry.index}" for content in sorted(entry.sent))
+        if self.finished:
+            records.append("end")
+        return records
+
+    def _rewrite(self) -> None:
+        """Atomically replace the journal file with a compact one and
+        keep appending to it.
+        """
+        self.close()
+        content = "".join(record + "\n" for record in self._records())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(temp_path, "wt", encoding="utf-8") as fp:
+            fp.write(content)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(temp_path, self.path)
+        self._fp = open(self.path, "at", encoding="utf-8")
+        self._size = len(content)
+
+    def _append(self, record: str) -> None:
+        """Write a record, compacting the journal if it grew too big."""
+        if self._fp is None:
+            return
+        self._fp.write(record + "\n")
+        # Survives the process dying, not the OS
+        self._fp.flush()
+        self._size += len(record) + 1
+        self._unsynced += 1
+        now = time.monotonic()
+        if (self._unsynced >= FSYNC_BATCH
+                or now - self._last_sync >= FSYNC_INTERVAL):
+            self.sync()
+        if self._size > MAX_JOURNAL_BYTES:
+            self._rewrite()
+
+    def sync(self) -> None:
+        """Make sure every record written so far is on disk."""
+        if self._fp is not None and self._unsynced:
+            os.fsync(self._fp.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def finish(self) -> None:
+        """Record that every session of the run finished."""
+        self.finished = True
+        self._append("end")
+
+    def close(self) -> None:
+        """Sync and close the journal file. Safe to call again."""
+        if self._fp is None:
+            return
+        self.sync()
+        self._fp.close()
+        self._fp = None
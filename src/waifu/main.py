@@ -8,71 +8,350 @@ Entry point and main process.
 """
 
 import sys
-
-import keyboard
-import rich
-import rich.traceback
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from . import __version__
-from .abort import ABORT_KEY, register_abort_handlers
-from .config import load_config
-from .core import PAUSE_KEY, run_autogui
 from .exceptions import get_user_config_path
-from .parser import Parser
+
+if TYPE_CHECKING:
+    from .config import ConfigDict
+    from .pacing import ReplyPacer
+    from .parser import DefaultsDict, SessionEntry
+    from .reader import Reader
+
+# Everything else is imported where it's needed, so that the info flags and
+# the roll client start without loading the GUI automation libraries or
+# PyYAML (see scripts/bench_startup.py)
+
+BLANK_DEFAULTS: "DefaultsDict" = {
+    "mudae-command": None,
+    "target-channel": None,
+    "num-rolls": None,
+}
+"""Defaults option for parsing without loading the config file."""
 
 
 def version_callback() -> None:
     """Callback for if the -v/--version flag is used."""
+    import rich
     rich.print(f"waifu-roller {__version__}")
 
 
 def config_callback() -> None:
     """Callback for if the --config flag is used."""
+    import rich
     rich.print(get_user_config_path())
 
 
-def main() -> None:
-    """Main driver function."""
-    # For debugging mostly, todo: cover up exceptions later
+def _handle_info_flags(argv: list[str]) -> bool:
+    """Run the info flag callbacks if that's all the arguments ask for.
+
+    This lets the info flags skip loading the config file, which they
+    don't depend on.
+
+    Args:
+        argv (list[str]): Command line arguments.
+
+    Returns:
+        bool: Whether an info flag was handled. If False, the arguments
+        should be parsed as usual, including for error reporting.
+    """
+    if not {"-v", "--version", "--config"} & set(argv):
+        return False
+    from contextlib import redirect_stderr
+    from io import StringIO
+
+    from .parser import Parser
+
+    # Errors are reported by the regular parse with the config's tips
+    with redirect_stderr(StringIO()):
+        try:
+            ns = Parser(BLANK_DEFAULTS, False).parse_args(argv)
+        except SystemExit:
+            return False
+    if ns.version:
+        version_callback()
+    if ns.config:
+        config_callback()
+    return ns.version or ns.config
+
+
+def start_metrics_server(config: "ConfigDict") -> None:
+    """Serve the metrics on the configured port, if any.
+
+    Only worth it for processes rolling many times, like the daemon and
+    the scheduler, since the metrics reset when the process exits.
+    """
+    port: int | None = config["metrics"]["port"]
+    if port is None:
+        return
+    import rich
+
+    from .metrics import METRICS_HOST, serve_metrics
+    try:
+        serve_metrics(port)
+    except OSError as e:
+        rich.print(f"[yellow]Could not serve metrics on port {port}: {e}[/]")
+        return
+    rich.print(f"[bright_black]Serving metrics at "
+               f"http://{METRICS_HOST}:{port}/metrics[/]")
+
+
+def build_reading(config: "ConfigDict"
+                  ) -> "tuple[Reader | None, ReplyPacer | None]":
+    """Create the reader and the pacer of config, if enabled.
+
+    Raises:
+        ReaderError: They are enabled but NumPy isn't installed, or a
+        template image could not be loaded.
+    """
+    from .exceptions import ReaderError
+
+    # Reading from the screen needs the optional NumPy dependency
+    reader = None
+    pacer = None
+    try:
+        if config["reader"]["enabled"]:
+            from .reader import Reader
+            reader = Reader.from_config(config["reader"])
+        if config["pacing"]["mode"] == "response":
+            from .pacing import ReplyPacer
+            pacer = ReplyPacer.from_config(config["pacing"])
+    except ImportError as e:
+        raise ReaderError(
+            "The reader and pacing options need NumPy, install it with "
+            "pip install waifu-roller[reader]"
+        ) from e
+    return reader, pacer
+
+
+def run_entries(config: "ConfigDict",
+                entries: "list[SessionEntry]",
+                trace: Path | None = None,
+                resume: bool = False,
+                macro: "list[dict[str, Any]] | None" = None) -> None:
+    """Roll the sessions with the transport and pacing from config.
+
+    Args:
+        config (ConfigDict): The loaded configuration.
+        entries (list[SessionEntry]): Sessions to roll in order.
+        trace (Path | None, optional): File to write a trace of the
+        sessions to. Defaults to None (don't trace).
+        resume (bool, optional): Whether to skip what an unfinished
+        earlier run of the same sessions already sent, according to the
+        journal. Defaults to False.
+        macro (list[dict[str, Any]] | None, optional): Validated steps
+        of the macro to roll every session with. Defaults to None (roll
+        num-rolls times).
+    """
+    import rich
+
+    from .backend import get_backend, set_backend
+    from .core import run_manifest
+    from .engine import run_plan
+    from .exceptions import HistoryError
+    from .ratelimit import RateLimiter
+    from .transport import HTTPTransport
+
+    transport_options: dict = config["transport"]
+    limiter = RateLimiter.from_config(config["rate-limit"])
+
+    # Commands go to the focused Discord app unless configured otherwise
+    transport: HTTPTransport | None = None
+    if transport_options["mode"] == "http":
+        transport = HTTPTransport.from_config(transport_options)
+
+    reader, pacer = build_reading(config)
+
+    # Every command sent is journaled so that an aborted run can resume
+    from .journal import Journal, get_journal_path
+    journal: Journal | None = None
+    if macro is not None:
+        # Macros send what they like, which the journal can't follow
+        if resume:
+            rich.print("[yellow]Runs with a macro can't be resumed, starting "
+                       "over.[/]")
+    else:
+        try:
+            journal = Journal.open(get_journal_path(), entries, resume)
+        except OSError as e:
+            rich.print(f"[yellow]Could not open the session journal, this "
+                       f"run won't be resumable: {e}[/]")
+    if resume and journal is not None:
+        sent = sum(progress.rolled + len(progress.sent)
+                   for progress in journal.progress)
+        if journal.finished:
+            rich.print("[yellow]The last run of these sessions finished, "
+                       "there is nothing to resume.[/]")
+        elif sent:
+            rich.print(f"[green]Resuming, skipping the {sent} commands "
+                       "already sent.[/]")
+        else:
+            rich.print("[yellow]No unfinished run of these sessions to "
+                       "resume, starting from the first attempt.[/]")
+
+    # Only the HTTP transport can read the replies to check them
+    wishlist = None
+    wishlist_options: dict = config["wishlist"]
+    if wishlist_options["names"] or wishlist_options["files"]:
+        if transport is None:
+            rich.print("[yellow]The wishlist needs the http transport to "
+                       "read replies, ignoring it.[/]")
+        else:
+            from .wishlist import Wishlist
+            wishlist = Wishlist.from_config(wishlist_options)
+
+    history = None
+    if config["history"]["enabled"]:
+        from .history import HistoryWriter
+        try:
+            history = HistoryWriter.open(config["history"])
+        except HistoryError as e:
+            rich.print(f"[yellow]{e}, this run won't be stored.[/]")
+
+    # Tracing stays off (and nearly free) unless asked for
+    recorder = None
+    backend = get_backend()
+    if trace is not None:
+        from .trace import TraceRecorder, TracingBackend, set_tracer
+        recorder = TraceRecorder()
+        set_tracer(recorder)
+        set_backend(TracingBackend(backend, recorder))
+
+    # PyAutoGUI sequences, run on the asyncio engine
+    try:
+        run_manifest(entries,
+                     config["verbose"],
+                     config["revert-window"],
+                     config["text-injection"],
+                     transport=transport,
+                     limiter=limiter,
+                     verify=config["verify-navigation"],
+                     reader=reader,
+                     pacer=pacer,
+                     journal=journal,
+                     history=history,
+                     wishlist=wishlist,
+                     macro=macro,
+                     runner=run_plan)
+    # Also write the trace of aborted sessions, those are the interesting ones
+    finally:
+        if transport is not None:
+            transport.close()
+        if journal is not None:
+            journal.close()
+        if history is not None:
+            try:
+                history.close()
+            except HistoryError as e:
+                rich.print(f"[yellow]{e}[/]")
+        if recorder is not None:
+            set_tracer(None)
+            set_backend(backend)
+            recorder.export(trace)  # type: ignore
+            rich.print(f"[bright_black]Wrote {len(recorder.spans)} spans to "
+                       f"{trace}[/]")
+        textfile: str | None = config["metrics"]["textfile"]
+        if textfile is not None:
+            from .metrics import write_textfile
+            try:
+                write_textfile(Path(textfile).expanduser())
+            except OSError as e:
+                rich.print(f"[yellow]Could not write metrics to "
+                           f"{textfile!r}: {e}[/]")
+
+
+def _rich_excepthook(*exc_info: Any) -> None:
+    """Print an uncaught exception with rich.traceback, only importing it
+    once there is one to print since it takes longer than everything
+    else on the argument error path.
+    """
+    import rich.traceback
     rich.traceback.install(
         # Keep the traceback compact and tidy
         extra_lines=1,
         max_frames=1
     )
+    sys.excepthook(*exc_info)
+
+
+def main() -> None:
+    """Main driver function."""
+    # Subcommands talking to a resident process, see daemon.py
+    subcommand = sys.argv[1] if len(sys.argv) > 1 else None
+    if subcommand == "roll":
+        from .daemon import run_client
+        raise SystemExit(run_client(sys.argv[2:]))
+    if subcommand == "daemon":
+        from .daemon import serve
+        serve()
+        return
+    if subcommand == "bench":
+        from .bench import run_bench
+        raise SystemExit(run_bench(sys.argv[2:]))
+    if subcommand == "history":
+        from .history import run_history
+        raise SystemExit(run_history(sys.argv[2:]))
+    if subcommand == "accounts":
+        from .accounts import run_accounts
+        raise SystemExit(run_accounts(sys.argv[2:]))
+    # Keep rolling at every reset instead of once, see scheduler.py
+    scheduled = subcommand == "schedule"
+    argv = sys.argv[2:] if scheduled else sys.argv[1:]
+
+    # If either or both of the info flags are included, use their callbacks
+    # instead of the continuing with the script
+    if _handle_info_flags(argv):
+        raise SystemExit
+
+    import rich
+
+    from .abort import ABORT_KEY, register_abort_handlers
+    from .config import load_config
+    from .core import PAUSE_KEY
+    from .parser import Parser
+
+    # For debugging mostly, todo: cover up exceptions later
+    sys.excepthook = _rich_excepthook
 
     # Load and validate config
     config = load_config()
 
     # Unpack validated config options
     verbose: bool = config["verbose"]
-    revert: bool = config["revert-window"]
     failsafe: bool = config["keep-failsafe"]
     skip: bool = config["skip-confirmation"]
     defaults: dict = config["defaults"]
-
-    # Set up graceful exits
-    register_abort_handlers(failsafe)
+    manifest: list = config["manifest"]
 
     # Parse command line arguments
-    parser = Parser(defaults, verbose)
-    ns = parser.parse_args(sys.argv[1:])
+    parser = Parser(defaults, verbose, manifest, sorted(config["macros"]))
+    ns = parser.parse_args(argv)
+    macro: list | None = config["macros"][ns.macro] if ns.macro else None
 
-    # Unpack command line args
-    command: str = ns.command
-    channel: str = ns.channel
-    num: int = ns.num
-    daily: bool = ns.daily
-    version_flag: bool = ns.version
-    config_flag: bool = ns.config
+    # One entry unless rolling the manifest
+    entries: "list[SessionEntry]" = ns.entries
 
-    # If either or both of the info flags are included, use their callbacks
-    # instead of the continuing with the script
-    if version_flag:
-        version_callback()
-    if config_flag:
-        config_callback()
-    if version_flag or config_flag:
-        raise SystemExit
+    if ns.show_plan:
+        from .plan import show_plan
+        show_plan(config, entries, macro)
+        return
+
+    # Nothing touches the desktop, so there is nothing to confirm or abort
+    if ns.simulate:
+        if scheduled:
+            rich.print("[yellow]Simulating one round of the schedule.[/]")
+        if ns.resume:
+            rich.print("[yellow]Simulations always start over, ignoring "
+                       "--resume.[/]")
+        from .simulate import run_simulation
+        run_simulation(config, entries, ns.trace, macro)
+        return
+
+    # Set up graceful exits, the scheduler only stops on ^C
+    register_abort_handlers(failsafe, config["transport"]["mode"] == "gui",
+                            exit_when_idle=not scheduled)
 
     if not skip:
         # Display tips now that command is validated
@@ -86,19 +365,41 @@ def main() -> None:
         )
 
         # Echo the chosen options and prompt continuation
-        rich.print(
-            "[green]"
-            f"You have chosen to roll with the Mudae command '${command}' "
-            f"{num} times in the channel queried with {channel!r}, and have "
-            f"opted to {'' if daily else 'NOT '}run the daily commands as "
-            "well.[/]"
-        )
+        for command, channel, num, daily in entries:
+            rich.print(
+                "[green]"
+                f"You have chosen to roll with the Mudae command '${command}' "
+                f"{num} times in the channel queried with {channel!r}, and "
+                f"have opted to {'' if daily else 'NOT '}run the daily "
+                "commands as well.[/]"
+            )
+        if macro is not None:
+            rich.print(f"[green]Every session will roll through the macro "
+                       f"{ns.macro!r} instead.[/]")
+        if scheduled:
+            schedule: dict = config["schedule"]
+            rich.print(
+                "[green]These sessions will roll every "
+                f"{schedule['interval-minutes']} minutes, with the daily "
+                "commands on their own cadence of "
+                f"{schedule['daily-interval-minutes']} minutes instead.[/]"
+            )
         rich.print("Hit ENTER to continue, or ^C to quit: ")
         # Use instead of input() as workaround for funky abort key behavior
+        import keyboard
         keyboard.wait("enter")
 
-    # PyAutoGUI sequences
-    run_autogui(command, channel, num, daily, verbose, revert)
+    if scheduled:
+        from .scheduler import run_schedule
+        start_metrics_server(config)
+        run_schedule(config["schedule"],
+                     entries,
+                     lambda due: run_entries(config, due, ns.trace,
+                                             macro=macro),
+                     verbose)
+        return
+
+    run_entries(config, entries, ns.trace, ns.resume, macro)
 
     # All went well!
     rich.print("[green]Script terminated successfully.[/]")
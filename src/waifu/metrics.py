@@ -0,0 +1,237 @@
+"""
+metrics.py
+18 October 2026 16:53:50
+
+Counters and histograms of rolling sessions in the Prometheus format.
+
+The metrics can be written to a file for the textfile collector of the
+node exporter, or served over HTTP at /metrics for long-running
+processes like the daemon and the scheduler.
+"""
+
+import math
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator
+
+ROLL_INTERVAL_BUCKETS = (0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+"""Upper bounds in seconds of the buckets of the roll interval histogram."""
+
+METRICS_HOST = "127.0.0.1"  # only serve metrics to the local machine
+
+Sample = tuple[str, dict[str, str], float]
+"""Name (with any suffix), labels and value of one exposed sample."""
+
+# Shared by every metric, updates come from the hotkey threads too
+_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n"))
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"'
+                     for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Metric(ABC):
+    """Base of the metric types, named and described like Prometheus."""
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        """Yield the samples exposing the current value."""
+
+
+class Counter(Metric):
+    """Value that only goes up, optionally split by label values."""
+    kind = "counter"
+
+    def __init__(self,
+                 name: str,
+                 description: str,
+                 label: str | None = None) -> None:
+        super().__init__(name, description)
+        self._label = label
+        self._values: dict[str, float] = {}
+
+    def inc(self, amount: float = 1.0, label_value: str = "") -> None:
+        """Add amount to the value of the counter (of a label value)."""
+        with _lock:
+            self._values[label_value] = \
+                self._values.get(label_value, 0.0) + amount
+
+    def value(self, label_value: str = "") -> float:
+        """Return the value of the counter (of a label value)."""
+        return self._values.get(label_value, 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        if self._label is None:
+            yield self.name, {}, self._values.get("", 0.0)
+            return
+        for label_value, value in sorted(self._values.items()):
+            yield self.name, {self._label: label_value}, value
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str) -> None:
+        super().__init__(name, description)
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        """Replace the value of the gauge."""
+        self.value = value
+
+    def samples(self) -> Iterator[Sample]:
+        yield self.name, {}, self.value
+
+
+class Histogram(Metric):
+    """Distribution of observed values over cumulative buckets."""
+    kind = "histogram"
+
+    def __init__(self,
+                 name: str,
+                 description: str,
+                 buckets: tuple[float, ...]) -> None:
+        super().__init__(name, description)
+        self._bounds = (*sorted(buckets), math.inf)
+        self._counts = [0] * len(self._bounds)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Count value in the buckets it falls under."""
+        with _lock:
+            for index, bound in enumerate(self._bounds):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+            self._sum += value
+
+    def samples(self) -> Iterator[Sample]:
+        cumulative = 0
+        for bound, count in zip(self._bounds, self._counts):
+            cumulative += count
+            yield (f"{self.name}_bucket", {"le": _format_value(bound)},
+                   cumulative)
+        yield f"{self.name}_sum", {}, self._sum
+        yield f"{self.name}_count", {}, cumulative
+
+
+ROLLS = Counter("waifu_rolls_total", "Roll commands sent.")
+SESSIONS = Counter(
+    "waifu_sessions_total",
+    "Sessions ended, by outcome: completed, esc, sigint, failsafe or error.",
+    "outcome"
+)
+SESSION_ACTIVE = Gauge("waifu_session_active",
+                       "Whether a session is rolling right now.")
+PAUSED_SECONDS = Counter("waifu_paused_seconds_total",
+                         "Time spent paused with the pause key.")
+UNFOCUSED_SECONDS = Counter(
+    "waifu_unfocused_seconds_total",
+    "Time spent suspended while Discord was not in focus."
+)
+ROLL_INTERVAL = Histogram("waifu_roll_interval_seconds",
+                          "Time between consecutive rolls of a session.",
+                          ROLL_INTERVAL_BUCKETS)
+
+REGISTRY: list[Metric] = [ROLLS, SESSIONS, SESSION_ACTIVE, PAUSED_SECONDS,
+                          UNFOCUSED_SECONDS, ROLL_INTERVAL]
+"""Every metric exposed, in order."""
+
+
+def start_session() -> None:
+    """Mark a session as started."""
+    SESSION_ACTIVE.set(1)
+
+
+def end_session(outcome: str) -> None:
+    """Count the session in progress as ended with outcome.
+
+    Does nothing if no session is in progress, so that the first cause
+    of an abort is the one counted (e.g. the fail-safe raising SIGINT).
+    """
+    with _lock:
+        if not SESSION_ACTIVE.value:
+            return
+        SESSION_ACTIVE.set(0)
+    SESSIONS.inc(label_value=outcome)
+
+
+def render() -> str:
+    """Return every metric in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for metric in REGISTRY:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} "
+                             f"{_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: Path) -> None:
+    """Atomically replace path with the current metrics.
+
+    The node exporter could otherwise read a half-written file.
+    """
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temp_path.write_text(render(), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def serve_metrics(port: int) -> None:
+    """Serve the metrics at /metrics on a background thread.
+
+    Args:
+        port (int): Local port to listen on.
+
+    Raises:
+        OSError: The port could not be bound.
+    """
+    # Imported here since most runs don't serve metrics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type",
+                             "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: object) -> None:
+            pass  # Scrapes would flood the session output otherwise
+
+    server = ThreadingHTTPServer((METRICS_HOST, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
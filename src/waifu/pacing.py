@@ -0,0 +1,137 @@
+"""
+pacing.py
+18 October 2026 16:49:14
+
+Pace rolls by Mudae's replies, watched for on the screen.
+
+This module needs NumPy, an optional dependency installed with the
+reader extra: pip install waifu-roller[reader]
+"""
+
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .backend import get_backend
+from .cancel import get_token
+from .clock import Clock, get_clock
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+DOWNSAMPLE = 4  # keep every this many pixels along each axis
+PIXEL_DELTA = 16  # change in gray level for a pixel to count as changed
+REPLY_POLL_INTERVAL = 0.05  # seconds between captures while watching
+
+
+def _downsample(frame: "NDArray[Any]") -> "NDArray[np.int32]":
+    """Return a small grayscale version of a capture to compare."""
+    small = frame[::DOWNSAMPLE, ::DOWNSAMPLE, :3].astype(np.int32)
+    # Integer approximation of luma, precise enough to spot a new message
+    return (small[..., 0] * 77 + small[..., 1] * 150
+            + small[..., 2] * 29) >> 8
+
+
+class ReplyPacer:
+    """Waits for the reply to each roll to render before the next one.
+
+    The message area is captured before a roll is sent, then polled
+    until enough of it changed, which means a new message showed up.
+    The first new message is the roll itself echoed by Discord, so the
+    area is captured again once it renders and the next change counts
+    as the reply.
+    """
+
+    def __init__(self,
+                 region: tuple[int, int, int, int],
+                 min_gap: float,
+                 timeout: float,
+                 threshold: float,
+                 clock: Clock | None = None) -> None:
+        """Initialize the pacer.
+
+        Args:
+            region (tuple[int, int, int, int]): Screen area where
+            replies show up, as (left, top, width, height).
+            min_gap (float): Seconds to wait after a reply renders.
+            timeout (float): Seconds to wait for a reply before giving
+            up on it.
+            threshold (float): Fraction of the area that has to change
+            to count as a reply.
+            clock (Clock | None, optional): Time source. Defaults to
+            None (use the clock of the session engine).
+        """
+        self.region = region
+        self._min_gap = min_gap
+        self._timeout = timeout
+        self._threshold = threshold
+        self._clock = clock if clock is not None else get_clock()
+        self._baseline: "NDArray[np.int32] | None" = None
+        self.latencies: list[float] = []
+        """Seconds until each reply rendered, for rolls that got one."""
+        self.timeouts = 0
+        """Number of rolls that got no reply in time."""
+
+    @classmethod
+    def from_config(cls, options: dict[str, Any]) -> "ReplyPacer":
+        """Create the pacer from the validated pacing option."""
+        return cls(tuple(options["region"]),  # type: ignore
+                   options["min-gap"],
+                   options["timeout"],
+                   options["threshold"])
+
+    def _capture(self) -> "NDArray[np.int32]":
+        return _downsample(get_backend().capture(self.region))
+
+    def arm(self) -> None:
+        """Remember what the message area looks like before a roll."""
+        self._baseline = self._capture()
+
+    def _changed(self,
+                 frame: "NDArray[np.int32]",
+                 baseline: "NDArray[np.int32]") -> bool:
+        changed = np.abs(frame - baseline) > PIXEL_DELTA
+        return bool(changed.mean() >= self._threshold)
+
+    def wait_for_reply(self) -> float | None:
+        """Block until the reply renders, then for the minimal gap.
+
+        Meant to be called right after sending the roll arm() was
+        called before. If the echo of the roll and the reply render
+        within the same poll, the reply is missed and the timeout
+        elapses.
+
+        Raises:
+            SessionCancelled: The session was cancelled while waiting.
+
+        Returns:
+            float | None: Seconds until the reply rendered, or None if
+            the timeout elapsed first.
+        """
+        baseline = self._baseline if self._baseline is not None \
+            else self._capture()
+        echoed = False
+        token = get_token()
+        start = self._clock.monotonic()
+        while self._clock.monotonic() - start < self._timeout:
+            token.sleep(REPLY_POLL_INTERVAL, self._clock)
+            frame = self._capture()
+            if not self._changed(frame, baseline):
+                continue
+            if not echoed:
+                # Our own command scrolled in, re-arm behind it
+                echoed = True
+                baseline = frame
+                continue
+            latency = self._clock.monotonic() - start
+            self.latencies.append(latency)
+            token.sleep(self._min_gap, self._clock)
+            return latency
+        self.timeouts += 1
+        return None
+
+    def mean_latency(self) -> float:
+        """Return the average reply latency in seconds."""
+        if not self.latencies:
+            return 0.0
+        return sum(self.latencies) / len(self.latencies)
@@ -6,7 +6,8 @@ Implements the command line parser for this program.
 """
 
 from argparse import ArgumentParser, Namespace
-from typing import Any, Sequence
+from pathlib import Path
+from typing import Any, Iterable, NamedTuple, Sequence
 
 import rich
 
@@ -15,6 +16,18 @@ from .exceptions import CommandError, ConfigFormatError, get_config_path_tip
 DefaultsDict = dict[str, str | int | None]
 """Typing for defaults key in config.yaml."""
 
+ManifestList = list[dict[str, str | int | bool | None]]
+"""Typing for manifest key in config.yaml."""
+
+
+class SessionEntry(NamedTuple):
+    """Validated arguments of one rolling session."""
+    command: str
+    channel: str
+    num: int
+    daily: bool
+
+
 # Command line argument help descriptions
 COMMAND_HELP = ("Name of the Mudae command to use to roll for characters. It "
                 "should be unprefixed (no $, /, etc.). "
@@ -27,6 +40,23 @@ NUM_HELP = ("Number of times to roll in this session. Should be nonnegative. "
 DAILY_HELP = ("Flag specifying whether the daily Mudae commands, $daily and "
               "$dailykakera, should be run in addition to the rolling this "
               "session.")
+MANIFEST_HELP = ("Roll every entry of the manifest option in the "
+                 "configuration file back to back instead of a single "
+                 "session. Rolling arguments are ignored.")
+TRACE_HELP = ("Record how long every action takes and write it to FILE, in "
+              "the Chrome trace format if it ends in .json and as JSON Lines "
+              "otherwise.")
+RESUME_HELP = ("Continue an aborted run of the same sessions from the last "
+               "attempt it sent instead of starting over, including the "
+               "daily commands it already sent.")
+SIMULATE_HELP = ("Run the sessions against a simulated Discord on a virtual "
+                 "clock instead of the real one, and print how long they "
+                 "would take without waiting for it.")
+MACRO_HELP = ("Roll every session with the steps of this entry of the macros "
+              "option in the configuration file instead of rolling NUM "
+              "times.")
+SHOW_PLAN_HELP = ("Print the steps the sessions compile into and when they "
+                  "would start, and exit without rolling.")
 VERSION_HELP = ("Show script version and exit.")
 CONFIG_HELP = ("Show configuration file path and exit.")
 
@@ -75,6 +105,96 @@ def _validate_num_rolls(num_rolls: Any, is_default: bool) -> None:
         )
 
 
+def _unpack_defaults(defaults: DefaultsDict) -> tuple[Any, Any, Any]:
+    """Return the command, channel, and number of rolls defaults.
+
+    Raises:
+        ConfigFormatError: If any of the options is missing.
+    """
+    try:
+        return (defaults["mudae-command"],
+                defaults["target-channel"],
+                defaults["num-rolls"])
+    except KeyError as e:
+        raise ConfigFormatError(
+            f"Missing defaults option {e.args[0]!r} in configuration file"
+        ) from None
+
+
+def _manifest_entries(manifest: ManifestList,
+                      defaults: DefaultsDict) -> list[SessionEntry]:
+    """Convert the validated manifest option into session entries.
+
+    Omitted keys of an entry fall back to the defaults option.
+    """
+    return [SessionEntry(entry.get("mudae-command", defaults["mudae-command"]),
+                         entry.get("target-channel",
+                                   defaults["target-channel"]),
+                         entry.get("num-rolls", defaults["num-rolls"]),
+                         entry.get("daily", False))  # type: ignore
+            for entry in manifest]
+
+
+def _validate_manifest(manifest: ManifestList,
+                       defaults: DefaultsDict) -> None:
+    """Raise helpful errors for any format violation in the manifest.
+
+    Args:
+        manifest (ManifestList): The manifest option.
+        defaults (DefaultsDict): The already validated defaults option.
+
+    Raises:
+        ConfigFormatError: If there is any problem in the format of an
+        entry, including missing keys without a default.
+    """
+    for index, entry in enumerate(manifest):
+        if not isinstance(entry, dict):
+            raise ConfigFormatError(
+                f"Manifest entry {index} should be a mapping, "
+                f"got {type(entry).__name__} instead"
+            )
+        values: dict[str, Any] = {}
+        for key in ("mudae-command", "target-channel", "num-rolls"):
+            value = entry.get(key, defaults[key])
+            if value is None:
+                raise ConfigFormatError(
+                    f"Missing option {key!r} in manifest entry {index} and "
+                    "no default value is set for it"
+                )
+            values[key] = value
+        daily = entry.get("daily", False)
+        if not isinstance(daily, bool):
+            raise ConfigFormatError(
+                f"{daily!r} is a bad value for option 'daily' in manifest "
+                f"entry {index}: should be a boolean"
+            )
+        _validate_command(values["mudae-command"], True)
+        _validate_channel(values["target-channel"], True)
+        _validate_num_rolls(values["num-rolls"], True)
+
+
+def validate_defaults(defaults: DefaultsDict, manifest: ManifestList) -> None:
+    """Raise helpful errors for any format violation in the options
+    that provide rolling arguments, defaults and manifest.
+
+    Meant to be called when loading the configuration, since Parser
+    assumes these options to be valid.
+
+    Raises:
+        ConfigFormatError: If there is any problem in the format of the
+        defaults dict or manifest list, including missing keys,
+        incorrect data types, bad argument range or characters, etc.
+    """
+    command, channel, num_rolls = _unpack_defaults(defaults)
+    if command is not None:
+        _validate_command(command, True)
+    if channel is not None:
+        _validate_channel(channel, True)
+    if num_rolls is not None:
+        _validate_num_rolls(num_rolls, True)
+    _validate_manifest(manifest, defaults)
+
+
 class Parser(ArgumentParser):
     """Command line parser for this program.
 
@@ -87,7 +207,11 @@ class Parser(ArgumentParser):
     daily commands $dk and $daily after the rolling session.
     """
 
-    def __init__(self, defaults: DefaultsDict, verbose: bool) -> None:
+    def __init__(self,
+                 defaults: DefaultsDict,
+                 verbose: bool,
+                 manifest: ManifestList | None = None,
+                 macros: Iterable[str] | None = None) -> None:
         """Initialize the parser for this program.
 
         Args:
@@ -96,37 +220,33 @@ class Parser(ArgumentParser):
             file.
             verbose (bool): Configuration preference. If True, will
             print config file tip on command error.
+            manifest (ManifestList | None, optional): Sessions to roll
+            with the -m/--manifest flag. Defaults to None (no entries).
+            macros (Iterable[str] | None, optional): Names of the macros
+            the --macro flag can choose from. Defaults to None (accept
+            any name).
+
+        Both defaults and manifest should have been checked with
+        validate_defaults, which config.load_config does.
 
         Raises:
-            ConfigFormatError: If there is any problem in the format of
-            the defaults dict, including missing keys, incorrect data
-            types, bad argument range or characters, etc.
+            ConfigFormatError: If any option is missing from the
+            defaults dict.
         """
         super().__init__(description="Roll waifus on Discord!")
         self._verbose = verbose
 
-        # VALIDATE DEFAULTS
         # Unpack default choices from config
-        try:
-            command = defaults["mudae-command"]
-            channel = defaults["target-channel"]
-            num_rolls = defaults["num-rolls"]
-        except KeyError as e:
-            raise ConfigFormatError(
-                f"Missing defaults option {e.args[0]!r} in configuration file"
-            ) from None
+        command, channel, num_rolls = _unpack_defaults(defaults)
 
         # For all of these options, configure the add_argument() kwargs
         # differently for if they are provided or not.
         # If they aren't set (left as None), then the parser should
         # treat those options as required.
-        # Use is_default=True to raise ConfigFormatError for the user to see
-        # if bad arg.
 
         command_kwargs = {"help": COMMAND_HELP, "nargs": "?",
                           "default": command}
         if command is not None:
-            _validate_command(command, True)
             command_kwargs.update({
                 "nargs": "?",
                 "default": command
@@ -134,18 +254,18 @@ class Parser(ArgumentParser):
 
         channel_kwargs = {"help": CHANNEL_HELP}
         if channel is not None:
-            _validate_channel(channel, True)
             channel_kwargs.update({
                 "default": channel,  # type: ignore
             })
 
         num_rolls_kwargs = {"type": int, "help": NUM_HELP}
         if num_rolls is not None:
-            _validate_num_rolls(num_rolls, True)
             num_rolls_kwargs.update({
                 "default": num_rolls,
             })
 
+        self._entries = _manifest_entries(manifest or [], defaults)
+
         # Rolling arguments
         self.add_argument("command", **command_kwargs)
         self.add_argument("-c", "--channel", **channel_kwargs)
@@ -154,6 +274,26 @@ class Parser(ArgumentParser):
         self.add_argument("-d", "--daily",
                           action="store_true",
                           help=DAILY_HELP)
+        self.add_argument("-m", "--manifest",
+                          action="store_true",
+                          help=MANIFEST_HELP)
+        self.add_argument("--trace",
+                          type=Path,
+                          metavar="FILE",
+                          help=TRACE_HELP)
+        self.add_argument("--resume",
+                          action="store_true",
+                          help=RESUME_HELP)
+        self.add_argument("--simulate",
+                          action="store_true",
+                          help=SIMULATE_HELP)
+        self.add_argument("--macro",
+                          choices=macros,
+                          metavar="NAME",
+                          help=MACRO_HELP)
+        self.add_argument("--show-plan",
+                          action="store_true",
+                          help=SHOW_PLAN_HELP)
 
         # Info arguments
         # I opted out of using action="version" to avoid duplicate tips
@@ -178,7 +318,9 @@ class Parser(ArgumentParser):
             parsing args.
 
         Returns:
-            Namespace: The generated namespace.
+            Namespace: The generated namespace. Unless an info argument
+            was provided, its entries attribute holds the list of
+            SessionEntry to roll.
         """
         try:
             ns = super().parse_args(args)
@@ -198,6 +340,19 @@ class Parser(ArgumentParser):
         if version_flag or config_flag:
             return ns
 
+        if ns.manifest:
+            if not self._entries:
+                rich.print(
+                    "[bold red]The -m/--manifest flag was used but the "
+                    "manifest option in your configuration file has no "
+                    "entries.[/]\n"
+                )
+                if self._verbose:
+                    rich.print(f"[yellow]{get_config_path_tip()}[/]\n")
+                raise SystemExit
+            ns.entries = self._entries
+            return ns
+
         # Otherwise unpack rolling args to validate
         command: str | None = ns.command
         channel: str | None = ns.channel
@@ -229,4 +384,5 @@ class Parser(ArgumentParser):
         _validate_channel(channel, False)
         _validate_num_rolls(num, False)
 
+        ns.entries = [SessionEntry(command, channel, num, ns.daily)]
         return ns
@@ -0,0 +1,820 @@
+"""
+plan.py
+18 October 2026 17:24:43
+
+Action plans: everything a run does, compiled ahead of time into steps
+that a single interpreter loop carries out.
+
+A plan is an immutable tuple of steps (key presses, text entry, waits,
+commands to send, checks of the window title...) compiled from the
+sessions, the configuration and the macro of a run. Since the whole run
+is known before it starts, it can be optimized, printed with --show-plan
+and timed before running it. Jumps only ever go forward, to a label, so
+every plan runs to its end.
+
+The interpreter yields what it waits on as effects instead of waiting
+itself, so that the same loop runs plans blocking (Interpreter.run) or
+on an event loop (engine.py).
+"""
+
+from contextlib import ExitStack
+from itertools import islice
+from typing import (TYPE_CHECKING, Any, Callable, Generator, NamedTuple,
+                    Union)
+
+import rich
+
+from . import metrics
+from .abort import ABORT_KEY
+from .backend import Window, get_backend
+from .clock import get_clock
+from .core import (ACTION_COOLDOWN, NAVIGATION_BACKOFF, NAVIGATION_RETRIES,
+                   READ_DELAY, REVERT_WINDOW_DELAY, TYPING_COOLDOWN,
+                   _channel_in_title, _check_wishlist, _fetch_reply,
+                   _open_discord, _read_result, _wait)
+from .exceptions import NavigationError
+from .inject import PASTE_SETTLE_DELAY, inject_text
+from .parser import SessionEntry
+from .ratelimit import RateLimiter
+from .trace import get_tracer
+from .transport import HTTPTransport, Transport
+
+if TYPE_CHECKING:
+    from .config import ConfigDict
+    from .history import HistoryWriter
+    from .journal import EntryProgress, Journal
+    from .pacing import ReplyPacer
+    from .reader import Reader
+    from .wishlist import Wishlist
+
+DAILY_COMMANDS = ("$daily", "$dk")
+"""Commands sent after the rolls of sessions with the daily flag."""
+
+
+class Phase(NamedTuple):
+    """Start of a stretch of the plan traced as one span, which ends
+    where the next phase starts.
+    """
+    name: str
+
+
+class Note(NamedTuple):
+    """Message printed when verbose."""
+    text: str
+    style: str = "bright_black"
+
+
+class Label(NamedTuple):
+    """Target of jumps, which does nothing."""
+    name: str
+
+
+class Focus(NamedTuple):
+    """Bring the Discord window to the front."""
+
+
+class Key(NamedTuple):
+    """Press keys together, e.g. ("ctrl", "k")."""
+    keys: tuple[str, ...]
+    closing: bool = False
+    """Whether the press only closes whatever is open, like the presses
+    of Esc around navigation, so that presses back to back are merged.
+    """
+
+
+class Text(NamedTuple):
+    """Enter text into the focused window. A trailing newline submits
+    it.
+    """
+    text: str
+
+
+class Wait(NamedTuple):
+    """Wait for seconds, then until unpaused and Discord is focused."""
+    seconds: float
+
+
+class Skip(NamedTuple):
+    """Jump to a label if the window title already shows the channel."""
+    channel: str
+    to: str
+
+
+class Verify(NamedTuple):
+    """Jump to a label if the window title shows the channel, or can't
+    tell. Otherwise fail if final, or go on to the retry that follows.
+    """
+    channel: str
+    to: str
+    final: bool
+
+
+class Send(NamedTuple):
+    """Send a command once the limiter allows."""
+    entry: int
+    """Index of the session sending it."""
+    channel: str
+    content: str
+
+
+class Roll(NamedTuple):
+    """Send the roll command of a session, from one attempt to the
+    last.
+    """
+    entry: int
+    """Index of the session rolling."""
+    command: str
+    channel: str
+    first: int
+    """Number of the first attempt to send, starting from 1."""
+    num: int
+    """Number of the last attempt to send."""
+
+
+class Restore(NamedTuple):
+    """Bring the window the run was started from back to the front."""
+
+
+Step = Union[Phase, Note, Label, Focus, Key, Text, Wait, Skip, Verify, Send,
+             Roll, Restore]
+
+Plan = tuple[Step, ...]
+"""Steps of a run, in order."""
+
+
+class Sleep(NamedTuple):
+    """Effect: wait for seconds, then until unpaused and, if focus,
+    until Discord is focused, see core._wait.
+    """
+    seconds: float
+    focus: bool
+
+
+class Acquire(NamedTuple):
+    """Effect: wait until the limiter lets a command go out in channel,
+    see RateLimiter.acquire.
+    """
+    limiter: RateLimiter
+    channel: str
+    paced: bool
+
+
+class Call(NamedTuple):
+    """Effect: call a function that blocks, like sending a command or
+    reading a result, and send its return value back.
+    """
+    function: Callable[..., Any]
+    args: tuple[Any, ...] = ()
+
+
+Effect = Union[Sleep, Acquire, Call]
+
+Effects = Generator[Effect, Any, Any]
+"""Generator yielding the effects of running steps, which is sent what
+carrying out each of them returned.
+"""
+
+# Steps that don't act on anything, which closing key presses can be
+# coalesced across
+_TRANSPARENT = (Phase, Note, Wait)
+
+
+def _search(channel: str) -> str:
+    """Return the quick switcher query of a channel."""
+    # In case user put the # in there themselves
+    return "#" + channel.removeprefix("#")
+
+
+def _open_steps() -> list[Step]:
+    """Return the steps bringing Discord up at the start of a run."""
+    return [Focus()]
+
+
+def _navigate_steps(index: int, channel: str, verify: bool) -> list[Step]:
+    """Return the steps navigating to the channel of a session.
+
+    With verify, the navigation is skipped if the window title already
+    shows the channel, and retried with exponential backoff if the
+    title doesn't afterwards.
+
+    Args:
+        index (int): Index of the session, to name its labels.
+        channel (str): Query string to submit to the quick switcher.
+        verify (bool): Configuration preference.
+    """
+    search = _search(channel)
+    done = f"navigated-{index}"
+    steps: list[Step] = [Phase("navigate_to_channel")]
+    if verify:
+        steps.append(Skip(channel, done))
+    steps.append(Note(f"Navigating by searching for channel with query "
+                      f"{search!r}..."))
+    attempts = NAVIGATION_RETRIES + 1 if verify else 1
+    for attempt in range(attempts):
+        if attempt:
+            backoff = NAVIGATION_BACKOFF * 2 ** (attempt - 1)
+            steps += [Note("Navigation didn't land in the channel, retrying "
+                           f"in {backoff} seconds...", "yellow"),
+                      Wait(backoff)]
+        # Close the search bar in case it was already up, then bring up the
+        # quick switcher and submit the query
+        # Note: sometimes this opens the stupid Quick Switcher help webpage
+        # and I don't know why
+        steps += [Key(("esc",), True), Wait(ACTION_COOLDOWN),
+                  Key(("ctrl", "k")), Wait(ACTION_COOLDOWN),
+                  Text(search + "\n"), Wait(ACTION_COOLDOWN)]
+        if verify:
+            steps.append(Verify(channel, done, attempt == attempts - 1))
+    # Focus text area
+    steps += [Label(done), Key(("esc",), True), Wait(ACTION_COOLDOWN),
+              Note("Finished navigating, focused text area, and ready to "
+                   "roll")]
+    return steps
+
+
+def _macro_step(spec: dict[str, Any], index: int,
+                entry: SessionEntry) -> Step:
+    """Return the step of a validated macro step for a session.
+
+    Args:
+        spec (dict[str, Any]): Mapping of one of the kinds of
+        config.MACRO_STEP_SCHEMA to its value. rolls sends the roll
+        command of the session that many times, or num-rolls times if
+        empty.
+        index (int): Index of the session.
+        entry (SessionEntry): The session.
+    """
+    ((kind, value),) = spec.items()
+    if kind == "key":
+        return Key(tuple(value.split("+")))
+    if kind == "text":
+        return Text(value)
+    if kind == "wait":
+        return Wait(float(value))
+    if kind == "send":
+        return Send(index, entry.channel, value)
+    return Roll(index, entry.command, entry.channel, 1,
+                entry.num if value is None else value)
+
+
+def _roll_steps(index: int,
+                entry: SessionEntry,
+                progress: "EntryProgress | None" = None,
+                macro: list[dict[str, Any]] | None = None) -> list[Step]:
+    """Return the steps sending the commands of a session.
+
+    Args:
+        index (int): Index of the session.
+        entry (SessionEntry): The session.
+        progress (EntryProgress | None, optional): What an earlier run
+        already sent of the session, which is skipped. Defaults to None
+        (send everything).
+        macro (list[dict[str, Any]] | None, optional): Validated steps
+        to roll with instead of num-rolls roll attempts. Defaults to
+        None (no macro).
+    """
+    command, channel, num, daily = entry
+    first = 1 if progress is None else progress.rolled + 1
+    steps: list[Step] = [Phase("start_rolling")]
+    if macro is not None:
+        steps.append(Note(f"Starting to roll with {command=} through the "
+                          "macro..."))
+        steps += [_macro_step(spec, index, entry) for spec in macro]
+    else:
+        if first > 1:
+            steps.append(Note(f"Resuming from attempt {first}/{num}"))
+        else:
+            steps.append(Note(f"Starting to roll with {command=}..."))
+        steps.append(Roll(index, command, channel, first, num))
+    if daily:
+        steps += [Send(index, channel, content) for content in DAILY_COMMANDS
+                  if progress is None or content not in progress.sent]
+        steps.append(Note("Finished running daily commands.", "green"))
+    return steps
+
+
+def _revert_steps() -> list[Step]:
+    """Return the steps restoring the window the run was started from."""
+    return [
+        Phase("revert_window"),
+        Note(f"Waiting for a delay of {REVERT_WINDOW_DELAY} seconds before "
+             "restoring your window"),
+        Note("[TIP] You can cancel the window focus change with the "
+             f"{ABORT_KEY.upper()} hotkey during this delay if you want to "
+             "react to a Mudae message or review your rolls.", "yellow"),
+        Wait(REVERT_WINDOW_DELAY),
+        Restore(),
+    ]
+
+
+def compile_plan(entries: list[SessionEntry],
+                 gui: bool = True,
+                 verify: bool = True,
+                 revert: bool = False,
+                 macro: list[dict[str, Any]] | None = None,
+                 progress: "list[EntryProgress] | None" = None) -> Plan:
+    """Compile the sessions of a run into a plan, see optimize().
+
+    Args:
+        entries (list[SessionEntry]): Sessions to roll in order.
+        gui (bool, optional): Whether the commands go through the
+        Discord window, which then has to be brought up and navigated.
+        Defaults to True.
+        verify (bool, optional): Configuration preference. Defaults to
+        True.
+        revert (bool, optional): Configuration preference. Defaults to
+        False.
+        macro (list[dict[str, Any]] | None, optional): Validated steps
+        of the macro to roll every session with. Defaults to None (roll
+        num-rolls times).
+        progress (list[EntryProgress] | None, optional): What an
+        earlier run already sent of every session, which is skipped.
+        Macros send what they like, which the journal doesn't follow,
+        so this is ignored with a macro. Defaults to None (send
+        everything).
+    """
+    if macro is not None:
+        progress = None
+    steps = _open_steps() if gui else []
+    for index, entry in enumerate(entries):
+        entry_progress = progress[index] if progress is not None else None
+        if entry_progress is not None and entry_progress.is_done(entry):
+            steps.append(Note(f"Already rolled in {entry.channel!r} before, "
+                              "skipping"))
+            continue
+        if gui:
+            steps += _navigate_steps(index, entry.channel, verify)
+        steps += _roll_steps(index, entry, entry_progress, macro)
+    if gui and revert:
+        steps += _revert_steps()
+    return tuple(steps)
+
+
+def optimize(plan: Plan) -> Plan:
+    """Return an equivalent plan with fewer steps.
+
+    Waits with nothing in between are coalesced into one, and so are
+    the presses of Esc added to close what's open. Those of macros are
+    kept, since repeating them may be deliberate. Focusing
+    Discord again before anything restored another window, labels
+    nothing jumps to, empty waits and rolls, and phases without a step
+    of their own are dropped. Waits stay in their phase so that it is
+    timed right, and notes between the waits they were printed between.
+    Nothing is coalesced across a label, since a jump to it would skip
+    over the merged step.
+    """
+    targets = {step.to for step in plan if isinstance(step, (Skip, Verify))}
+    steps: list[Step] = []
+    # Index in steps of the last wait with nothing after it, and of the last
+    # Esc press with only transparent steps after it, if any
+    last_wait: int | None = None
+    last_esc: int | None = None
+    focused = False
+    for step in plan:
+        if isinstance(step, Label):
+            if step.name not in targets:
+                continue
+            last_wait = last_esc = None
+            focused = False
+        elif isinstance(step, Wait):
+            if step.seconds <= 0:
+                continue
+            if last_wait is not None:
+                previous = steps[last_wait]
+                assert isinstance(previous, Wait)
+                steps[last_wait] = Wait(previous.seconds + step.seconds)
+                continue
+            last_wait = len(steps)
+        elif isinstance(step, Key) and step.closing:
+            if last_esc is not None:
+                continue
+            last_esc = len(steps)
+            last_wait = None
+        elif isinstance(step, (Phase, Note)):
+            last_wait = None
+        elif isinstance(step, Focus):
+            if focused:
+                continue
+            focused = True
+            last_wait = last_esc = None
+        elif isinstance(step, Roll) and step.first > step.num:
+            continue
+        elif not isinstance(step, _TRANSPARENT):
+            if isinstance(step, Restore):
+                focused = False
+            last_wait = last_esc = None
+        steps.append(step)
+
+    # Phases left with only notes don't time anything
+    kept: list[Step] = []
+    for index, step in enumerate(steps):
+        if isinstance(step, Phase):
+            following = (later for later in islice(steps, index + 1, None)
+                         if not isinstance(later, Note))
+            if isinstance(next(following, Phase("")), Phase):
+                continue
+        kept.append(step)
+    return tuple(kept)
+
+
+def split_phases(plan: Plan) -> list[tuple[str | None, Plan]]:
+    """Split a plan into the steps of each of its phases, in order.
+
+    Every part runs on its own as long as no jump crosses phases, which
+    those of compile_plan() never do.
+
+    Returns:
+        list[tuple[str | None, Plan]]: The name of every phase and its
+        steps, the Phase step included. Steps before the first phase
+        come first with None as the name, if any.
+    """
+    parts: list[tuple[str | None, Plan]] = []
+    name: str | None = None
+    start = 0
+    for index, step in enumerate(plan):
+        if isinstance(step, Phase):
+            if index > start:
+                parts.append((name, plan[start:index]))
+            name, start = step.name, index
+    if len(plan) > start:
+        parts.append((name, plan[start:]))
+    return parts
+
+
+def describe(step: Step) -> str:
+    """Return what a step does in a few words."""
+    if isinstance(step, Phase):
+        return f"[bold]{step.name}[/]"
+    if isinstance(step, Note):
+        return f"print {step.text!r}"
+    if isinstance(step, Label):
+        return f"{step.name}:"
+    if isinstance(step, Focus):
+        return "focus Discord"
+    if isinstance(step, Key):
+        return f"press {'+'.join(step.keys)}"
+    if isinstance(step, Text):
+        return f"enter {step.text!r}"
+    if isinstance(step, Wait):
+        return f"wait {step.seconds:g} s"
+    if isinstance(step, Skip):
+        return f"go to {step.to} if in {step.channel!r}"
+    if isinstance(step, Verify):
+        otherwise = "fail" if step.final else "retry"
+        return f"go to {step.to} if in {step.channel!r}, else {otherwise}"
+    if isinstance(step, Send):
+        return f"send {step.content!r}"
+    if isinstance(step, Roll):
+        if step.first == 1:
+            return f"roll '${step.command}' {step.num} times"
+        return (f"roll '${step.command}' from attempt {step.first} to "
+                f"{step.num}")
+    return "restore the caller window"
+
+
+def project(plan: Plan,
+            interval: float,
+            typing: float = 0.0,
+            settle: float = 0.0) -> tuple[list[float | None], float]:
+    """Time a plan without running it, assuming that navigation is
+    needed and lands on its first attempt.
+
+    Only the waits of the plan and the pace of the commands are
+    counted, so this is how long the plan takes at the least.
+
+    Args:
+        plan (Plan): The plan to time.
+        interval (float): Seconds between commands, the first command
+        going out right away.
+        typing (float, optional): Seconds per character of text
+        entered. Defaults to 0.0.
+        settle (float, optional): Seconds to wait after entering text
+        or a command, like pasting does. Defaults to 0.0.
+
+    Returns:
+        tuple[list[float | None], float]: Seconds from the start at
+        which every step starts (when their first command goes out for
+        commands), None for the steps skipped, and the seconds the whole
+        plan takes.
+    """
+    labels = {step.name: index for index, step in enumerate(plan)
+              if isinstance(step, Label)}
+    starts: list[float | None] = [None] * len(plan)
+    now = 0.0
+    # Time the next command can go out at
+    ready = 0.0
+    index = 0
+    while index < len(plan):
+        step = plan[index]
+        starts[index] = now
+        index += 1
+        if isinstance(step, Wait):
+            now += step.seconds
+        elif isinstance(step, Text):
+            now += len(step.text) * typing + settle
+        elif isinstance(step, Verify):
+            index = labels[step.to]
+        elif isinstance(step, (Send, Roll)):
+            sends = 1 if isinstance(step, Send) else step.num - step.first + 1
+            if sends > 0:
+                # Starts once its first command goes out
+                starts[index - 1] = max(now, ready)
+                now = max(now, ready) + (sends - 1) * interval
+                ready = now + interval
+                now += settle
+    return starts, now
+
+
+def show_plan(config: "ConfigDict",
+              entries: list[SessionEntry],
+              macro: list[dict[str, Any]] | None = None) -> None:
+    """Print the optimized plan of the sessions, with when every step
+    starts at the configured pace, see project().
+
+    Interface function to be called from main process.
+
+    Args:
+        config (ConfigDict): The loaded configuration.
+        entries (list[SessionEntry]): Sessions to roll in order.
+        macro (list[dict[str, Any]] | None, optional): Validated steps
+        of the macro to roll every session with. Defaults to None (roll
+        num-rolls times).
+    """
+    from rich.table import Table
+
+    gui = config["transport"]["mode"] == "gui"
+    compiled = compile_plan(entries,
+                            gui,
+                            config["verify-navigation"],
+                            config["revert-window"],
+                            macro)
+    plan = optimize(compiled)
+    rate_limit = config["rate-limit"]
+    interval = 60 / min(rate_limit["rolls-per-minute"],
+                        rate_limit["global-rolls-per-minute"])
+    typing = TYPING_COOLDOWN if config["text-injection"] == "type" else 0.0
+    # Only the gui transport enters the commands as text
+    settle = PASTE_SETTLE_DELAY \
+        if config["text-injection"] == "paste" and gui else 0.0
+    starts, total = project(plan, interval, typing, settle)
+
+    table = Table(title="Action plan")
+    table.add_column("#", justify="right")
+    table.add_column("At (s)", justify="right")
+    table.add_column("Step")
+    for index, (step, start) in enumerate(zip(plan, starts)):
+        if isinstance(step, Note):
+            continue
+        table.add_row(str(index), "" if start is None else f"{start:.2f}",
+                      describe(step))
+    rich.print(table)
+    rich.print(f"[bright_black]{len(plan)} steps, optimized from "
+               f"{len(compiled)}. Takes at least {total:.1f} seconds at one "
+               f"command every {interval:g} seconds.[/]")
+
+
+class Interpreter:
+    """Runs plans one step after the other, with what the steps need."""
+
+    def __init__(self,
+                 transport: Transport,
+                 limiter: RateLimiter,
+                 verbose: bool,
+                 injection: str = "batch",
+                 reader: "Reader | None" = None,
+                 pacer: "ReplyPacer | None" = None,
+                 journal: "Journal | None" = None,
+                 history: "HistoryWriter | None" = None,
+                 wishlist: "Wishlist | None" = None,
+                 caller: Window | None = None) -> None:
+        """Initialize the interpreter. See core.run_manifest for the
+        arguments.
+
+        Args:
+            caller (Window | None, optional): Window to bring back with
+            Restore steps. Defaults to None (don't bring any back).
+        """
+        self._transport = transport
+        self._limiter = limiter
+        self._verbose = verbose
+        self._injection = injection
+        self._reader = reader
+        self._pacer = pacer
+        self._journal = journal
+        self._history = history
+        self._wishlist = wishlist
+        self._caller = caller
+        self._focus = transport.requires_focus
+        self._replied = False
+        # Only the http transport can fetch replies, once for both readers
+        timeouts = [reply_reader.reply_timeout
+                    for reply_reader in (history, wishlist)
+                    if reply_reader is not None]
+        self._reply_timeout = max(timeouts) \
+            if timeouts and isinstance(transport, HTTPTransport) else None
+
+    def _progress(self, entry: int) -> "EntryProgress | None":
+        if self._journal is None:
+            return None
+        return self._journal.progress[entry]
+
+    def _send(self, channel: str, content: str) -> Effects:
+        """Send content, returning when it was sent."""
+        tracer = get_tracer()
+        # Wait for the limiter first since it can sleep a while, unless the
+        # reply to the last command rendered, which paces this one already
+        with tracer.span("limiter"):
+            yield Acquire(self._limiter, channel, self._replied)
+        self._replied = False
+        yield Sleep(0, self._focus)
+        if self._pacer is not None:
+            self._pacer.arm()
+        sent_at = get_clock().monotonic()
+        with tracer.span("send", content=content):
+            yield Call(self._transport.send, (content,))
+        self._limiter.on_success()
+        return sent_at
+
+    def _wait_for_reply(self) -> Effects:
+        """Hold off until the reply to the command just sent rendered.
+        Separate from _send() so that the journal records the command
+        before this wait, which can be cancelled.
+        """
+        if self._pacer is None:
+            return
+        with get_tracer().span("wait_for_reply"):
+            latency = yield Call(self._pacer.wait_for_reply)
+        self._replied = latency is not None
+        if not self._verbose:
+            return
+        if latency is None:
+            # The limiter paces the next command instead
+            rich.print("[bright_black]No reply in time, falling back to "
+                       "fixed pacing[/]")
+        else:
+            rich.print(f"[bright_black]Reply rendered after "
+                       f"{latency * 1000:.0f} ms[/]")
+
+    def _run_send(self, step: Send) -> Effects:
+        yield from self._send(step.channel, step.content)
+        progress = self._progress(step.entry)
+        if progress is not None and step.content in DAILY_COMMANDS:
+            progress.record_daily(step.content)
+        yield from self._wait_for_reply()
+
+    def _run_roll(self, step: Roll) -> Effects:
+        """Send the roll attempts of the step, reading the result of
+        every one of them.
+        """
+        progress = self._progress(step.entry)
+        reader = self._reader
+        history = self._history
+        wishlist = self._wishlist
+        last_sent: float | None = None
+        for attempt_num in range(step.first, step.num + 1):
+            sent_at = yield from self._send(step.channel, f"${step.command}")
+            if progress is not None:
+                progress.record_roll()
+            yield from self._wait_for_reply()
+            metrics.ROLLS.inc()
+            if last_sent is not None:
+                metrics.ROLL_INTERVAL.observe(sent_at - last_sent)
+            last_sent = sent_at
+            if self._verbose:
+                rich.print(f"[bright_black]Attempted to roll "
+                           f"({attempt_num}/{step.num})[/]")
+            reading = None
+            if reader is not None:
+                # Waiting costs nothing at the default pace since the
+                # limiter counts this time towards the next roll's token.
+                # The pacer already waited for the reply if there is one.
+                yield Sleep(0.0 if self._pacer is not None else READ_DELAY,
+                            self._focus)
+                reading = yield Call(_read_result, (reader, self._verbose))
+            reply = None
+            if self._reply_timeout is not None:
+                reply = yield Call(_fetch_reply, (self._transport,
+                                                  self._reply_timeout,
+                                                  self._verbose))
+            # Stored from this thread, which the database belongs to
+            if history is not None:
+                history.record(step.channel, step.command,
+                               reading.labels if reading is not None
+                               else None, reply)
+            if wishlist is not None and reply is not None:
+                _check_wishlist(wishlist, reply)
+        if self._verbose:
+            rich.print(
+                "[green]Finished rolling.[/] [bright_black]"
+                f"({self._limiter.rolls_per_minute():.1f} rolls/minute)[/]"
+            )
+
+    def _in_channel(self, channel: str) -> bool | None:
+        return _channel_in_title(get_backend().get_active_window_title(),
+                                 channel)
+
+    def effects(self, plan: Plan) -> Effects:
+        """Run every step of a plan, yielding what it waits on instead of
+        waiting. Exceptions from carrying out an effect are to be thrown
+        into the generator, which goes on with the steps as if raised by
+        the wait itself.
+
+        Raises:
+            NavigationError: The window title still didn't show the
+            channel after the last attempt to navigate to it.
+        """
+        labels = {step.name: index for index, step in enumerate(plan)
+                  if isinstance(step, Label)}
+        tracer = get_tracer()
+        backend = get_backend()
+        index = 0
+        with ExitStack() as phase:
+            while index < len(plan):
+                step = plan[index]
+                index += 1
+                if isinstance(step, Wait):
+                    yield Sleep(step.seconds, self._focus)
+                elif isinstance(step, Roll):
+                    yield from self._run_roll(step)
+                elif isinstance(step, Send):
+                    yield from self._run_send(step)
+                elif isinstance(step, Key):
+                    backend.hotkey(*step.keys)
+                elif isinstance(step, Text):
+                    yield Call(inject_text, (step.text, self._injection,
+                                             TYPING_COOLDOWN))
+                elif isinstance(step, Note):
+                    if self._verbose:
+                        rich.print(f"[{step.style}]{step.text}[/]")
+                elif isinstance(step, Phase):
+                    phase.close()
+                    phase.enter_context(tracer.span(step.name))
+                elif isinstance(step, Skip):
+                    if self._in_channel(step.channel):
+                        if self._verbose:
+                            rich.print(
+                                "[bright_black]Already in the channel for "
+                                f"{_search(step.channel)!r}, skipping "
+                                "navigation[/]"
+                            )
+                        index = labels[step.to]
+                # Can't tell if the title doesn't include the channel
+                elif isinstance(step, Verify):
+                    if self._in_channel(step.channel) is not False:
+                        index = labels[step.to]
+                    elif step.final:
+                        raise NavigationError(
+                            "Could not navigate to the channel for "
+                            f"{_search(step.channel)!r}, the Discord window "
+                            "is still titled "
+                            f"{backend.get_active_window_title()!r}"
+                        )
+                elif isinstance(step, Focus):
+                    _open_discord(self._verbose)
+                elif isinstance(step, Restore):
+                    if self._caller is not None:
+                        backend.activate_window(self._caller)
+                        if self._verbose:
+                            rich.print(f"[bright_black]Returned focus to "
+                                       f"window '{self._caller.title}'")
+
+    @staticmethod
+    def perform(effect: Effect) -> Any:
+        """Carry out an effect, blocking until done.
+
+        Raises:
+            SessionCancelled: The session was cancelled while waiting.
+
+        Returns:
+            Any: What a Call returned, the seconds slept for an Acquire,
+            None for a Sleep.
+        """
+        if isinstance(effect, Sleep):
+            _wait(effect.seconds, effect.focus)
+            return None
+        if isinstance(effect, Acquire):
+            return effect.limiter.acquire(effect.channel, effect.paced)
+        return effect.function(*effect.args)
+
+    def run(self, plan: Plan) -> None:
+        """Run every step of a plan, blocking on each effect, see
+        effects().
+
+        Raises:
+            NavigationError: The window title still didn't show the
+            channel after the last attempt to navigate to it.
+        """
+        effects = self.effects(plan)
+        result: Any = None
+        error: BaseException | None = None
+        while True:
+            try:
+                effect = effects.send(result) if error is None \
+                    else effects.throw(error)
+            except StopIteration:
+                return
+            result, error = None, None
+            try:
+                result = self.perform(effect)
+            except BaseException as e:
+                error = e
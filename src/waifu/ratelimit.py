@@ -0,0 +1,284 @@
+"""
+ratelimit.py
+18 October 2026 15:30:08
+
+Pace roll commands with token buckets that adapt to rate limiting.
+"""
+
+import time
+from typing import TYPE_CHECKING, Any
+
+from .cancel import get_token
+from .clock import Clock, get_clock
+
+if TYPE_CHECKING:
+    from multiprocessing.context import BaseContext
+
+# Feedback from rate limit signals, additive increase/multiplicative decrease
+BACKOFF_FACTOR = 0.5  # multiply the refill rate by this on a rate limit
+RAMP_STEP = 0.05  # add this much of the configured rate per success
+MIN_RATE_FACTOR = 0.05  # never slow down to less than this of the rate
+
+# Token balances within this of a whole token count as one, otherwise float
+# rounding can leave a deficit too small to sleep off
+TOKEN_TOLERANCE = 1e-9
+
+
+class TokenBucket:
+    """Token bucket that refills continuously at a fixed rate.
+
+    Each command costs one token. Up to burst tokens can build up while
+    idle, so that many commands can go out back to back.
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Clock) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            burst (float): Maximum number of tokens held at once.
+            clock (Clock): Time source of the refills.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock.monotonic()
+
+    def _refill(self) -> None:
+        now = self._clock.monotonic()
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Return the seconds until a token is available."""
+        self._refill()
+        missing = 1.0 - self._tokens
+        return missing / self.rate if missing > TOKEN_TOLERANCE else 0.0
+
+    def consume(self, overdraw: bool = True) -> None:
+        """Take a token. The balance may go negative if none is left,
+        unless overdraw is False, in which case it stops at zero.
+        """
+        self._refill()
+        self._tokens -= 1.0
+        if not overdraw:
+            self._tokens = max(self._tokens, 0.0)
+
+
+class SharedTokenBucket:
+    """Token bucket shared by several processes, see TokenBucket.
+
+    The balance lives in shared memory and tokens are taken under a
+    lock, so that the processes can't race for the same token. Time is
+    taken from time.monotonic(), the one clock every process shares.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 burst: float,
+                 context: "BaseContext") -> None:
+        """Initialize a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            burst (float): Maximum number of tokens held at once.
+            context (BaseContext): Multiprocessing context of the
+            processes that will share the bucket.
+        """
+        self.rate = rate
+        self.burst = burst
+        self._lock = context.Lock()
+        # Balance and time of the last refill
+        self._state = context.RawArray("d", [burst, time.monotonic()])
+
+    def take(self) -> float:
+        """Take a token if one is available.
+
+        Returns:
+            float: 0.0 if a token was taken, otherwise the seconds until
+            one is available, to try again after.
+        """
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.burst,
+                         self._state[0] + (now - self._state[1]) * self.rate)
+            self._state[1] = now
+            if tokens >= 1.0 - TOKEN_TOLERANCE:
+                self._state[0] = tokens - 1.0
+                return 0.0
+            self._state[0] = tokens
+            return (1.0 - tokens) / self.rate
+
+
+class RateLimiter:
+    """Combination of a global bucket and a bucket per channel.
+
+    A command only goes out once both the global bucket and the bucket
+    of its channel have a token. The refill rates of all buckets are
+    scaled down whenever a rate limit is observed and ramped back up to
+    the configured rates with every command sent without one.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 burst: float,
+                 global_rate: float,
+                 global_burst: float,
+                 clock: Clock | None = None,
+                 shared: SharedTokenBucket | None = None) -> None:
+        """Initialize the limiter.
+
+        Args:
+            rate (float): Commands per second allowed in each channel.
+            burst (float): Commands allowed back to back in a channel.
+            global_rate (float): Commands per second allowed overall.
+            global_burst (float): Commands allowed back to back
+            overall.
+            clock (Clock | None, optional): Time source. Defaults to
+            None (use the clock of the session engine).
+            shared (SharedTokenBucket | None, optional): Bucket shared
+            with other processes, which every command also takes a token
+            from. Defaults to None (only limit this process).
+        """
+        self._clock = clock if clock is not None else get_clock()
+        self._rate = rate
+        self._burst = burst
+        self._global = TokenBucket(global_rate, global_burst, self._clock)
+        self._global_rate = global_rate
+        self._shared = shared
+        self._channels: dict[str, TokenBucket] = {}
+        self._factor = 1.0
+        self._blocked_until = 0.0
+        self._first: float | None = None
+        self._last = 0.0
+        self.acquired = 0
+        """Number of tokens handed out so far."""
+
+    @classmethod
+    def from_config(cls,
+                    options: dict[str, Any],
+                    clock: Clock | None = None,
+                    shared: SharedTokenBucket | None = None) -> "RateLimiter":
+        """Create the limiter from the validated rate-limit option."""
+        return cls(options["rolls-per-minute"] / 60,
+                   options["burst"],
+                   options["global-rolls-per-minute"] / 60,
+                   options["global-burst"],
+                   clock,
+                   shared)
+
+    def _bucket(self, channel: str) -> TokenBucket:
+        bucket = self._channels.get(channel)
+        if bucket is None:
+            bucket = TokenBucket(self._rate * self._factor, self._burst,
+                                 self._clock)
+            self._channels[channel] = bucket
+        return bucket
+
+    def _set_factor(self, factor: float) -> None:
+        # Refill at the old rate up to now before switching rates
+        for bucket in (self._global, *self._channels.values()):
+            bucket.delay()
+        self._factor = factor
+        self._global.rate = self._global_rate * factor
+        for bucket in self._channels.values():
+            bucket.rate = self._rate * factor
+
+    def delay(self, channel: str) -> float:
+        """Return the seconds until a command may go out in channel."""
+        blocked = self._blocked_until - self._clock.monotonic()
+        return max(blocked,
+                   self._global.delay(),
+                   self._bucket(channel).delay(),
+                   0.0)
+
+    def acquire(self, channel: str, paced: bool = False) -> float:
+        """Sleep until a command may go out in channel, then take it.
+
+        Args:
+            channel (str): Channel the command goes to.
+            paced (bool, optional): Whether something else paces the
+            command already, like the reply to the last one rendering.
+            Only observed rate limits and the shared bucket hold it off
+            then, and the buckets are drained without going negative, so
+            that the fixed pace resumes from this command if needed.
+            Defaults to False.
+
+        Raises:
+            SessionCancelled: The session was cancelled while sleeping.
+
+        Returns:
+            float: The number of seconds slept.
+        """
+        waited = 0.0
+        while (delay := self._wait_time(channel, paced)) > 0:
+            get_token().sleep(delay, self._clock)
+            waited += delay
+        self._take(channel, overdraw=not paced)
+        return waited
+
+    async def acquire_async(self, channel: str, paced: bool = False) -> float:
+        """Like acquire(), but suspends the current task instead of
+        blocking.
+
+        Raises:
+            SessionCancelled: The session was cancelled while sleeping.
+
+        Returns:
+            float: The number of seconds slept.
+        """
+        waited = 0.0
+        while (delay := self._wait_time(channel, paced)) > 0:
+            await get_token().asleep(delay, self._clock)
+            waited += delay
+        self._take(channel, overdraw=not paced)
+        return waited
+
+    def _wait_time(self, channel: str, paced: bool = False) -> float:
+        """Return the seconds to wait before trying to acquire again, or
+        0.0 once the shared bucket, if any, gave a token for channel.
+        """
+        if paced:
+            delay = max(self._blocked_until - self._clock.monotonic(), 0.0)
+        else:
+            delay = self.delay(channel)
+        if delay > 0 or self._shared is None:
+            return delay
+        # Taken as soon as available, since other processes want it too
+        return self._shared.take()
+
+    def _take(self, channel: str, overdraw: bool = True) -> None:
+        """Take a token from the buckets once they have one."""
+        self._global.consume(overdraw)
+        self._bucket(channel).consume(overdraw)
+
+        now = self._clock.monotonic()
+        if self._first is None:
+            self._first = now
+        self._last = now
+        self.acquired += 1
+
+    def on_rate_limit(self, retry_after: float = 0.0) -> None:
+        """Back off after being told that commands are too frequent.
+
+        Args:
+            retry_after (float, optional): Seconds to hold off all
+            commands for. Defaults to 0.0.
+        """
+        self._blocked_until = max(self._blocked_until,
+                                  self._clock.monotonic() + retry_after)
+        self._set_factor(max(self._factor * BACKOFF_FACTOR, MIN_RATE_FACTOR))
+
+    def on_success(self) -> None:
+        """Ramp back up after a command went out without issue."""
+        if self._factor < 1.0:
+            self._set_factor(min(self._factor + RAMP_STEP, 1.0))
+
+    def rolls_per_minute(self) -> float:
+        """Return the rate of commands achieved so far."""
+        if self._first is None or self._last <= self._first:
+            return 0.0
+        # n acquisitions span n - 1 intervals
+        return (self.acquired - 1) / (self._last - self._first) * 60
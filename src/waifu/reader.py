@@ -0,0 +1,264 @@
+"""
+reader.py
+18 October 2026 16:47:22
+
+Classify roll results from screen captures of the Discord message area.
+
+This module needs NumPy, an optional dependency installed with the
+reader extra: pip install waifu-roller[reader]
+"""
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import numpy as np
+
+from .backend import get_backend
+from .exceptions import ReaderError
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+Region = tuple[int, int, int, int]
+"""Screen area as (left, top, width, height) in pixels."""
+
+SIDEBAR_TOLERANCE = 24  # max difference per RGB channel of a sidebar pixel
+SIDEBAR_MIN_HEIGHT = 20  # pixels of a colour in one column to be a sidebar
+VARIANCE_EPSILON = 1e-3  # flat areas below this variance never match
+
+# ITU-R BT.601 luma weights for converting captures to grayscale
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+class Reading(NamedTuple):
+    """Classification of one capture of the message area."""
+    labels: frozenset[str]
+    """Names of the colours and templates found."""
+    scores: dict[str, float]
+    """Best score of every colour (sidebar height in pixels) and
+    template (normalized cross-correlation from -1 to 1)."""
+    latency: float
+    """Seconds spent classifying, not including the capture."""
+
+
+def _to_gray(frame: "NDArray[Any]") -> "NDArray[np.float64]":
+    """Convert an RGB(A) capture to a grayscale float image."""
+    return (frame[..., :3].astype(np.float32) @ GRAY_WEIGHTS).astype(
+        np.float64
+    )
+
+
+def _summed_area_table(image: "NDArray[np.float64]") -> "NDArray[np.float64]":
+    """Return the table of sums of image above and left of each pixel."""
+    table = np.zeros((image.shape[0] + 1, image.shape[1] + 1))
+    np.cumsum(np.cumsum(image, axis=0), axis=1, out=table[1:, 1:])
+    return table
+
+
+def _window_sums(table: "NDArray[np.float64]",
+                 height: int,
+                 width: int) -> "NDArray[np.float64]":
+    """Return the sum of every height by width window of an image from
+    its summed-area table, at a cost independent of the window size.
+    """
+    return (table[height:, width:] - table[:-height, width:]
+            - table[height:, :-width] + table[:-height, :-width])
+
+
+def _fft_size(length: int) -> int:
+    """Return the smallest length of at least length whose only prime
+    factors are 2, 3 and 5, which FFTs are much faster on.
+    """
+    best = 1 << (length - 1).bit_length()
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            # Smallest power of 2 taking power35 to at least length
+            size = power35
+            while size < length:
+                size *= 2
+            best = min(best, size)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+class _Frame:
+    """Grayscale capture with what every template match needs from it
+    computed once.
+    """
+
+    def __init__(self,
+                 frame: "NDArray[Any]",
+                 padded_shape: tuple[int, int]) -> None:
+        self.image = _to_gray(frame)
+        self.shape: tuple[int, int] = self.image.shape  # type: ignore
+        # Padded enough for the biggest template to not wrap around
+        self.padded_shape = (_fft_size(self.shape[0] + padded_shape[0]),
+                             _fft_size(self.shape[1] + padded_shape[1]))
+        self.spectrum = np.fft.rfft2(self.image, self.padded_shape)
+        self.sums = _summed_area_table(self.image)
+        self.squares = _summed_area_table(self.image ** 2)
+
+
+class _Template:
+    """Grayscale template prepared for normalized cross-correlation."""
+
+    def __init__(self, image: "NDArray[Any]") -> None:
+        gray = _to_gray(image)
+        self.shape: tuple[int, int] = gray.shape  # type: ignore
+        self._centered = gray - gray.mean()
+        self._norm = float(np.sqrt((self._centered ** 2).sum()))
+        # Spectrum of the flipped template for each padded frame shape
+        self._spectra: dict[tuple[int, int], "NDArray[Any]"] = {}
+
+    def _spectrum(self, shape: tuple[int, int]) -> "NDArray[Any]":
+        spectrum = self._spectra.get(shape)
+        if spectrum is None:
+            spectrum = np.fft.rfft2(self._centered[::-1, ::-1], shape)
+            self._spectra[shape] = spectrum
+        return spectrum
+
+    def match(self, frame: _Frame) -> float:
+        """Return the best normalized cross-correlation over frame.
+
+        The correlation of every position is computed at once with an
+        FFT, and the statistics of every window with summed-area
+        tables.
+        """
+        height, width = self.shape
+        if (frame.shape[0] < height or frame.shape[1] < width
+                or self._norm == 0):
+            return 0.0
+        products = np.fft.irfft2(frame.spectrum
+                                 * self._spectrum(frame.padded_shape),
+                                 frame.padded_shape)
+        # Keep the positions where the template fits entirely
+        products = products[height - 1:frame.shape[0],
+                            width - 1:frame.shape[1]]
+
+        area = height * width
+        sums = _window_sums(frame.sums, height, width)
+        variances = (_window_sums(frame.squares, height, width)
+                     - sums ** 2 / area)
+        valid = variances > VARIANCE_EPSILON * area
+        if not valid.any():
+            return 0.0
+        scores = products[valid] / (np.sqrt(variances[valid]) * self._norm)
+        return float(scores.max())
+
+
+def sidebar_height(frame: "NDArray[Any]",
+                   colour: tuple[int, int, int],
+                   tolerance: int = SIDEBAR_TOLERANCE) -> int:
+    """Return the most pixels of a colour found in any single column.
+
+    Embed sidebars are thin vertical strips of one colour, so a tall
+    column of it is a good sign of an embed of that colour.
+    """
+    difference = np.abs(frame[..., :3].astype(np.int16)
+                        - np.array(colour, dtype=np.int16))
+    matches = (difference <= tolerance).all(axis=-1)
+    return int(matches.sum(axis=0).max(initial=0))
+
+
+class Reader:
+    """Captures the message area and classifies the latest roll."""
+
+    def __init__(self,
+                 region: Region,
+                 colours: dict[str, tuple[int, int, int]],
+                 templates: dict[str, "NDArray[Any]"],
+                 threshold: float,
+                 pause_on: frozenset[str] = frozenset()) -> None:
+        """Initialize the reader.
+
+        Args:
+            region (Region): Screen area containing the latest message.
+            colours (dict[str, tuple[int, int, int]]): RGB colour of the
+            embed sidebar for each label.
+            templates (dict[str, NDArray]): Image of an icon, like the
+            claim heart, for each label.
+            threshold (float): Minimum correlation for a template to
+            count as found.
+            pause_on (frozenset[str], optional): Labels to pause the
+            session for when found. Defaults to an empty set.
+        """
+        self.region = region
+        self._colours = colours
+        self._templates = {label: _Template(image)
+                           for label, image in templates.items()}
+        self._padding = (max((t.shape[0] for t in self._templates.values()),
+                             default=0),
+                         max((t.shape[1] for t in self._templates.values()),
+                             default=0))
+        self._threshold = threshold
+        self.pause_on = pause_on
+        self.latencies: list[float] = []
+        """Classification time of every reading so far in seconds."""
+
+    @classmethod
+    def from_config(cls, options: dict[str, Any]) -> "Reader":
+        """Create the reader from the validated reader option.
+
+        Raises:
+            ReaderError: A template image could not be loaded.
+        """
+        # Pillow comes with PyAutoGUI (through PyScreeze)
+        from PIL import Image
+
+        templates = {}
+        for label, path in options["templates"].items():
+            try:
+                with Image.open(Path(path).expanduser()) as image:
+                    templates[label] = np.asarray(image.convert("RGB"))
+            except OSError as e:
+                raise ReaderError(
+                    f"Could not load the template image for {label!r} "
+                    f"from {path!r}"
+                ) from e
+        colours = {label: tuple(colour)
+                   for label, colour in options["colours"].items()}
+        return cls(tuple(options["region"]),  # type: ignore
+                   colours,  # type: ignore
+                   templates,
+                   options["threshold"],
+                   frozenset(options["pause-on"]))
+
+    def classify(self, frame: "NDArray[Any]") -> Reading:
+        """Find the configured colours and templates in a capture.
+
+        Args:
+            frame (NDArray): RGB(A) pixels with shape (height, width,
+            channels).
+        """
+        start = time.perf_counter()
+        labels: set[str] = set()
+        scores: dict[str, float] = {}
+        for label, colour in self._colours.items():
+            height = sidebar_height(frame, colour)
+            scores[label] = height
+            if height >= SIDEBAR_MIN_HEIGHT:
+                labels.add(label)
+        if self._templates:
+            prepared = _Frame(frame, self._padding)
+            for label, template in self._templates.items():
+                score = template.match(prepared)
+                scores[label] = score
+                if score >= self._threshold:
+                    labels.add(label)
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        return Reading(frozenset(labels), scores, latency)
+
+    def read(self) -> Reading:
+        """Capture the message area and classify it."""
+        return self.classify(get_backend().capture(self.region))
+
+    def mean_latency(self) -> float:
+        """Return the average classification time in seconds."""
+        if not self.latencies:
+            return 0.0
+        return sum(self.latencies) / len(self.latencies)
@@ -0,0 +1,190 @@
+"""
+scheduler.py
+18 October 2026 16:44:35
+
+Roll sessions on a fixed cadence from a single long-lived process.
+"""
+
+import heapq
+import itertools
+import math
+from datetime import datetime
+from typing import Any, Callable, NamedTuple
+
+import rich
+
+from .clock import Clock, get_clock
+from .exceptions import RollerError, SessionCancelled
+from .parser import SessionEntry
+
+SCHEDULE_POLL_INTERVAL = 60.0  # seconds slept at most before checking time
+FIRING_TOLERANCE = 0.001  # seconds early a firing still counts as due
+
+ROLLS = "rolls"
+"""Name of the cadence of the rolling sessions."""
+DAILY = "daily"
+"""Name of the cadence of the $daily and $dk commands."""
+
+
+class Cadence(NamedTuple):
+    """Recurring firing times, offset from the Unix epoch."""
+    name: str
+    interval: float  # seconds between firings
+    offset: float  # seconds
+
+    def next_after(self, timestamp: float) -> float:
+        """Return the first firing time strictly after timestamp."""
+        cycles = math.floor((timestamp - self.offset) / self.interval) + 1
+        return self.offset + cycles * self.interval
+
+
+class Scheduler:
+    """Timer firing any number of cadences, kept in a heap by due time.
+
+    Firing times are computed from the cadence instead of from the last
+    firing, so they don't drift however long the sessions take. Firings
+    missed while a session was running are coalesced into one late
+    firing, and cadences due at the same time fire together.
+    """
+
+    def __init__(self, clock: Clock | None = None) -> None:
+        """Initialize a scheduler with no cadences.
+
+        Args:
+            clock (Clock | None, optional): Time source. Defaults to
+            None (use the clock of the session engine).
+        """
+        self._clock = clock if clock is not None else get_clock()
+        self._heap: list[tuple[float, int, Cadence]] = []
+        # Tie breaker so that cadences are never compared
+        self._order = itertools.count()
+
+    def add(self, cadence: Cadence) -> None:
+        """Schedule the next firing of cadence after the current time."""
+        self._push(cadence, cadence.next_after(self._clock.time()))
+
+    def _push(self, cadence: Cadence, due: float) -> None:
+        heapq.heappush(self._heap, (due, next(self._order), cadence))
+
+    def next_due(self) -> float:
+        """Return the timestamp of the next firing.
+
+        Raises:
+            IndexError: No cadence was added.
+        """
+        return self._heap[0][0]
+
+    def wait(self) -> tuple[float, list[Cadence]]:
+        """Sleep until the next firing and reschedule what fired.
+
+        The clock is checked again at least every SCHEDULE_POLL_INTERVAL
+        so that wall clock adjustments and system sleep are caught up on.
+
+        Raises:
+            IndexError: No cadence was added.
+
+        Returns:
+            tuple[float, list[Cadence]]: The timestamp the firing was
+            due at and the cadences that fired, in the order added.
+        """
+        due = self.next_due()
+        while (remaining := due - self._clock.time()) > FIRING_TOLERANCE:
+            self._clock.sleep(min(remaining, SCHEDULE_POLL_INTERVAL))
+
+        now = max(self._clock.time(), due)
+        fired: list[Cadence] = []
+        while self._heap and self._heap[0][0] <= due + FIRING_TOLERANCE:
+            _, _, cadence = heapq.heappop(self._heap)
+            fired.append(cadence)
+            self._push(cadence, cadence.next_after(now))
+        return due, fired
+
+
+def cadences_from_config(options: dict[str, Any]) -> list[Cadence]:
+    """Create the cadences from the validated schedule option."""
+    cadences = [Cadence(ROLLS,
+                        options["interval-minutes"] * 60,
+                        options["offset-minutes"] * 60)]
+    if options["daily-interval-minutes"] > 0:
+        cadences.append(Cadence(DAILY,
+                                options["daily-interval-minutes"] * 60,
+                                options["daily-offset-minutes"] * 60))
+    return cadences
+
+
+def _entries_for(fired: list[Cadence],
+                 entries: list[SessionEntry]) -> list[SessionEntry]:
+    """Return the sessions to roll for a firing of the given cadences.
+
+    The daily commands only run on their own cadence, in the channel of
+    the first entry, without rolling if the rolls aren't due as well.
+    """
+    names = {cadence.name for cadence in fired}
+    sessions = ([entry._replace(daily=False) for entry in entries]
+                if ROLLS in names else [])
+    if DAILY in names and entries:
+        if sessions:
+            sessions[0] = sessions[0]._replace(daily=True)
+        else:
+            sessions = [entries[0]._replace(num=0, daily=True)]
+    return sessions
+
+
+def _format_timestamp(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def run_schedule(options: dict[str, Any],
+                 entries: list[SessionEntry],
+                 run: Callable[[list[SessionEntry]], None],
+                 verbose: bool,
+                 clock: Clock | None = None,
+                 firings: int | None = None) -> None:
+    """Roll the sessions every time the schedule fires.
+
+    Interface function to be called from main process. Errors of a
+    session are reported without stopping the schedule, and so is a
+    session cancelled with the abort key. Runs until interrupted with
+    ^C unless firings is given.
+
+    Args:
+        options (dict[str, Any]): The validated schedule option.
+        entries (list[SessionEntry]): Sessions to roll at each reset.
+        run (Callable[[list[SessionEntry]], None]): Rolls the sessions
+        due at a firing.
+        verbose (bool): Configuration preference.
+        clock (Clock | None, optional): Time source. Defaults to None
+        (use the clock of the session engine).
+        firings (int | None, optional): Number of firings to stop
+        after. Defaults to None (never stop).
+    """
+    clock = clock if clock is not None else get_clock()
+    scheduler = Scheduler(clock)
+    for cadence in cadences_from_config(options):
+        scheduler.add(cadence)
+
+    for _ in itertools.count() if firings is None else range(firings):
+        if scheduler.next_due() < clock.time():
+            rich.print("[yellow]Sessions ran past the next reset, "
+                       "rolling again right away.[/]")
+        else:
+            rich.print(
+                "[bright_black]Next session at "
+                f"{_format_timestamp(scheduler.next_due())}[/]"
+            )
+        due, fired = scheduler.wait()
+        late = clock.time() - due
+        if verbose:
+            rich.print(
+                f"[bright_black]Firing {', '.join(c.name for c in fired)} "
+                f"({late:.3f} s late)[/]"
+            )
+        try:
+            run(_entries_for(fired, entries))
+        # A SystemExit, which would stop the schedule along with the session
+        except SessionCancelled:
+            rich.print("[yellow]Session aborted, waiting for the next "
+                       "one.[/]")
+        except RollerError as e:
+            rich.print(f"[bold red]{type(e).__name__}:[/] {e}")
+            rich.print("[yellow]Skipping to the next session.[/]")
@@ -0,0 +1,140 @@
+"""
+simulate.py
+18 October 2026 17:17:25
+
+Dry run of whole sessions against a headless backend and virtual clock.
+
+Every key press and text entry goes to a RecordingBackend instead of the
+desktop, and every sleep (cooldowns, rate limiting, pacing, reverting)
+advances a VirtualClock instead of waiting. The session runs through
+the same engine as a real one, so the timeline it records is the one a
+real run would follow, minus Discord's own lag, in a fraction of the
+time.
+"""
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import rich
+from rich.table import Table
+
+from . import core
+from .backend import RecordingBackend, set_backend
+from .clock import VirtualClock, set_clock
+from .trace import Span, TraceRecorder, TracingBackend, set_tracer
+
+if TYPE_CHECKING:
+    from .config import ConfigDict
+    from .parser import SessionEntry
+
+SIMULATED_WINDOWS = ("Terminal", "Friends - Discord")
+"""Titles of the windows of the simulated desktop, focused first. Discord
+starts out in no channel, so that every session navigates."""
+
+TIMELINE_PHASES = frozenset({"open_discord", "navigate_to_channel",
+                             "start_rolling", "revert_window"})
+"""Spans shown in the timeline, the ones happening once per session."""
+
+
+def _format_offset(seconds: float) -> str:
+    """Return seconds as minutes and seconds, e.g. 1:02.500."""
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}:{seconds:06.3f}"
+
+
+def _timeline(spans: list[Span]) -> Table:
+    """Return the table of the session phases among the spans."""
+    table = Table(title="Projected timeline")
+    table.add_column("At", justify="right")
+    table.add_column("Phase")
+    table.add_column("Took", justify="right")
+    table.add_column("Commands", justify="right")
+    phases = sorted((span for span in spans
+                     if span.category == "core"
+                     and span.name in TIMELINE_PHASES),
+                    key=lambda span: span.start)
+    sends = [span.start for span in spans if span.name == "send"]
+    for phase in phases:
+        # Other phases can start right as a command is sent, not send any
+        sent = 0
+        if phase.name == "start_rolling":
+            end = phase.start + phase.duration
+            sent = sum(1 for start in sends if phase.start <= start <= end)
+        table.add_row(_format_offset(phase.start), phase.name,
+                      _format_offset(phase.duration),
+                      str(sent) if sent else "")
+    return table
+
+
+def run_simulation(config: "ConfigDict",
+                   entries: "list[SessionEntry]",
+                   trace: Path | None = None,
+                   macro: "list[dict[str, Any]] | None" = None) -> None:
+    """Roll the sessions headlessly on a virtual clock and print the
+    projected timeline and duration.
+
+    Interface function to be called from main process. Commands always
+    go through the GUI transport, and nothing is journaled, stored in
+    the history or written to the metrics textfile.
+
+    Args:
+        config (ConfigDict): The loaded configuration.
+        entries (list[SessionEntry]): Sessions to roll in order.
+        trace (Path | None, optional): File to write the simulated
+        trace to, timed on the virtual clock. Defaults to None (don't
+        write it).
+        macro (list[dict[str, Any]] | None, optional): Validated steps
+        of the macro to roll every session with. Defaults to None (roll
+        num-rolls times).
+    """
+    from .engine import run_plan
+    from .main import build_reading
+    from .ratelimit import RateLimiter
+
+    if config["transport"]["mode"] == "http":
+        rich.print("[yellow]Simulating the gui transport, the http "
+                   "transport isn't simulated.[/]")
+
+    backend = RecordingBackend(*SIMULATED_WINDOWS)
+    clock = VirtualClock(start=time.time())
+    start = clock.monotonic()
+    recorder = TraceRecorder(clock)
+    set_backend(TracingBackend(backend, recorder))
+    set_clock(clock)
+    set_tracer(recorder)
+    # The windows of the real desktop must not leak into the simulation
+    core._WindowRegistry.invalidate()
+    real_start = time.perf_counter()
+    try:
+        # Created on the virtual clock, which they keep a hold of
+        limiter = RateLimiter.from_config(config["rate-limit"])
+        reader, pacer = build_reading(config)
+        core.run_manifest(entries,
+                          config["verbose"],
+                          config["revert-window"],
+                          config["text-injection"],
+                          limiter=limiter,
+                          verify=config["verify-navigation"],
+                          reader=reader,
+                          pacer=pacer,
+                          macro=macro,
+                          runner=run_plan)
+    finally:
+        real_elapsed = time.perf_counter() - real_start
+        set_tracer(None)
+        set_backend(None)
+        set_clock(None)
+        core._WindowRegistry.invalidate()
+
+    rich.print(_timeline(recorder.spans))
+    sent = sum(1 for span in recorder.spans if span.name == "send")
+    elapsed = clock.monotonic() - start
+    rate = sent / elapsed * 60 if elapsed else 0.0
+    rich.print(f"[green]Projected duration: {_format_offset(elapsed)} for "
+               f"{sent} commands ({rate:.1f} per minute), simulated in "
+               f"{real_elapsed * 1000:.1f} ms.[/]")
+    if trace is not None:
+        recorder.export(trace)
+        rich.print(f"[bright_black]Wrote {len(recorder.spans)} simulated "
+                   f"spans to {trace}[/]")
@@ -0,0 +1,199 @@
+"""
+trace.py
+18 October 2026 16:51:15
+
+Record spans of time taken by each action of a rolling session.
+
+Tracing is off unless a TraceRecorder is installed with set_tracer(),
+and the default NullTracer does next to nothing per span.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, ContextManager, NamedTuple, Protocol
+
+from .backend import Backend
+from .clock import Clock
+
+
+class Span(NamedTuple):
+    """A named stretch of time spent on one thread."""
+    name: str
+    category: str
+    start: float
+    """Seconds since the recorder was created."""
+    duration: float
+    """Seconds."""
+    thread: int
+    args: dict[str, Any]
+
+
+class Tracer(Protocol):
+    """Interface of a sink for spans."""
+
+    def span(self, name: str, category: str = "core",
+             **args: Any) -> ContextManager[None]:
+        """Return a context manager timing the code it wraps."""
+        ...
+
+
+class _NullSpan:
+    """Reusable context manager that does nothing."""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+class NullTracer:
+    """Tracer used while tracing is off, discarding everything."""
+
+    _span = _NullSpan()
+
+    def span(self, name: str, category: str = "core",
+             **args: Any) -> ContextManager[None]:
+        # The same instance every time, so nothing is allocated
+        return self._span
+
+
+class _RecordingSpan:
+    """Context manager adding a span to a TraceRecorder upon exit."""
+
+    def __init__(self,
+                 recorder: "TraceRecorder",
+                 name: str,
+                 category: str,
+                 args: dict[str, Any]) -> None:
+        self._recorder = recorder
+        self._name = name
+        self._category = category
+        self._args = args
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = self._recorder.now()
+
+    def __exit__(self, exc_type: type | None, *_: Any) -> None:
+        end = self._recorder.now()
+        if exc_type is not None:
+            self._args["error"] = exc_type.__name__
+        self._recorder.add(Span(self._name,
+                                self._category,
+                                self._start - self._recorder.origin,
+                                end - self._start,
+                                threading.get_ident(),
+                                self._args))
+
+
+class TraceRecorder:
+    """Tracer keeping every span in memory until exported."""
+
+    def __init__(self, clock: Clock | None = None) -> None:
+        """Initialize the recorder.
+
+        Args:
+            clock (Clock | None, optional): Time source of the spans.
+            Defaults to None (time.perf_counter(), the most precise).
+        """
+        self.now: Callable[[], float] = \
+            clock.monotonic if clock is not None else time.perf_counter
+        """Return the current time of the spans."""
+        self.origin = self.now()
+        """now() value that span start times are relative to."""
+        self.spans: list[Span] = []
+        """Finished spans, in the order they ended."""
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str = "core",
+             **args: Any) -> ContextManager[None]:
+        return _RecordingSpan(self, name, category, args)
+
+    def add(self, span: Span) -> None:
+        """Record a finished span. Safe to call from any thread."""
+        with self._lock:
+            self.spans.append(span)
+
+    def export(self, path: Path) -> None:
+        """Write the spans to path, in the Chrome trace event format if
+        it ends in .json (for chrome://tracing or Perfetto) and as JSON
+        Lines otherwise.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start)
+        with open(path, "wt", encoding="utf-8") as fp:
+            if path.suffix.lower() == ".json":
+                json.dump(_chrome_trace(spans), fp)
+                return
+            for span in spans:
+                fp.write(json.dumps(span._asdict()) + "\n")
+
+
+def _chrome_trace(spans: list[Span]) -> dict[str, Any]:
+    """Convert spans to complete events of the Chrome trace format."""
+    pid = os.getpid()
+    events = [{"name": span.name,
+               "cat": span.category,
+               "ph": "X",
+               "ts": span.start * 1e6,
+               "dur": span.duration * 1e6,
+               "pid": pid,
+               "tid": span.thread,
+               "args": span.args}
+              for span in spans]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+class TracingBackend:
+    """Backend wrapper recording a span for every call to another."""
+
+    def __init__(self, backend: Backend, tracer: Tracer) -> None:
+        self.wrapped = backend
+        """The backend the calls are forwarded to."""
+        self._tracer = tracer
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.wrapped, name)
+        if not callable(attr):
+            return attr
+        tracer = self._tracer
+
+        def traced(*args: Any, **kwargs: Any) -> Any:
+            with tracer.span(name, "backend"):
+                return attr(*args, **kwargs)
+        return traced
+
+
+class _Current:
+    """Global holder of the tracer used by the session engine."""
+    tracer: Tracer = NullTracer()
+
+
+def get_tracer() -> Tracer:
+    """Return the tracer in use, NullTracer unless replaced."""
+    return _Current.tracer
+
+
+def set_tracer(tracer: Tracer | None) -> None:
+    """Replace the tracer in use.
+
+    Args:
+        tracer (Tracer | None): The new tracer. None turns tracing off.
+    """
+    _Current.tracer = tracer if tracer is not None else NullTracer()
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator recording a span named name for every call."""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with _Current.tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
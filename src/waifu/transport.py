@@ -0,0 +1,316 @@
+"""
+transport.py
+18 October 2026 13:40:05
+
+Ways of delivering Mudae commands to a channel.
+"""
+
+import json
+import queue
+import time
+from typing import TYPE_CHECKING, Any, Callable, Protocol
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import http.client
+
+from .cancel import get_token
+from .clock import SystemClock
+from .exceptions import TransportError
+from .inject import inject_text
+
+TRANSPORT_MODES = ("gui", "http")
+"""Valid values for the transport.mode configuration option."""
+
+HTTP_TIMEOUT = 10.0  # seconds to wait on the server before giving up
+HTTP_MAX_RETRIES = 5  # attempts per message before giving up
+HTTP_POOL_SIZE = 2  # keep-alive connections kept open at once
+REPLY_POLL_INTERVAL = 0.25  # seconds between checks for a reply
+
+# The server's rate limits and replies run on real time, whatever the clock
+# of the session engine
+_REAL_CLOCK = SystemClock()
+
+
+class Transport(Protocol):
+    """Interface of a way to send messages to the target channel."""
+
+    requires_focus: bool
+    """Whether sending needs the Discord window to be focused."""
+
+    def send(self, content: str) -> None:
+        """Send content as a message to the target channel."""
+        ...
+
+
+class GUITransport:
+    """Send messages by typing into the focused Discord window."""
+
+    requires_focus = True
+
+    def __init__(self, injection: str) -> None:
+        """Initialize the transport.
+
+        Args:
+            injection (str): Configuration preference.
+        """
+        self._injection = injection
+
+    def send(self, content: str) -> None:
+        inject_text(content + "\n", self._injection)
+
+
+class _ConnectionPool:
+    """Thread-safe pool of persistent connections to a single host."""
+
+    def __init__(self, base_url: str, size: int) -> None:
+        # Imported here to keep it off the startup path of the GUI mode
+        import http.client
+
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise TransportError(
+                f"{base_url!r} is not a valid HTTP(S) API base URL"
+            )
+        self._connection_class = (http.client.HTTPSConnection
+                                  if parts.scheme == "https"
+                                  else http.client.HTTPConnection)
+        self._host = parts.hostname
+        self._port = parts.port
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = \
+            queue.LifoQueue(maxsize=size)
+        self.errors = (OSError, http.client.HTTPException)
+        """Exceptions of request() meaning the server couldn't be talked
+        to, like a refused connection or a truncated response.
+        """
+
+    def _connect(self) -> "http.client.HTTPConnection":
+        return self._connection_class(self._host, self._port,
+                                      timeout=HTTP_TIMEOUT)
+
+    def request(self,
+                method: str,
+                path: str,
+                body: bytes | None,
+                headers: dict[str, str]
+                ) -> tuple[int, dict[str, str], bytes]:
+        """Make a request over an idle connection, opening one if none.
+
+        A connection that the server closed while idle is replaced once
+        before giving up.
+
+        Returns:
+            tuple[int, dict[str, str], bytes]: The response status,
+            headers (with lowercased names), and body.
+        """
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = self._connect()
+            reused = False
+
+        try:
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            data = response.read()
+        except ConnectionError:  # Includes http.client.RemoteDisconnected
+            conn.close()
+            if not reused:
+                raise
+            # Stale keep-alive connection, retry on a fresh one
+            conn = self._connect()
+            try:
+                conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except self.errors:
+                conn.close()
+                raise
+        except self.errors:
+            # E.g. http.client.IncompleteRead, the connection is unusable
+            conn.close()
+            raise
+
+        response_headers = {name.lower(): value
+                            for name, value in response.getheaders()}
+        if response.will_close:
+            conn.close()
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return response.status, response_headers, data
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class HTTPTransport:
+    """Send messages through a Discord-compatible HTTP API.
+
+    Connections are kept alive and reused between messages, and rate
+    limit responses (HTTP 429) are waited out before retrying.
+    """
+
+    requires_focus = False
+
+    def __init__(self,
+                 api_base: str,
+                 token: str,
+                 channel_id: str,
+                 pool_size: int = HTTP_POOL_SIZE) -> None:
+        """Initialize the transport. No connection is made yet.
+
+        Args:
+            api_base (str): Base URL of the API, e.g.
+            "https://discord.com/api/v10".
+            token (str): Value of the Authorization header.
+            channel_id (str): ID of the channel to send messages to.
+            pool_size (int, optional): Maximum number of idle
+            connections to keep open. Defaults to HTTP_POOL_SIZE.
+
+        Raises:
+            TransportError: api_base is not an HTTP(S) URL.
+        """
+        self._pool = _ConnectionPool(api_base, pool_size)
+        self._path = (urlsplit(api_base).path.rstrip("/") +
+                      f"/channels/{channel_id}/messages")
+        self._headers = {
+            "Authorization": token,
+            "Content-Type": "application/json",
+            "User-Agent": "waifu-roller",
+        }
+        self.on_rate_limit: Callable[[float], None] | None = None
+        """Called with the delay in seconds upon every HTTP 429."""
+        self.sent = 0
+        """Number of messages delivered so far."""
+        self.busy_time = 0.0
+        """Seconds spent inside send() so far."""
+        # The last message sent, to find the reply to it
+        self._last_message: dict[str, Any] | None = None
+
+    @classmethod
+    def from_config(cls, options: dict[str, Any]) -> "HTTPTransport":
+        """Create the transport from the validated transport option."""
+        return cls(options["api-base"],
+                   options["token"],
+                   str(options["channel-id"]))
+
+    @staticmethod
+    def _retry_after(headers: dict[str, str], data: bytes) -> float:
+        """Return the delay requested by a rate limit response."""
+        try:
+            return float(headers["retry-after"])
+        except (KeyError, ValueError):
+            pass
+        # Discord also includes a more precise value in the body
+        try:
+            return float(json.loads(data)["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return 1.0
+
+    def send(self, content: str) -> None:
+        """Send content as a message to the channel.
+
+        Raises:
+            TransportError: The server rejected the message or kept
+            rate limiting it.
+            SessionCancelled: The session was cancelled while waiting
+            out a rate limit.
+        """
+        start = time.perf_counter()
+        body = json.dumps({"content": content}).encode()
+        try:
+            for _ in range(HTTP_MAX_RETRIES):
+                try:
+                    status, headers, data = self._pool.request(
+                        "POST", self._path, body, self._headers
+                    )
+                except self._pool.errors as e:
+                    raise TransportError(
+                        f"Could not reach the API to send {content!r}"
+                    ) from e
+                if status == 429:
+                    delay = self._retry_after(headers, data)
+                    if self.on_rate_limit is not None:
+                        self.on_rate_limit(delay)
+                    get_token().sleep(delay, _REAL_CLOCK)
+                    continue
+                if not 200 <= status < 300:
+                    raise TransportError(
+                        f"API responded with HTTP {status} to {content!r}: "
+                        f"{data[:200].decode(errors='replace')}"
+                    )
+                self.sent += 1
+                try:
+                    self._last_message = json.loads(data)
+                except ValueError:
+                    self._last_message = None
+                return
+            raise TransportError(
+                f"Gave up sending {content!r} after being rate limited "
+                f"{HTTP_MAX_RETRIES} times"
+            )
+        finally:
+            self.busy_time += time.perf_counter() - start
+
+    def fetch_reply(self, timeout: float) -> dict[str, Any] | None:
+        """Return the first message from someone else after the last
+        message sent, waiting up to timeout seconds for it.
+
+        Returns:
+            dict[str, Any] | None: The reply as returned by the API, see
+            message_text(), or None if there was no reply in time or it
+            could not be fetched.
+        """
+        last = self._last_message
+        if not isinstance(last, dict) or "id" not in last:
+            return None
+        author = (last.get("author") or {}).get("id")
+        path = f"{self._path}?after={last['id']}&limit=5"
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                status, _, data = self._pool.request("GET", path, None,
+                                                     self._headers)
+                messages = json.loads(data) if 200 <= status < 300 else []
+            except (*self._pool.errors, ValueError):
+                return None
+            # A list of messages, newest first, unless the API answered
+            # with something else like an error object
+            if not isinstance(messages, list):
+                return None
+            for message in reversed(messages):
+                if (isinstance(message, dict) and
+                        (message.get("author") or {}).get("id") != author):
+                    return message
+            if time.monotonic() >= deadline:
+                return None
+            get_token().sleep(REPLY_POLL_INTERVAL, _REAL_CLOCK)
+
+    def messages_per_second(self) -> float:
+        """Return the throughput achieved by send() so far."""
+        return self.sent / self.busy_time if self.busy_time else 0.0
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self._pool.close()
+
+
+def message_text(message: dict[str, Any]) -> str:
+    """Return the content of a message and the text of its embeds, where
+    Mudae puts the character and series of a roll.
+    """
+    parts = [message.get("content") or ""]
+    for embed in message.get("embeds") or []:
+        parts.append((embed.get("author") or {}).get("name") or "")
+        parts.append(embed.get("title") or "")
+        parts.append(embed.get("description") or "")
+    return "\n".join(part for part in parts if part)
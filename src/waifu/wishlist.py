@@ -0,0 +1,267 @@
+"""
+wishlist.py
+18 October 2026 17:02:24
+
+Find the names of a wishlist in the text of roll results.
+
+The names are compiled into an Aho-Corasick automaton, which finds every
+name in a text in one pass over it, however many names there are. Names
+and text are normalized first so that case, accents and punctuation
+don't matter. The compiled automaton is cached on disk, since compiling
+a big wishlist takes longer than loading it.
+"""
+
+import hashlib
+import marshal
+import os
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import Any, Iterable
+
+from .exceptions import WishlistError, get_user_config_path
+
+ALIAS_SEPARATOR = "|"
+"""Separates the aliases of a name on one line of a wishlist file."""
+
+CACHE_SUFFIX = ".cache"
+"""Suffix of the compiled automaton cached next to config.yaml."""
+
+# Bumped whenever the compiled form changes
+_CACHE_FORMAT = 1
+
+
+def normalize(text: str) -> str:
+    """Return text folded for matching.
+
+    Case and accents are dropped (é becomes e), and every run of
+    characters other than letters and digits becomes one space. The
+    result starts and ends with a space, so that names padded the same
+    way only match whole words.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    folded = []
+    space = True
+    for char in decomposed:
+        if char.isalnum():
+            folded.append(char)
+            space = False
+        elif not space and not unicodedata.combining(char):
+            folded.append(" ")
+            space = True
+    if not space:
+        folded.append(" ")
+    return " " + "".join(folded)
+
+
+class Automaton:
+    """Aho-Corasick automaton over normalized names."""
+
+    def __init__(self,
+                 goto: list[dict[str, int]],
+                 fail: list[int],
+                 outputs: dict[int, tuple[int, ...]],
+                 names: list[str]) -> None:
+        """Initialize the automaton from its tables, see compile().
+
+        Args:
+            goto (list[dict[str, int]]): Transitions of every state of
+            the trie of patterns.
+            fail (list[int]): State to fall back to from every state
+            upon a character it has no transition for.
+            outputs (dict[int, tuple[int, ...]]): Names whose pattern
+            ends at each state, including through fail links, for the
+            states where any does.
+            names (list[str]): Name reported for every output index.
+        """
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+        self.names = names
+
+    @classmethod
+    def compile(cls, entries: Iterable[tuple[str, str]]) -> "Automaton":
+        """Build the automaton.
+
+        Args:
+            entries (Iterable[tuple[str, str]]): Pairs of a pattern (a
+            name or an alias) and the name to report for it.
+        """
+        goto: list[dict[str, int]] = [{}]
+        outputs: dict[int, set[int]] = {}
+        names: list[str] = []
+        indices: dict[str, int] = {}
+        for pattern, name in entries:
+            folded = normalize(pattern)
+            if folded == " ":
+                continue
+            index = indices.setdefault(name, len(names))
+            if index == len(names):
+                names.append(name)
+            state = 0
+            for char in folded:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                state = next_state
+            outputs.setdefault(state, set()).add(index)
+
+        # Breadth first, so that fail links point to finished states
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                # Shorter patterns ending here are found through the link
+                inherited = outputs.get(fail[next_state])
+                if inherited:
+                    outputs.setdefault(next_state, set()).update(inherited)
+        return cls(goto, fail,
+                   {state: tuple(sorted(output))
+                    for state, output in outputs.items()},
+                   names)
+
+    def find(self, text: str) -> list[str]:
+        """Return the names found in text, in order of appearance.
+
+        Takes time linear in the length of text (plus the matches),
+        independent of the number of names.
+        """
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        found: dict[int, None] = {}
+        state = 0
+        for char in normalize(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if state in outputs:
+                for index in outputs[state]:
+                    found[index] = None
+        return [self.names[index] for index in found]
+
+    def dumps(self) -> bytes:
+        """Return the automaton serialized for loads()."""
+        return marshal.dumps((self._goto, self._fail, self._outputs,
+                              self.names))
+
+    @classmethod
+    def loads(cls, data: bytes) -> "Automaton":
+        """Deserialize an automaton returned by dumps().
+
+        Raises:
+            ValueError: data is not a serialized automaton.
+        """
+        try:
+            goto, fail, outputs, names = marshal.loads(data)
+        except (EOFError, TypeError) as e:
+            raise ValueError("Not a serialized automaton") from e
+        return cls(goto, fail, outputs, names)
+
+
+def parse_entries(lines: Iterable[str]) -> list[tuple[str, str]]:
+    """Return (pattern, name) pairs from wishlist lines.
+
+    Every line holds a name, optionally followed by its aliases, all
+    separated by ALIAS_SEPARATOR. Blank lines and lines starting with #
+    are skipped.
+    """
+    entries = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        aliases = [alias.strip() for alias in line.split(ALIAS_SEPARATOR)]
+        entries.extend((alias, aliases[0]) for alias in aliases if alias)
+    return entries
+
+
+def _read_lines(options: dict[str, Any]) -> list[str]:
+    """Return the wishlist lines of the validated wishlist option.
+
+    Raises:
+        WishlistError: A wishlist file could not be read.
+    """
+    lines = list(options["names"])
+    for path in options["files"]:
+        try:
+            lines.extend(Path(path).expanduser()
+                         .read_text(encoding="utf-8").splitlines())
+        except (OSError, UnicodeDecodeError) as e:
+            raise WishlistError(
+                f"Could not read the wishlist file {path!r}: {e}"
+            ) from e
+    return lines
+
+
+def get_cache_path() -> Path:
+    """Return the path to the cached automaton, next to config.yaml."""
+    return get_user_config_path().parent / f"wishlist{CACHE_SUFFIX}"
+
+
+def load_automaton(lines: list[str], cache_path: Path) -> Automaton:
+    """Return the automaton of wishlist lines, from the cache if they
+    didn't change since it was written.
+
+    Args:
+        lines (list[str]): Lines of the wishlist, see parse_entries().
+        cache_path (Path): Where to cache the automaton.
+    """
+    digest = hashlib.blake2b("\n".join(lines).encode(),
+                             digest_size=16).digest()
+    key = marshal.dumps((_CACHE_FORMAT, digest))
+
+    try:
+        data = cache_path.read_bytes()
+        if data.startswith(key):
+            return Automaton.loads(data[len(key):])
+    except (OSError, ValueError):
+        pass  # Missing or corrupt, compile it again
+
+    automaton = Automaton.compile(parse_entries(lines))
+    # Written atomically so that a crash never leaves a torn cache behind
+    temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        temp_path.write_bytes(key + automaton.dumps())
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass  # Caching is only an optimization
+    return automaton
+
+
+class Wishlist:
+    """Names to look for in the reply to every roll."""
+
+    def __init__(self, automaton: Automaton, reply_timeout: float) -> None:
+        """Initialize the wishlist.
+
+        Args:
+            automaton (Automaton): The compiled names.
+            reply_timeout (float): Seconds to wait for the reply to a
+            roll before giving up on checking it.
+        """
+        self.automaton = automaton
+        self.reply_timeout = reply_timeout
+
+    @classmethod
+    def from_config(cls, options: dict[str, Any]) -> "Wishlist":
+        """Create the wishlist from the validated wishlist option.
+
+        Raises:
+            WishlistError: A wishlist file could not be read.
+        """
+        return cls(load_automaton(_read_lines(options), get_cache_path()),
+                   options["reply-timeout"])
+
+    def find(self, text: str) -> list[str]:
+        """Return the names found in text, see Automaton.find()."""
+        return self.automaton.find(text)
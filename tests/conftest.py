@@ -0,0 +1,99 @@
+"""conftest.py
+
+Fixtures shared by the tests. Sessions run headlessly against a
+RecordingBackend, and the global state of the session engine is reset
+around every test.
+"""
+
+import importlib.util
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Iterator, NamedTuple
+
+import pytest
+
+from waifu import core
+from waifu.backend import RecordingBackend, set_backend
+from waifu.clock import VirtualClock, set_clock
+from waifu.trace import set_tracer
+
+DISCORD_TITLE = "#lobby | Test Server - Discord"
+"""Title of the simulated Discord window, in a channel of its own."""
+
+
+@pytest.fixture(autouse=True)
+def reset_engine() -> Iterator[None]:
+    """Leave no backend, clock, tracer, cached window or pause behind."""
+    yield
+    set_backend(None)
+    set_clock(None)
+    set_tracer(None)
+    core._WindowRegistry.invalidate()
+    core._Pauser.resume()
+    core._Pauser._registered = None
+
+
+@pytest.fixture
+def backend() -> RecordingBackend:
+    """Return the backend in use, with Discord focused and a terminal
+    behind it.
+    """
+    backend = RecordingBackend(DISCORD_TITLE, "Terminal")
+    set_backend(backend)
+    return backend
+
+
+@pytest.fixture
+def clock() -> VirtualClock:
+    """Return the clock in use, a virtual one starting at 0."""
+    clock = VirtualClock()
+    set_clock(clock)
+    return clock
+
+
+class FakeAPI(NamedTuple):
+    """A running scripts/fake_api.py server."""
+    api_base: str
+    """Base URL to point the http transport at."""
+    stats: Any
+    """The fake_api.Stats of the messages it received."""
+
+
+def _load_script(name: str) -> ModuleType:
+    """Import a script of the scripts directory by file name."""
+    path = Path(__file__).parents[1] / "scripts" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(name, path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _join_timers() -> None:
+    """Wait for the work left to timer threads, like undoing a cancelled
+    paste, see inject._paste.
+    """
+    for thread in threading.enumerate():
+        if isinstance(thread, threading.Timer):
+            thread.join()
+
+
+@pytest.fixture
+def fake_api() -> Iterator[FakeAPI]:
+    """Serve the stand-in message endpoint on a free local port. Set
+    stats.limit to rate limit every token.
+    """
+    script = _load_script("fake_api")
+    stats = script.Stats(None)
+    server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                 script.make_handler(stats))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield FakeAPI(f"http://127.0.0.1:{server.server_port}/api", stats)
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,161 @@
+"""make_fixtures.py
+
+Script to draw the fixture screenshots of the reader tests: frames of
+the Discord message area after a roll, the icon templates to look for,
+and labels.json with what every frame shows. The frames are drawn like
+the dark theme of the desktop app, with a Mudae embed whose sidebar is
+coloured by claim status and reactions below it, and the icons are
+drawn at subpixel offsets so that they never match their template
+exactly.
+
+The output is committed, run this again after changing it:
+
+    python tests/fixtures/reader/make_fixtures.py
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+HERE = Path(__file__).parent
+SEED = 2026
+FRAMES = 24
+WIDTH, HEIGHT = 480, 260
+ICON = 18  # pixels of an icon
+SUPERSAMPLE = 4  # icons are drawn this many times bigger, then scaled down
+
+BACKGROUND = (49, 51, 56)
+EMBED = (43, 45, 49)
+REACTION = (60, 62, 69)
+TEXT = (219, 222, 225)
+
+COLOURS = {
+    "unclaimed": (255, 156, 44),
+    "claimed": (237, 66, 69),
+}
+"""Sidebar colour of each claim status, as in the reader config."""
+
+
+def _heart(x, y):
+    x, y = x * 1.3, -y * 1.3 + 0.25
+    return (x ** 2 + y ** 2 - 1) ** 3 - x ** 2 * y ** 3 <= 0
+
+
+def _kakera(x, y):
+    return np.abs(x) * 1.4 + np.abs(y) <= 0.95
+
+
+def _star(x, y):
+    angle = np.arctan2(y, x)
+    radius = np.hypot(x, y)
+    return radius <= 0.5 + 0.4 * np.cos(5 * angle) ** 2
+
+
+ICONS = {
+    "heart": (_heart, (221, 46, 68)),
+    "kakera": (_kakera, (150, 110, 255)),
+    # Decoy icon that no template should match
+    "star": (_star, (255, 204, 77)),
+}
+
+
+def draw_icon(name, background, dx=0.0, dy=0.0):
+    """Return an ICON sized RGB icon on background, shifted by a
+    fraction of a pixel.
+    """
+    shape, colour = ICONS[name]
+    size = ICON * SUPERSAMPLE
+    axis = (np.arange(size) + 0.5) / size * 2 - 1
+    x = axis[None, :] - dx * 2 / ICON
+    y = axis[:, None] - dy * 2 / ICON
+    mask = shape(x, y).astype(np.float64)
+    coverage = mask.reshape(ICON, SUPERSAMPLE, ICON, SUPERSAMPLE)
+    coverage = coverage.mean(axis=(1, 3))[..., None]
+    icon = (np.array(colour) * coverage
+            + np.array(background) * (1 - coverage))
+    return icon.round().astype(np.uint8)
+
+
+def draw_text(frame, rng, left, top, width, lines):
+    """Draw lines of words as light blocks, like text from afar."""
+    for line in range(lines):
+        x = left
+        y = top + line * 14
+        end = left + rng.integers(width // 2, width)
+        while x < end:
+            word = int(rng.integers(10, 40))
+            frame[y:y + 8, x:min(x + word, end)] = TEXT
+            x += word + 5
+
+
+def draw_frame(rng):
+    """Return a random frame and the labels it should be read as."""
+    frame = np.empty((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    frame[:] = BACKGROUND
+    labels = set()
+    # Avatar and name of Mudae, then the embed of the roll
+    ys, xs = np.ogrid[:HEIGHT, :WIDTH]
+    avatar = (ys - 28) ** 2 + (xs - 30) ** 2 <= 18 ** 2
+    frame[avatar] = rng.integers(60, 200, 3)
+    draw_text(frame, rng, 64, 12, 120, 1)
+
+    status = rng.choice(["unclaimed", "claimed", None])
+    left = 64 + int(rng.integers(0, 12))
+    top = 34
+    height = int(rng.integers(150, 180))
+    if status is None:
+        # Plain message, like the reply to $daily
+        draw_text(frame, rng, left, top, 360, 3)
+    else:
+        labels.add(str(status))
+        frame[top:top + height, left:left + 320] = EMBED
+        frame[top:top + height, left:left + 4] = COLOURS[status]
+        draw_text(frame, rng, left + 14, top + 12, 180, 4)
+        # Picture of the character
+        picture = rng.integers(0, 256, (1, 1, 3)) * np.linspace(
+            0.4, 1.0, 120
+        )[:, None, None]
+        frame[top + 12:top + 132, left + 210:left + 300] = \
+            picture[:, :90].astype(np.uint8)
+
+    # Reactions under the message
+    x = left
+    y = top + height + 8
+    for name in ICONS:
+        if rng.random() < 0.5:
+            continue
+        frame[y:y + ICON + 6, x:x + ICON + 24] = REACTION
+        icon = draw_icon(name, REACTION, *rng.uniform(-0.5, 0.5, 2))
+        frame[y + 3:y + 3 + ICON, x + 4:x + 4 + ICON] = icon
+        draw_text(frame, rng, x + ICON + 8, y + 8, 12, 1)
+        if name != "star":
+            labels.add(name)
+        x += ICON + 32
+    return frame, sorted(labels)
+
+
+def main() -> None:
+    """Main driver function."""
+    rng = np.random.default_rng(SEED)
+    for name in ("heart", "kakera"):
+        # Cropped with a bit of the reaction around, like a screenshot
+        template = np.empty((ICON + 4, ICON + 4, 3), dtype=np.uint8)
+        template[:] = REACTION
+        template[2:-2, 2:-2] = draw_icon(name, REACTION)
+        Image.fromarray(template).save(HERE / f"{name}.png")
+    expected = {}
+    for index in range(FRAMES):
+        frame, labels = draw_frame(rng)
+        name = f"frame{index:02}.png"
+        Image.fromarray(frame).save(HERE / name, optimize=True)
+        expected[name] = labels
+    (HERE / "labels.json").write_text(
+        json.dumps({"colours": COLOURS, "frames": expected}, indent=2)
+        + "\n"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""test_accounts.py
+
+Tests of rolling for several accounts at once against
+scripts/fake_api.py, in real worker processes.
+"""
+
+from waifu.accounts import AccountProfile, roll_accounts
+from waifu.parser import SessionEntry
+
+from .conftest import FakeAPI
+
+ACCOUNTS = 3
+ROLLS = 8  # per account, plus $daily and $dk
+RATE_LIMIT = {"rolls-per-minute": 1200, "burst": 1,
+              "global-rolls-per-minute": 1200, "global-burst": 1}
+TOTAL_RATE = 30.0  # commands per second across all accounts
+
+
+def _profiles(fake_api: FakeAPI) -> list[AccountProfile]:
+    return [AccountProfile(f"alt{index}",
+                           {"api-base": fake_api.api_base,
+                            "token": f"token-{index}",
+                            "channel-id": "123"},
+                           SessionEntry("wa", "123", ROLLS, True))
+            for index in range(ACCOUNTS)]
+
+
+def test_accounts_share_the_total_rate(fake_api: FakeAPI) -> None:
+    progress: list[tuple[str, int]] = []
+    results = roll_accounts(_profiles(fake_api), RATE_LIMIT, TOTAL_RATE, 1,
+                            ACCOUNTS, lambda *event: progress.append(event))
+    assert [result.error for result in results] == [None] * ACCOUNTS
+    assert [result.sent for result in results] == [ROLLS + 2] * ACCOUNTS
+    # Events can trail behind the results, so only some may have come in
+    assert all(1 <= sent <= ROLLS + 2 for _, sent in progress)
+
+    times = sorted(time for token_times in fake_api.stats.times.values()
+                   for time in token_times)
+    assert {token: len(token_times) for token, token_times
+            in fake_api.stats.times.items()} == \
+        {f"token-{index}": ROLLS + 2 for index in range(ACCOUNTS)}
+    # n messages span n - 1 intervals, with some slack for scheduling
+    rate = (len(times) - 1) / (times[-1] - times[0])
+    assert rate <= TOTAL_RATE * 1.1
+
+
+def test_rate_limited_accounts_retry(fake_api: FakeAPI) -> None:
+    # Each account alone goes faster than the server lets it
+    fake_api.stats.limit = 10.0
+    results = roll_accounts(_profiles(fake_api), RATE_LIMIT, 100.0, 1,
+                            ACCOUNTS)
+    assert [result.sent for result in results] == [ROLLS + 2] * ACCOUNTS
+    assert sum(fake_api.stats.limited.values()) > 0
+
+
+def test_errors_are_reported_per_account(fake_api: FakeAPI) -> None:
+    profiles = _profiles(fake_api)
+    broken = profiles[0]._replace(transport={**profiles[0].transport,
+                                             "api-base": fake_api.api_base
+                                             + "/missing"})
+    results = roll_accounts([broken, *profiles[1:]], RATE_LIMIT, 100.0, 1,
+                            ACCOUNTS)
+    assert results[0].sent == 0
+    assert "HTTP 404" in (results[0].error or "")
+    assert [result.error for result in results[1:]] == [None] * 2
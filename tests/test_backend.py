@@ -0,0 +1,167 @@
+"""test_backend.py
+
+Tests of the input and window backends in backend.py.
+"""
+
+import sys
+from types import ModuleType
+
+import numpy as np
+import pytest
+
+from waifu.backend import PyAutoGUIBackend, RecordingBackend, get_backend
+
+
+class PyGetWindowException(Exception):
+    """Stand-in for the exception of the same name in pygetwindow."""
+
+
+class StubbornWindow:
+    """Window recording its calls, refusing the first few activations."""
+
+    def __init__(self, minimized: bool = False, refusals: int = 0) -> None:
+        self.isMinimized = minimized
+        self.calls: list[str] = []
+        self._refusals = refusals
+
+    def activate(self) -> None:
+        self.calls.append("activate")
+        if self._refusals:
+            self._refusals -= 1
+            raise PyGetWindowException("Error code from Windows: 0")
+        self.isMinimized = False
+
+    def minimize(self) -> None:
+        self.calls.append("minimize")
+        self.isMinimized = True
+
+    def maximize(self) -> None:
+        self.calls.append("maximize")
+        self.isMinimized = False
+
+
+@pytest.fixture
+def gui_backend(monkeypatch: pytest.MonkeyPatch) -> PyAutoGUIBackend:
+    """Return a PyAutoGUIBackend using a stand-in pygetwindow module.
+
+    The real one cannot be imported off Windows, and __init__ is skipped
+    since it imports the keyboard hooks.
+    """
+    pygetwindow = ModuleType("pygetwindow")
+    pygetwindow.PyGetWindowException = PyGetWindowException  # type: ignore
+    monkeypatch.setitem(sys.modules, "pygetwindow", pygetwindow)
+    return PyAutoGUIBackend.__new__(PyAutoGUIBackend)
+
+
+def test_activate_window_activates_directly(
+        gui_backend: PyAutoGUIBackend) -> None:
+    """A window in the background is activated without any trick."""
+    win = StubbornWindow()
+    gui_backend.activate_window(win)
+    assert win.calls == ["activate"]
+
+
+def test_activate_window_restores_minimized_window(
+        gui_backend: PyAutoGUIBackend) -> None:
+    """A minimized window is maximized before being activated."""
+    win = StubbornWindow(minimized=True)
+    gui_backend.activate_window(win)
+    assert win.calls == ["maximize", "activate"]
+    assert not win.isMinimized
+
+
+def test_activate_window_falls_back_on_pygetwindow_error(
+        gui_backend: PyAutoGUIBackend) -> None:
+    """The minimize -> maximize trick is only used once activating
+    raised PyGetWindowException.
+    """
+    win = StubbornWindow(refusals=1)
+    gui_backend.activate_window(win)
+    assert win.calls == ["activate", "minimize", "maximize", "activate"]
+    assert not win.isMinimized
+
+
+def test_activate_window_lets_other_errors_through(
+        gui_backend: PyAutoGUIBackend) -> None:
+    """Errors other than PyGetWindowException are not retried."""
+    class ClosedWindow(StubbornWindow):
+        def activate(self) -> None:
+            raise OSError("The window was closed")
+
+    win = ClosedWindow()
+    with pytest.raises(OSError):
+        gui_backend.activate_window(win)
+
+
+def test_recording_backend_simulates_quick_switcher() -> None:
+    """A query submitted after Ctrl+K renames the active window."""
+    backend = RecordingBackend("#general | Server - Discord")
+    backend.hotkey("ctrl", "k")
+    backend.write("#lobby")
+    backend.hotkey("enter")
+    assert backend.get_active_window_title() == \
+        "#lobby | Fake Server - Discord"
+    assert backend.typed_text() == "#lobby\n"
+
+
+def test_recording_backend_escape_closes_quick_switcher() -> None:
+    """A query abandoned with Esc leaves the window as it was."""
+    backend = RecordingBackend("#general | Server - Discord")
+    backend.hotkey("ctrl", "k")
+    backend.write("#lobby")
+    backend.hotkey("esc")
+    backend.hotkey("enter")
+    assert backend.get_active_window_title() == "#general | Server - Discord"
+
+
+def test_recording_backend_pastes_and_erases() -> None:
+    """Ctrl+V enters the clipboard and backspace erases across calls."""
+    backend = RecordingBackend("Discord")
+    backend.set_clipboard("$wa")
+    backend.hotkey("ctrl", "v")
+    backend.typewrite("x")
+    for _ in range(2):
+        backend.hotkey("backspace")
+    assert backend.typed_text() == "$w"
+    assert backend.count("hotkey") == 3
+
+
+def test_recording_backend_tracks_focus() -> None:
+    """Window calls see the focus changes made through the backend."""
+    backend = RecordingBackend("Discord", "Terminal")
+    discord, terminal = backend.windows
+    backend.activate_window(terminal)
+    assert backend.get_active_window() is terminal
+    discord.minimize()
+    assert discord.isMinimized
+    backend.activate_window(discord)
+    assert backend.get_active_window_title() == "Discord"
+    assert not discord.isMinimized
+    discord.alive = False
+    assert backend.get_windows_with_title("Discord") == []
+    assert not backend.is_window_alive(discord)
+
+
+def test_recording_backend_fires_hotkeys() -> None:
+    """press_hotkey() calls the registered callback with its args."""
+    backend = RecordingBackend()
+    pressed: list[str] = []
+    backend.add_hotkey("esc", pressed.append, ("esc",))
+    backend.press_hotkey("esc")
+    assert pressed == ["esc"]
+    assert backend.get_active_window_title() is None
+
+
+def test_recording_backend_captures_queued_frames() -> None:
+    """Captures return the queued frames cropped, then blank ones."""
+    backend = RecordingBackend()
+    backend.frames.append(np.full((4, 6, 3), 255, dtype=np.uint8))
+    frame = backend.capture((0, 0, 3, 2))
+    assert frame.shape == (2, 3, 3) and (frame == 255).all()
+    blank = backend.capture((0, 0, 3, 2))
+    assert blank.shape == (2, 3, 3) and not blank.any()
+
+
+def test_session_uses_backend_in_use(backend: RecordingBackend) -> None:
+    """get_backend() returns the backend installed with set_backend()."""
+    assert get_backend() is backend
@@ -0,0 +1,20 @@
+"""test_bench.py
+
+Tests of the session benchmark of `waifu bench`.
+"""
+
+from waifu import core
+from waifu.bench import bench_session
+
+ROLLS = 10
+
+
+def test_bench_session_measures_every_phase() -> None:
+    """The phases of the compiled plan are measured one by one."""
+    results = bench_session(ROLLS)
+    assert [result.phase for result in results] == \
+        ["open", "navigate", "roll", "revert"]
+    roll = results[2]
+    assert roll.calls["write"] == ROLLS
+    assert roll.virtual == (ROLLS - 1) * core.ROLLING_COOLDOWN
+    assert results[3].calls["activate_window"] == 1
@@ -0,0 +1,71 @@
+"""test_cancel.py
+
+Tests of aborting sessions at random instants, against a headless
+backend on the real clock.
+"""
+
+import random
+import threading
+import time
+
+import pytest
+
+from waifu.backend import RecordingBackend
+from waifu.cancel import cancel_session
+from waifu.core import run_manifest
+from waifu.exceptions import SessionCancelled
+from waifu.parser import SessionEntry
+from waifu.ratelimit import RateLimiter
+
+from .conftest import _join_timers
+
+ENTRY = SessionEntry("wa", "lobby", 40, True)
+COMMANDS = {"#lobby", "$wa", "$daily", "$dk"}
+ABORT_WINDOW = 1.0  # seconds into the session to abort within
+MAX_LATENCY = 0.02  # seconds for a session to stop, pastes settling meanwhile
+
+
+def _abort_at(delay: float, injection: str) -> float | None:
+    """Roll ENTRY, abort it after delay seconds and return the seconds it
+    took to stop, or None if it finished first.
+    """
+    stopped: list[float] = []
+
+    def roll() -> None:
+        try:
+            run_manifest([ENTRY], False, False, injection,
+                         limiter=RateLimiter(30.0, 1, 30.0, 1))
+        except SessionCancelled:
+            stopped.append(time.perf_counter())
+
+    thread = threading.Thread(target=roll)
+    thread.start()
+    time.sleep(delay)
+    start = time.perf_counter()
+    cancel_session("esc")
+    thread.join()
+    return stopped[0] - start if stopped else None
+
+
+@pytest.mark.parametrize("injection, trials",
+                         [("paste", 12), ("batch", 6), ("type", 6)])
+def test_random_aborts(backend: RecordingBackend,
+                       injection: str,
+                       trials: int) -> None:
+    """Sessions stop quickly wherever they are aborted, leaving only
+    whole commands behind.
+    """
+    rng = random.Random(injection)
+    latencies = []
+    for _ in range(trials):
+        backend.active = backend.windows[0]
+        latency = _abort_at(rng.uniform(0.0, ABORT_WINDOW), injection)
+        assert latency is not None
+        latencies.append(latency)
+        # Cancelled pastes are undone once settled, with the clipboard
+        _join_timers()
+        assert backend.clipboard == ""
+        *lines, rest = backend.typed_text().split("\n")
+        assert rest == ""
+        assert set(lines) <= COMMANDS
+    assert max(latencies) < MAX_LATENCY
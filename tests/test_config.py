@@ -0,0 +1,106 @@
+"""test_config.py
+
+Tests of reusing the validated config snapshot next to config.yaml.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from waifu import config
+from waifu.config_template import CONFIG_TEMPLATE
+
+
+class Calls:
+    """How often the expensive steps of load_config() ran."""
+
+    def __init__(self) -> None:
+        self.parsed = 0
+        self.hashed = 0
+
+
+@pytest.fixture
+def config_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Return the path of a config file holding the template, used by
+    load_config() instead of the user's.
+    """
+    path = tmp_path / "config.yaml"
+    path.write_text(CONFIG_TEMPLATE, encoding="utf-8")
+    monkeypatch.setattr(config, "get_user_config_path", lambda: path)
+    return path
+
+
+@pytest.fixture
+def calls(monkeypatch: pytest.MonkeyPatch) -> Calls:
+    """Count the parses and hashes of the config file content."""
+    calls = Calls()
+
+    def counting(name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(*args: Any) -> Any:
+            setattr(calls, name, getattr(calls, name) + 1)
+            return func(*args)
+        return wrapper
+
+    monkeypatch.setattr(config, "_parse_config",
+                        counting("parsed", config._parse_config))
+    monkeypatch.setattr(config, "_hash_content",
+                        counting("hashed", config._hash_content))
+    return calls
+
+
+def _touch(path: Path) -> None:
+    """Move the modification time of path forward without changing it."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_fresh_snapshot_skips_parsing(config_path: Path,
+                                      calls: Calls) -> None:
+    """Once built, the snapshot is returned without reading the file."""
+    first = config.load_config()
+    assert calls.parsed == 1
+    assert config_path.with_suffix(config.SNAPSHOT_SUFFIX).exists()
+
+    assert config.load_config() == first
+    assert (calls.parsed, calls.hashed) == (1, 1)
+
+
+def test_stale_snapshot_is_rebuilt(config_path: Path, calls: Calls) -> None:
+    """A changed file is parsed and validated again."""
+    assert config.load_config()["verbose"] is True
+    config_path.write_text(
+        CONFIG_TEMPLATE.replace("verbose: true", "verbose: false"),
+        encoding="utf-8"
+    )
+    _touch(config_path)  # In case the write landed in the same tick
+
+    assert config.load_config()["verbose"] is False
+    assert calls.parsed == 2
+    assert config.load_config()["verbose"] is False
+    assert calls.parsed == 2
+
+
+def test_touched_file_reuses_snapshot_by_hash(config_path: Path,
+                                              calls: Calls) -> None:
+    """A file touched but unchanged is hashed instead of parsed, and the
+    snapshot takes the new modification time.
+    """
+    first = config.load_config()
+    _touch(config_path)
+
+    assert config.load_config() == first
+    assert (calls.parsed, calls.hashed) == (1, 2)
+    assert config.load_config() == first
+    assert (calls.parsed, calls.hashed) == (1, 2)
+
+
+def test_unreadable_snapshot_is_ignored(config_path: Path,
+                                        calls: Calls) -> None:
+    """A corrupt snapshot falls back to parsing the file."""
+    config.load_config()
+    config_path.with_suffix(config.SNAPSHOT_SUFFIX).write_bytes(b"\x00junk")
+
+    assert config.load_config()["verbose"] is True
+    assert calls.parsed == 2
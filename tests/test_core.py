@@ -0,0 +1,148 @@
+"""test_core.py
+
+Tests of the waits, the Discord window handling and the manifests of
+the session engine in core.py.
+"""
+
+import threading
+import time
+
+import pytest
+
+from waifu import core
+from waifu.backend import FakeWindow, RecordingBackend
+from waifu.clock import VirtualClock
+from waifu.parser import SessionEntry
+
+from .conftest import DISCORD_TITLE
+
+PAUSE_SECONDS = 10.0  # how long the simulated pause lasts
+UNFOCUSED_SECONDS = 1.0  # how long Discord stays unfocused
+CPU_BUDGET = 0.05  # fraction of a core a blocked wait may use at most
+
+
+def _cpu_seconds_paused(seconds: float) -> float:
+    """Return the CPU time spent in a _wait that stays paused for
+    seconds, until resumed from another thread.
+    """
+    resumer = threading.Timer(seconds, core._Pauser.resume)
+    resumer.start()
+    start = time.process_time()
+    try:
+        core._wait(0)
+    finally:
+        resumer.cancel()
+    return time.process_time() - start
+
+
+def test_paused_wait_costs_next_to_no_cpu(backend: RecordingBackend) -> None:
+    """A session paused for PAUSE_SECONDS sleeps instead of spinning."""
+    core._Pauser.pause()
+    start = time.monotonic()
+    cpu = _cpu_seconds_paused(PAUSE_SECONDS)
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= PAUSE_SECONDS
+    assert cpu < PAUSE_SECONDS * CPU_BUDGET
+    # Focus is only polled every FOCUS_POLL_INTERVAL, not in a loop
+    polls = backend.count("get_active_window_title")
+    assert polls <= PAUSE_SECONDS / core.FOCUS_POLL_INTERVAL + 5
+
+
+def test_unfocused_wait_polls_at_interval(backend: RecordingBackend) -> None:
+    """A session waiting for Discord to be focused again checks once
+    every FOCUS_POLL_INTERVAL.
+    """
+    discord, terminal = backend.windows
+    terminal.activate()
+    threading.Timer(UNFOCUSED_SECONDS, discord.activate).start()
+    start = time.process_time()
+    core._wait(0)
+    cpu = time.process_time() - start
+
+    assert backend.active is discord
+    assert cpu < UNFOCUSED_SECONDS * CPU_BUDGET
+    assert backend.count("get_active_window_title") <= \
+        UNFOCUSED_SECONDS / core.FOCUS_POLL_INTERVAL + 3
+
+
+def test_resume_wakes_paused_wait_right_away(
+        backend: RecordingBackend) -> None:
+    """Resuming doesn't wait out the rest of the poll interval."""
+    core._Pauser.pause()
+    resumed_at: list[float] = []
+
+    def resume() -> None:
+        resumed_at.append(time.perf_counter())
+        core._Pauser.resume()
+
+    threading.Timer(0.1, resume).start()
+    core._wait(0)
+    assert time.perf_counter() - resumed_at[0] < core.FOCUS_POLL_INTERVAL
+
+
+def test_discord_window_is_enumerated_once(backend: RecordingBackend) -> None:
+    """The Discord window is looked up once and reused afterwards."""
+    first = core._WindowRegistry.get_discord()
+    second = core._WindowRegistry.get_discord()
+    assert first is second is backend.windows[0]
+    assert backend.count("get_windows_with_title") == 1
+
+
+def test_closed_discord_window_is_looked_up_again(
+        backend: RecordingBackend) -> None:
+    """A cached window that was closed is replaced by a new lookup."""
+    stale = core._WindowRegistry.get_discord()
+    stale.alive = False
+    backend.windows.append(FakeWindow(DISCORD_TITLE, backend))
+
+    assert core._WindowRegistry.get_discord() is backend.windows[-1]
+    assert backend.count("get_windows_with_title") == 2
+
+
+def test_open_discord_activates_cached_window(
+        backend: RecordingBackend) -> None:
+    """Moving back to Discord activates the window directly."""
+    discord, terminal = backend.windows
+    terminal.activate()
+    core._open_discord(verbose=False)
+    assert backend.active is discord
+    assert backend.count("activate_window") == 1
+
+
+def test_manifest_rolls_in_one_activation(backend: RecordingBackend,
+                                          clock: VirtualClock) -> None:
+    """Sessions of a manifest roll back to back after moving to Discord
+    once, and the window the user was in is restored once at the end.
+    """
+    discord, terminal = backend.windows
+    terminal.activate()
+    entries = [SessionEntry("wa", "lobby", 2, False),
+               SessionEntry("hx", "bots", 1, True)]
+    core.run_manifest(entries, False, True, verify=False)
+
+    activated = [action.args[0] for action in backend.actions
+                 if action.kind == "activate_window"]
+    assert activated == [discord, terminal]
+    commands = [line for line in backend.typed_text().splitlines()
+                if line.startswith("$")]
+    assert commands == ["$wa", "$wa", "$hx", "$daily", "$dk"]
+    assert discord.title == "#bots | Fake Server - Discord"
+
+
+@pytest.mark.parametrize("title, channel, expected", [
+    ("#lobby | Test Server - Discord", "lobby", True),
+    ("#lobby | Test Server - Discord", "#LOBBY", True),
+    ("#bot-spam | Test Server - Discord", "bot spam", True),
+    ("#lobby | Test Server - Discord", "bots", False),
+    ("@Mudae - Discord", "lobby", False),
+    ("Discord", "lobby", None),
+    ("Terminal", "lobby", None),
+    ("lobby - Notepad", "lobby", None),
+    (None, "lobby", None),
+])
+def test_channel_in_title(title: str | None,
+                          channel: str,
+                          expected: bool | None) -> None:
+    """Titles not telling the channel give None rather than False."""
+    assert core._channel_in_title(title, channel) is expected
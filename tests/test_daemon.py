@@ -0,0 +1,84 @@
+"""test_daemon.py
+
+Tests of the daemon taking jobs from clients, of its key and of ESC
+while it idles.
+"""
+
+import queue
+import secrets
+import socket
+import sys
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+import pytest
+
+from waifu import abort, cancel, daemon
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix domain socket")
+def test_silent_client_holds_up_no_one(tmp_path: Path) -> None:
+    """Jobs still arrive while another client connected and sent
+    nothing, not even its authentication.
+    """
+    address = str(tmp_path / "daemon.sock")
+    authkey = secrets.token_bytes(32)
+    jobs: queue.Queue[daemon._Job] = queue.Queue()
+    with Listener(address) as listener:
+        threading.Thread(target=daemon._accept_jobs,
+                         args=(listener, authkey, jobs),
+                         daemon=True).start()
+        with socket.socket(socket.AF_UNIX) as silent:
+            silent.connect(address)
+            with Client(address, authkey=authkey) as conn:
+                conn.send(("roll", ["-n", "3"], False))
+                assert conn.recv() == ("queued", 0)
+                job = jobs.get(timeout=2.0)
+                assert job.argv == ["-n", "3"]
+                job.conn.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix domain socket")
+def test_wrong_key_is_turned_away(tmp_path: Path) -> None:
+    address = str(tmp_path / "daemon.sock")
+    jobs: queue.Queue[daemon._Job] = queue.Queue()
+    with Listener(address) as listener:
+        threading.Thread(target=daemon._accept_jobs,
+                         args=(listener, b"right", jobs),
+                         daemon=True).start()
+        with pytest.raises(AuthenticationError):
+            Client(address, authkey=b"wrong")
+    assert jobs.empty()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix permissions")
+def test_existing_key_is_made_private(tmp_path: Path,
+                                      monkeypatch: pytest.MonkeyPatch) -> None:
+    """A key file left readable by others is tightened before reuse."""
+    authkey_path = tmp_path / "daemon.key"
+    authkey_path.write_bytes(b"old key")
+    authkey_path.chmod(0o644)
+    monkeypatch.setattr(daemon, "_get_address",
+                        lambda: str(tmp_path / "daemon.sock"))
+    monkeypatch.setattr(daemon, "_get_authkey_path", lambda: authkey_path)
+
+    listener, authkey = daemon._open_listener()
+    listener.close()
+    assert authkey_path.stat().st_mode & 0o777 == 0o600
+    assert authkey_path.read_bytes() == authkey
+
+
+def test_esc_while_idle_keeps_the_daemon_running() -> None:
+    """Without a job in progress, ESC does nothing to the daemon, and
+    the listener thread it runs on lives on.
+    """
+    assert abort._custom_abort_callback(exit_when_idle=False) is None
+
+
+def test_esc_cancels_the_job_in_progress() -> None:
+    with cancel.session_scope() as token:
+        abort._custom_abort_callback(exit_when_idle=False)
+        assert token.cancelled
+        assert token.reason == abort.ABORT_KEY
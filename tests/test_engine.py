@@ -0,0 +1,173 @@
+"""test_engine.py
+
+Tests of running sessions on the asyncio engine of engine.py.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from waifu import core, metrics
+from waifu.backend import RecordingBackend, set_backend
+from waifu.cancel import cancel_session
+from waifu.clock import VirtualClock, set_clock
+from waifu.core import (FOCUS_POLL_INTERVAL, PAUSE_KEY, run_autogui,
+                        run_manifest)
+from waifu.exceptions import SessionCancelled
+from waifu.history import HistoryWriter, connect, top
+from waifu.parser import SessionEntry
+from waifu.ratelimit import RateLimiter
+from waifu.transport import HTTPTransport
+
+from .conftest import DISCORD_TITLE, FakeAPI
+from .test_history import ROLL_REPLY
+
+ROLLS = 3
+ENTRY = SessionEntry("wa", "lobby", ROLLS, True)
+COMMANDS = "$wa\n" * ROLLS + "$daily\n$dk\n"
+UNFOCUSED_POLLS = 4  # polls before Discord is focused again
+MAX_ABORT_LATENCY = 0.02  # seconds for a session waiting to stop
+
+
+class RefocusingClock(VirtualClock):
+    """VirtualClock focusing Discord again after UNFOCUSED_POLLS polls of
+    the focus.
+    """
+
+    def __init__(self, backend: RecordingBackend) -> None:
+        super().__init__()
+        self.backend = backend
+        self.polls = 0
+
+    async def asleep(self, seconds: float) -> None:
+        await super().asleep(seconds)
+        if seconds == FOCUS_POLL_INTERVAL:
+            self.polls += 1
+            if self.polls == UNFOCUSED_POLLS:
+                self.backend.active = self.backend.windows[0]
+
+
+def _run(entry: SessionEntry, **options: Any) -> None:
+    run_autogui(*entry, False, False, **options)
+
+
+def test_engine_runs_like_blocking_interpreter() -> None:
+    """The engine takes the same actions at the same virtual times as
+    Interpreter.run.
+    """
+    runs = []
+    for engine in (False, True):
+        backend = RecordingBackend(DISCORD_TITLE, "Terminal")
+        clock = VirtualClock()
+        set_backend(backend)
+        set_clock(clock)
+        core._WindowRegistry.invalidate()
+        if engine:
+            _run(ENTRY)
+        else:
+            run_manifest([ENTRY], False, False)
+        assert backend.typed_text() == COMMANDS
+        # By repr, since the windows of the two backends differ
+        runs.append(([(action.kind, repr(action.args))
+                      for action in backend.actions], clock.now))
+    assert runs[0] == runs[1]
+
+
+def test_pause_hotkey_holds_commands(backend: RecordingBackend,
+                                     clock: VirtualClock) -> None:
+    """Nothing goes out between pausing and resuming, from the hotkey
+    thread.
+    """
+    entered = backend._enter
+    held: list[str] = []
+
+    def resume() -> None:
+        held.append(backend.typed_text())
+        backend.press_hotkey(PAUSE_KEY)
+
+    def enter_then_pause(text: str) -> None:
+        entered(text)
+        if text == "$wa\n" and not held:
+            backend.press_hotkey(PAUSE_KEY)
+            threading.Timer(0.05, resume).start()
+
+    backend._enter = enter_then_pause  # type: ignore[method-assign]
+    _run(ENTRY)
+    assert held == ["$wa\n"]
+    assert backend.typed_text() == COMMANDS
+    assert not core._Pauser.is_paused()
+
+
+def test_focus_loss_suspends_until_refocused(
+        backend: RecordingBackend) -> None:
+    """Commands stop while Discord is unfocused, which is polled at
+    FOCUS_POLL_INTERVAL until it is focused again.
+    """
+    clock = RefocusingClock(backend)
+    set_clock(clock)
+    entered = backend._enter
+    unfocused: list[str] = []
+
+    def enter_then_switch(text: str) -> None:
+        if backend.active is not backend.windows[0]:
+            unfocused.append(text)
+        entered(text)
+        if text == "$wa\n" and clock.polls == 0:
+            backend.active = backend.windows[1]
+
+    backend._enter = enter_then_switch  # type: ignore[method-assign]
+    before = metrics.UNFOCUSED_SECONDS.value()
+    _run(ENTRY)
+    assert unfocused == []
+    assert clock.polls == UNFOCUSED_POLLS
+    assert metrics.UNFOCUSED_SECONDS.value() - before == \
+        pytest.approx(UNFOCUSED_POLLS * FOCUS_POLL_INTERVAL)
+    assert backend.typed_text() == COMMANDS
+
+
+def test_abort_wakes_awaited_wait(backend: RecordingBackend) -> None:
+    """Cancelling the session stops it at the wait in progress, on the
+    real clock, without waiting it out.
+    """
+    stopped: list[float] = []
+
+    def roll() -> None:
+        try:
+            _run(SessionEntry("wa", "lobby", 10, False),
+                 limiter=RateLimiter(1.0, 1, 1.0, 1))
+        except SessionCancelled:
+            stopped.append(time.perf_counter())
+
+    thread = threading.Thread(target=roll)
+    thread.start()
+    # Between the limited rolls
+    time.sleep(0.5)
+    start = time.perf_counter()
+    assert cancel_session("esc")
+    thread.join()
+    assert stopped[0] - start < MAX_ABORT_LATENCY
+    *lines, rest = backend.typed_text().split("\n")
+    assert (lines, rest) == (["$wa"], "")
+
+
+def test_history_is_stored_on_engine(tmp_path: Path,
+                                     fake_api: FakeAPI,
+                                     backend: RecordingBackend,
+                                     clock: VirtualClock) -> None:
+    """Replies are fetched in a worker thread, but stored from the
+    thread the database connection belongs to.
+    """
+    fake_api.stats.reply = {"author": {"id": "mudae"}, **ROLL_REPLY}
+    connection = connect(tmp_path / "history.sqlite3")
+    history = HistoryWriter(connection)
+    transport = HTTPTransport(fake_api.api_base, "token-a", "123")
+    try:
+        _run(SessionEntry("wa", "lobby", ROLLS, False), transport=transport,
+             history=history)
+    finally:
+        transport.close()
+    history.flush()
+    assert top(connection, "character", 0) == [("Rem", ROLLS)]
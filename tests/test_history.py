@@ -0,0 +1,81 @@
+"""test_history.py
+
+Tests of storing rolls with what Mudae's reply tells about them.
+"""
+
+import time
+from pathlib import Path
+from typing import Any
+
+from waifu.backend import RecordingBackend
+from waifu.clock import VirtualClock
+from waifu.core import run_manifest
+from waifu.history import (HistoryWriter, RollDetails, connect, parse_reply,
+                           top)
+from waifu.parser import SessionEntry
+from waifu.transport import HTTPTransport
+
+from .conftest import FakeAPI
+
+ROLL_REPLY: dict[str, Any] = {
+    "content": "",
+    "embeds": [{
+        "author": {"name": "Rem"},
+        "description": "Re:Zero kara Hajimeru Isekai Seikatsu\n"
+                       "**1,204**<:kakera:469835869059153940>\n"
+                       "React with any emoji to claim!",
+    }],
+}
+CLAIMED_REPLY: dict[str, Any] = {
+    "content": "",
+    "embeds": [{
+        "author": {"name": "Emilia"},
+        "description": "Re:Zero kara Hajimeru Isekai Seikatsu\n"
+                       "**870**<:kakera:469835869059153940>",
+        "footer": {"text": "Belongs to someone"},
+    }],
+}
+
+
+def test_parse_reply() -> None:
+    assert parse_reply(ROLL_REPLY) == RollDetails(
+        "Rem", "Re:Zero kara Hajimeru Isekai Seikatsu", 1204, False
+    )
+    assert parse_reply(CLAIMED_REPLY).claimed
+    out_of_rolls = {"content": "You have 0 rolls left.", "embeds": []}
+    assert parse_reply(out_of_rolls) == RollDetails()
+
+
+def test_top_series_counts_replies(tmp_path: Path) -> None:
+    connection = connect(tmp_path / "history.sqlite3")
+    writer = HistoryWriter(connection)
+    writer.record("lobby", "wa", reply=ROLL_REPLY)
+    writer.record("lobby", "wa", reply=CLAIMED_REPLY)
+    # Rolls without a reply are stored, but not counted by series
+    writer.record("lobby", "wa")
+    writer.flush()
+    assert writer.written == 3
+    since = time.time() - 60
+    assert top(connection, "series", since) == \
+        [("Re:Zero kara Hajimeru Isekai Seikatsu", 2)]
+    assert top(connection, "character", since) == [("Emilia", 1), ("Rem", 1)]
+    assert connection.execute(
+        "SELECT SUM(kakera), SUM(claimed) FROM rolls"
+    ).fetchone() == (2074, 1)
+
+
+def test_rolls_store_the_reply(tmp_path: Path,
+                               fake_api: FakeAPI,
+                               backend: RecordingBackend,
+                               clock: VirtualClock) -> None:
+    fake_api.stats.reply = {"author": {"id": "mudae"}, **ROLL_REPLY}
+    connection = connect(tmp_path / "history.sqlite3")
+    history = HistoryWriter(connection)
+    transport = HTTPTransport(fake_api.api_base, "token-a", "123")
+    try:
+        run_manifest([SessionEntry("wa", "lobby", 3, False)], False, False,
+                     transport=transport, history=history)
+    finally:
+        transport.close()
+    history.flush()
+    assert top(connection, "character", 0) == [("Rem", 3)]
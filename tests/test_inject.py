@@ -0,0 +1,88 @@
+"""test_inject.py
+
+Tests of the text injection modes in inject.py.
+"""
+
+import pytest
+
+from waifu.backend import RecordingBackend
+from waifu.cancel import session_scope
+from waifu.clock import VirtualClock
+from waifu.exceptions import SessionCancelled
+from waifu.inject import INJECTION_MODES, inject_text
+
+from .conftest import _join_timers
+
+COMMAND = "$wa\n"
+INTERVAL = 0.05  # seconds between characters in type mode
+
+
+@pytest.mark.parametrize("mode", INJECTION_MODES)
+def test_every_mode_submits_the_text(backend: RecordingBackend,
+                                     clock: VirtualClock,
+                                     mode: str) -> None:
+    """Each mode enters the text exactly once, newline included."""
+    inject_text(COMMAND, mode, INTERVAL)
+    assert backend.typed_text() == COMMAND
+
+
+def test_batch_sends_one_call(backend: RecordingBackend) -> None:
+    """Batch mode sends the whole command in a single call."""
+    inject_text(COMMAND, "batch")
+    assert [action.kind for action in backend.actions] == ["write"]
+
+
+def test_type_presses_one_key_per_character(backend: RecordingBackend,
+                                            clock: VirtualClock) -> None:
+    """Type mode waits interval seconds between characters."""
+    inject_text(COMMAND, "type", INTERVAL)
+    assert backend.count("typewrite") == len(COMMAND)
+    assert clock.slept == pytest.approx(INTERVAL * (len(COMMAND) - 1))
+
+
+def test_paste_restores_clipboard(backend: RecordingBackend,
+                                  clock: VirtualClock) -> None:
+    """Pasting leaves the user's clipboard as it was, and submits with
+    ENTER since a pasted newline would not.
+    """
+    backend.clipboard = "user data"
+    inject_text("$wa ✨\n", "paste")
+    assert backend.typed_text() == "$wa ✨\n"
+    assert backend.clipboard == "user data"
+    hotkeys = [action.args for action in backend.actions
+               if action.kind == "hotkey"]
+    assert hotkeys == [("ctrl", "v"), ("enter",)]
+
+
+def test_paste_without_newline_does_not_submit(
+        backend: RecordingBackend, clock: VirtualClock) -> None:
+    """Text without a trailing newline is only pasted."""
+    inject_text("#lobby", "paste")
+    assert backend.typed_text() == "#lobby"
+    assert backend.count("hotkey") == 1
+
+
+@pytest.mark.parametrize("mode", ["type", "paste"])
+def test_cancelled_injection_leaves_nothing(backend: RecordingBackend,
+                                            clock: VirtualClock,
+                                            mode: str) -> None:
+    """Text interrupted by a cancellation is erased again. A paste is
+    only undone once Discord is done reading the clipboard.
+    """
+    backend.clipboard = "user data"
+    with session_scope() as token:
+        # Cancel once the first character is entered
+        entered = backend._enter
+
+        def enter_then_cancel(text: str) -> None:
+            entered(text)
+            token.cancel("esc")
+
+        backend._enter = enter_then_cancel  # type: ignore[method-assign]
+        with pytest.raises(SessionCancelled):
+            inject_text(COMMAND, mode, INTERVAL)
+    if mode == "paste":
+        assert backend.clipboard == COMMAND.rstrip("\n")
+    _join_timers()
+    assert backend.typed_text() == ""
+    assert backend.clipboard == "user data"
@@ -0,0 +1,91 @@
+"""test_journal.py
+
+Tests of resuming runs from the journal after the process was killed
+at random points.
+"""
+
+import random
+from pathlib import Path
+
+import pytest
+
+from waifu.backend import RecordingBackend
+from waifu.clock import VirtualClock
+from waifu.core import run_manifest
+from waifu.journal import Journal
+from waifu.parser import SessionEntry
+
+ENTRIES = [SessionEntry("wa", "lobby", 5, True),
+           SessionEntry("hx", "bots", 3, False)]
+KILLS = 20  # random points to kill each run at
+
+
+class Killed(BaseException):
+    """Stands in for the process getting killed."""
+
+
+class KillingTransport:
+    """Transport recording what it sends, killed before the nth send."""
+
+    requires_focus = False
+
+    def __init__(self, kill_at: int | None = None) -> None:
+        self.sent: list[str] = []
+        self._kill_at = kill_at
+
+    def send(self, content: str) -> None:
+        if len(self.sent) == self._kill_at:
+            raise Killed
+        self.sent.append(content)
+
+
+def _roll(path: Path, resume: bool, transport: KillingTransport) -> Journal:
+    journal = Journal.open(path, ENTRIES, resume)
+    try:
+        run_manifest(ENTRIES, False, False, transport=transport,
+                     journal=journal)
+    except Killed:
+        # Every record is flushed already, so this only stands in for the
+        # OS releasing the file of the killed process
+        journal.close()
+        raise
+    return journal
+
+
+@pytest.fixture
+def full_run(tmp_path: Path,
+             backend: RecordingBackend,
+             clock: VirtualClock) -> list[str]:
+    """Return every command of an uninterrupted run."""
+    transport = KillingTransport()
+    _roll(tmp_path / "full.log", False, transport).close()
+    return transport.sent
+
+
+@pytest.mark.parametrize("seed", range(KILLS))
+def test_resume_sends_everything_once(tmp_path: Path,
+                                      full_run: list[str],
+                                      seed: int) -> None:
+    rng = random.Random(seed)
+    path = tmp_path / "journal.log"
+    killed = KillingTransport(rng.randrange(len(full_run)))
+    with pytest.raises(Killed):
+        _roll(path, False, killed)
+    if rng.random() < 0.5:
+        with open(path, "at", encoding="utf-8") as fp:
+            fp.write("r 1")  # torn record
+
+    resumed = KillingTransport()
+    journal = _roll(path, True, resumed)
+    journal.close()
+    assert journal.finished
+    assert killed.sent + resumed.sent == full_run
+
+
+def test_finished_run_resumes_to_nothing(tmp_path: Path,
+                                         full_run: list[str]) -> None:
+    path = tmp_path / "journal.log"
+    _roll(path, False, KillingTransport()).close()
+    resumed = KillingTransport()
+    _roll(path, True, resumed).close()
+    assert resumed.sent == []
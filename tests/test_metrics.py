@@ -0,0 +1,114 @@
+"""test_metrics.py
+
+Tests of the Prometheus metrics of metrics.py.
+"""
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from waifu import metrics
+from waifu.metrics import Counter, Gauge, Histogram, Metric
+
+
+@pytest.fixture
+def registry(monkeypatch: pytest.MonkeyPatch) -> list[Metric]:
+    """Expose only the metrics added to the returned list."""
+    registry: list[Metric] = []
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    return registry
+
+
+@pytest.fixture
+def idle() -> Iterator[None]:
+    """Start without a session in progress, and leave none behind."""
+    metrics.SESSION_ACTIVE.set(0)
+    yield
+    metrics.SESSION_ACTIVE.set(0)
+
+
+def test_metric_must_have_samples() -> None:
+    class Incomplete(Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("waifu_incomplete", "Has no samples.")  # type: ignore
+
+
+def test_render_format(registry: list[Metric]) -> None:
+    rolls = Counter("waifu_test_rolls_total", "Rolls sent.")
+    outcomes = Counter("waifu_test_sessions_total", "Sessions.", "outcome")
+    active = Gauge("waifu_test_active", "Whether rolling.")
+    registry += [rolls, outcomes, active]
+    rolls.inc()
+    rolls.inc(2)
+    outcomes.inc(label_value="esc")
+    outcomes.inc(label_value='odd "reason"\n')
+    active.set(0.5)
+
+    assert metrics.render() == (
+        "# HELP waifu_test_rolls_total Rolls sent.\n"
+        "# TYPE waifu_test_rolls_total counter\n"
+        "waifu_test_rolls_total 3\n"
+        "# HELP waifu_test_sessions_total Sessions.\n"
+        "# TYPE waifu_test_sessions_total counter\n"
+        'waifu_test_sessions_total{outcome="esc"} 1\n'
+        'waifu_test_sessions_total{outcome="odd \\"reason\\"\\n"} 1\n'
+        "# HELP waifu_test_active Whether rolling.\n"
+        "# TYPE waifu_test_active gauge\n"
+        "waifu_test_active 0.5\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative(registry: list[Metric]) -> None:
+    histogram = Histogram("waifu_test_interval_seconds", "Intervals.",
+                          (1.0, 0.5, 2.0))
+    registry.append(histogram)
+    for value in (0.25, 0.5, 0.75, 3.0):
+        histogram.observe(value)
+
+    samples = [line for line in metrics.render().splitlines()
+               if not line.startswith("#")]
+    assert samples == [
+        'waifu_test_interval_seconds_bucket{le="0.5"} 2',
+        'waifu_test_interval_seconds_bucket{le="1"} 3',
+        'waifu_test_interval_seconds_bucket{le="2"} 3',
+        'waifu_test_interval_seconds_bucket{le="+Inf"} 4',
+        "waifu_test_interval_seconds_sum 4.5",
+        "waifu_test_interval_seconds_count 4",
+    ]
+
+
+def test_end_session_counts_first_outcome_only(idle: None) -> None:
+    """Later causes of the same abort are not counted again."""
+    failsafe = metrics.SESSIONS.value("failsafe")
+    sigint = metrics.SESSIONS.value("sigint")
+    metrics.start_session()
+    metrics.end_session("failsafe")
+    metrics.end_session("sigint")
+
+    assert metrics.SESSION_ACTIVE.value == 0
+    assert metrics.SESSIONS.value("failsafe") == failsafe + 1
+    assert metrics.SESSIONS.value("sigint") == sigint
+
+
+def test_end_session_without_session_is_ignored(idle: None) -> None:
+    esc = metrics.SESSIONS.value("esc")
+    metrics.end_session("esc")
+    assert metrics.SESSIONS.value("esc") == esc
+
+
+def test_write_textfile_replaces_file(tmp_path: Path,
+                                      registry: list[Metric]) -> None:
+    counter = Counter("waifu_test_total", "Things.")
+    registry.append(counter)
+    path = tmp_path / "waifu.prom"
+    path.write_text("stale\n", encoding="utf-8")
+    counter.inc()
+    metrics.write_textfile(path)
+
+    assert path.read_text(encoding="utf-8") == metrics.render()
+    assert "waifu_test_total 1\n" in path.read_text(encoding="utf-8")
+    # The temporary file is renamed over the old one
+    assert [file.name for file in tmp_path.iterdir()] == ["waifu.prom"]
@@ -0,0 +1,65 @@
+"""test_pacing.py
+
+Tests of the reply pacer against queued up captures, and of the rate
+limiter as its fallback.
+"""
+
+import numpy as np
+import pytest
+
+from waifu.backend import RecordingBackend
+from waifu.clock import VirtualClock
+from waifu.pacing import REPLY_POLL_INTERVAL, ReplyPacer
+from waifu.ratelimit import RateLimiter
+
+REGION = (0, 0, 16, 16)
+TIMEOUT = 3.0
+
+
+def _frame(level: int) -> np.ndarray:
+    return np.full((16, 16, 3), level, dtype=np.uint8)
+
+
+BLANK = _frame(0)
+ECHO = _frame(100)
+REPLY = _frame(200)
+
+
+@pytest.fixture
+def pacer(backend: RecordingBackend, clock: VirtualClock) -> ReplyPacer:
+    return ReplyPacer(REGION, min_gap=0.0, timeout=TIMEOUT, threshold=0.2)
+
+
+def test_echo_is_not_the_reply(backend: RecordingBackend,
+                               pacer: ReplyPacer) -> None:
+    # Before sending, two polls of nothing, the echo, then the reply
+    backend.frames = [BLANK, BLANK, BLANK, ECHO, ECHO, REPLY]
+    pacer.arm()
+    latency = pacer.wait_for_reply()
+    assert latency == pytest.approx(5 * REPLY_POLL_INTERVAL)
+    assert pacer.latencies == [latency]
+
+
+def test_echo_alone_times_out(backend: RecordingBackend,
+                              pacer: ReplyPacer) -> None:
+    backend.frames = [BLANK, ECHO] + [ECHO] * 100
+    pacer.arm()
+    assert pacer.wait_for_reply() is None
+    assert pacer.timeouts == 1
+
+
+def test_paced_commands_skip_the_buckets(clock: VirtualClock) -> None:
+    limiter = RateLimiter(1.0, 1, 1.0, 1)
+    limiter.acquire("a")
+    # Replies come back much faster than the configured rate
+    for _ in range(10):
+        clock.advance(0.1)
+        assert limiter.acquire("a", paced=True) == 0.0
+    # Without a reply, the fixed pace resumes from the last command
+    assert limiter.acquire("a") == pytest.approx(1.0)
+
+
+def test_paced_commands_wait_out_rate_limits(clock: VirtualClock) -> None:
+    limiter = RateLimiter(1.0, 1, 1.0, 1)
+    limiter.on_rate_limit(retry_after=2.0)
+    assert limiter.acquire("a", paced=True) == pytest.approx(2.0)
@@ -0,0 +1,186 @@
+"""test_plan.py
+
+Tests of compiling, optimizing, timing and running action plans.
+"""
+
+from typing import Any
+
+import pytest
+
+from waifu.backend import RecordingBackend, set_backend
+from waifu.clock import VirtualClock
+from waifu.config import _parse_config
+from waifu.config_template import CONFIG_TEMPLATE
+from waifu.core import ACTION_COOLDOWN, NAVIGATION_BACKOFF, NAVIGATION_RETRIES
+from waifu.exceptions import NavigationError
+from waifu.parser import SessionEntry
+from waifu.plan import (Interpreter, Key, Note, Phase, Plan, Wait,
+                        compile_plan, optimize, project, show_plan,
+                        split_phases)
+from waifu.ratelimit import RateLimiter
+from waifu.transport import GUITransport
+
+from .conftest import DISCORD_TITLE
+
+ENTRIES = [SessionEntry("wa", "lobby", 3, False),
+           SessionEntry("wa", "bots", 3, False)]
+INTERVAL = 1.0  # seconds between commands
+
+
+class StubbornBackend(RecordingBackend):
+    """RecordingBackend whose quick switcher ignores the first queries
+    submitted, leaving the window title as it was.
+    """
+
+    def __init__(self, ignored: int, *titles: str) -> None:
+        super().__init__(*titles)
+        self.ignored = ignored
+
+    def _enter(self, text: str) -> None:
+        title = self.active.title if self.active is not None else None
+        super()._enter(text)
+        if self.ignored and self.active is not None \
+                and self.active.title != title:
+            self.active.title = title  # type: ignore[assignment]
+            self.ignored -= 1
+
+
+def _run(plan: Plan, verbose: bool = False, caller: Any = None) -> None:
+    """Run a plan with commands typed into the window in use, one every
+    INTERVAL seconds.
+    """
+    limiter = RateLimiter(1 / INTERVAL, 1, 1 / INTERVAL, 1)
+    Interpreter(GUITransport("batch"), limiter, verbose,
+                caller=caller).run(plan)
+
+
+def _escs(plan: tuple) -> int:
+    return sum(1 for step in plan
+               if isinstance(step, Key) and step.keys == ("esc",))
+
+
+def test_navigation_escs_are_merged() -> None:
+    entries = [ENTRIES[0]._replace(num=0), ENTRIES[1]]
+    compiled = compile_plan(entries, verify=False)
+    plan = optimize(compiled)
+    # With no rolls in between, the Esc focusing the text area of a session
+    # runs into the one closing the quick switcher for the next session
+    assert _escs(plan) < _escs(compiled)
+    assert all(step.closing for step in plan
+               if isinstance(step, Key) and step.keys == ("esc",))
+
+
+def test_macro_escs_are_kept() -> None:
+    macro = [{"key": "esc"}, {"wait": 0.5}, {"key": "esc"}, {"rolls": 1}]
+    plan = optimize(compile_plan(ENTRIES[:1], verify=False, macro=macro))
+    keys = [step for step in plan if isinstance(step, (Key, Wait))]
+    macro_escs = [step for step in keys if step == Key(("esc",))]
+    assert len(macro_escs) == 2
+    assert Wait(0.5) in keys
+
+
+def test_split_phases_keeps_every_step() -> None:
+    plan = optimize(compile_plan(ENTRIES, revert=True))
+    parts = split_phases(plan)
+    assert [name for name, _ in parts] == [
+        None, "navigate_to_channel", "start_rolling",
+        "navigate_to_channel", "start_rolling", "revert_window",
+    ]
+    assert sum((steps for _, steps in parts), ()) == plan
+    assert all(isinstance(steps[0], Phase) for name, steps in parts if name)
+
+
+def test_notes_stay_between_their_waits() -> None:
+    """Waits are only coalesced with nothing in between, so that every
+    note is printed when it was meant to.
+    """
+    plan = (Wait(1.0), Wait(0.5), Note("a"), Wait(2.0), Note("b"), Wait(0))
+    assert optimize(plan) == (Wait(1.5), Note("a"), Wait(2.0), Note("b"))
+
+
+def test_interpreter_runs_the_plan(backend: RecordingBackend,
+                                   clock: VirtualClock) -> None:
+    """Every step is taken in order, in the time project() gives."""
+    entries = [SessionEntry("wa", "bots", 3, True)]
+    terminal = backend.windows[1]
+    plan = optimize(compile_plan(entries, revert=True))
+    _run(plan, caller=terminal)
+
+    assert backend.typed_text() == "#bots\n" + "$wa\n" * 3 + "$daily\n$dk\n"
+    assert backend.windows[0].title == "#bots | Fake Server - Discord"
+    assert backend.active is terminal
+    assert clock.now == pytest.approx(project(plan, INTERVAL)[1])
+
+
+def test_navigation_is_skipped_in_the_channel(
+        capsys: pytest.CaptureFixture[str],
+        backend: RecordingBackend,
+        clock: VirtualClock) -> None:
+    _run(optimize(compile_plan(ENTRIES[:1])), verbose=True)
+    assert backend.typed_text() == "$wa\n" * 3
+    assert ("ctrl", "k") not in [action.args for action in backend.actions]
+    assert "skipping navigation" in capsys.readouterr().out
+
+
+def test_navigation_is_retried_with_backoff(clock: VirtualClock) -> None:
+    """A query landing elsewhere is submitted again after a backoff."""
+    set_backend(RecordingBackend(DISCORD_TITLE))
+    plan = optimize(compile_plan(ENTRIES[1:]))
+    _run(plan)
+    on_time = clock.now
+
+    backend = StubbornBackend(1, DISCORD_TITLE)
+    set_backend(backend)
+    clock.now = 0.0
+    _run(plan)
+    assert backend.typed_text() == "#bots\n#bots\n" + "$wa\n" * 3
+    # The backoff, then the Esc, Ctrl+K and query of the retry
+    assert clock.now - on_time == \
+        pytest.approx(NAVIGATION_BACKOFF + 3 * ACTION_COOLDOWN)
+
+
+def test_navigation_fails_after_last_attempt(clock: VirtualClock) -> None:
+    backend = StubbornBackend(NAVIGATION_RETRIES + 1, DISCORD_TITLE)
+    set_backend(backend)
+    with pytest.raises(NavigationError, match="#bots"):
+        _run(optimize(compile_plan(ENTRIES[1:])))
+    assert backend.typed_text() == "#bots\n" * (NAVIGATION_RETRIES + 1)
+
+
+def test_title_without_channel_counts_as_navigated(
+        clock: VirtualClock) -> None:
+    """Titles that can't tell, like that of the home page, don't retry."""
+    backend = StubbornBackend(NAVIGATION_RETRIES + 1, "Discord")
+    set_backend(backend)
+    _run(optimize(compile_plan(ENTRIES[1:])))
+    assert backend.typed_text() == "#bots\n" + "$wa\n" * 3
+
+
+def test_macro_runs_its_steps(backend: RecordingBackend,
+                              clock: VirtualClock) -> None:
+    macro = [{"text": "$p\n"}, {"wait": 5.0}, {"rolls": 2},
+             {"key": "ctrl+a"}, {"send": "$rolls"}, {"rolls": None}]
+    plan = optimize(compile_plan(ENTRIES[:1], macro=macro))
+    _run(plan)
+    assert backend.typed_text() == \
+        "$p\n" + "$wa\n" * 2 + "$rolls\n" + "$wa\n" * 3
+    assert ("ctrl", "a") in [action.args for action in backend.actions]
+    # The Esc closing navigation and the wait, then six commands INTERVAL
+    # seconds apart
+    assert clock.now == pytest.approx(ACTION_COOLDOWN + 5.0 + 5 * INTERVAL)
+
+
+def test_show_plan_prints_timed_steps(
+        capsys: pytest.CaptureFixture[str]) -> None:
+    config: Any = _parse_config(CONFIG_TEMPLATE.encode())
+    entries = [SessionEntry("wa", "bots", 10, False)]
+    show_plan(config, entries)
+    output = capsys.readouterr().out
+    assert "roll '$wa' 10 times" in output
+    assert "enter '#bots\\n'" in output
+
+    interval = 60 / config["rate-limit"]["rolls-per-minute"]
+    plan = optimize(compile_plan(entries, verify=config["verify-navigation"],
+                                 revert=config["revert-window"]))
+    _, total = project(plan, interval)
+    assert f"Takes at least {total:.1f} seconds" in output
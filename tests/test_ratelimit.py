@@ -0,0 +1,104 @@
+"""test_ratelimit.py
+
+Tests of the token buckets pacing the commands, on a virtual clock.
+"""
+
+import pytest
+
+from waifu.cancel import session_scope
+from waifu.clock import VirtualClock
+from waifu.exceptions import SessionCancelled
+from waifu.ratelimit import (BACKOFF_FACTOR, MIN_RATE_FACTOR, RAMP_STEP,
+                             RateLimiter, TokenBucket)
+
+
+def test_bucket_refills_up_to_burst(clock: VirtualClock) -> None:
+    bucket = TokenBucket(2.0, 3.0, clock)
+    for _ in range(3):
+        assert bucket.delay() == 0.0
+        bucket.consume()
+    assert bucket.delay() == pytest.approx(0.5)
+    clock.advance(60)
+    # Idle time only builds up to the burst
+    for _ in range(3):
+        bucket.consume()
+    assert bucket.delay() == pytest.approx(0.5)
+
+
+def test_steady_rate(clock: VirtualClock) -> None:
+    """Commands go out at the configured rate once the burst is spent,
+    which rolls_per_minute() reports.
+    """
+    limiter = RateLimiter(1.0, 1, 10.0, 1, clock)
+    waited = [limiter.acquire("general") for _ in range(61)]
+    assert waited[0] == 0.0
+    assert waited[1:] == pytest.approx([1.0] * 60)
+    assert clock.now == pytest.approx(60.0)
+    assert limiter.acquired == 61
+    assert limiter.rolls_per_minute() == pytest.approx(60.0)
+
+
+def test_burst_goes_out_back_to_back(clock: VirtualClock) -> None:
+    limiter = RateLimiter(0.5, 4, 10.0, 4, clock)
+    for _ in range(4):
+        assert limiter.acquire("general") == 0.0
+    assert limiter.acquire("general") == pytest.approx(2.0)
+
+
+def test_global_bucket_caps_every_channel(clock: VirtualClock) -> None:
+    """Channels are paced on their own, and together by the global
+    bucket.
+    """
+    limiter = RateLimiter(1.0, 1, 1.5, 1, clock)
+    for _ in range(30):
+        limiter.acquire("general")
+        limiter.acquire("spam")
+    # 60 commands at 1.5 per second overall, instead of 2 per second
+    assert clock.now == pytest.approx(59 / 1.5)
+    assert limiter.rolls_per_minute() == pytest.approx(90.0)
+
+
+def test_backs_off_and_ramps_up(clock: VirtualClock) -> None:
+    """A rate limit holds everything off for its delay and slows the
+    rate down, which ramps back up with every success.
+    """
+    limiter = RateLimiter(1.0, 1, 1.0, 1, clock)
+    limiter.acquire("general")
+    limiter.on_rate_limit(5.0)
+    start = clock.now
+    limiter.acquire("general")
+    assert clock.now - start == pytest.approx(5.0)
+
+    # Refilling at half the rate now
+    start = clock.now
+    limiter.acquire("general")
+    assert clock.now - start == pytest.approx(1 / BACKOFF_FACTOR)
+
+    steps = round((1 - BACKOFF_FACTOR) / RAMP_STEP)
+    for _ in range(steps):
+        limiter.on_success()
+    limiter.acquire("general")
+    start = clock.now
+    limiter.acquire("general")
+    assert clock.now - start == pytest.approx(1.0)
+
+
+def test_rate_never_drops_to_zero(clock: VirtualClock) -> None:
+    limiter = RateLimiter(1.0, 1, 1.0, 1, clock)
+    for _ in range(50):
+        limiter.on_rate_limit()
+    limiter.acquire("general")
+    start = clock.now
+    limiter.acquire("general")
+    assert clock.now - start == pytest.approx(1 / MIN_RATE_FACTOR)
+
+
+def test_cancelled_session_stops_waiting(clock: VirtualClock) -> None:
+    limiter = RateLimiter(1 / 60, 1, 1.0, 1, clock)
+    limiter.acquire("general")
+    with session_scope() as token:
+        token.cancel("esc")
+        with pytest.raises(SessionCancelled):
+            limiter.acquire("general")
+    assert clock.now == 0.0
+    assert limiter.acquired == 1
@@ -0,0 +1,87 @@
+"""test_reader.py
+
+Tests of reading roll results against the fixture screenshots drawn by
+tests/fixtures/reader/make_fixtures.py.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from waifu import core  # noqa: E402
+from waifu.backend import RecordingBackend, set_backend  # noqa: E402
+from waifu.reader import Reader  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures" / "reader"
+MIN_ACCURACY = 0.95  # fraction of frames to read exactly right
+LATENCY_BUDGET = 0.1  # seconds to classify a frame, 10% of the cooldown
+
+
+def _load_image(path: Path) -> Any:
+    from PIL import Image
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+@pytest.fixture(scope="module")
+def expected() -> dict[str, Any]:
+    return json.loads((FIXTURES / "labels.json").read_text())
+
+
+@pytest.fixture
+def reader(expected: dict[str, Any]) -> Reader:
+    return Reader.from_config({
+        "region": [0, 0, 480, 260],
+        "colours": expected["colours"],
+        "templates": {name: str(FIXTURES / f"{name}.png")
+                      for name in ("heart", "kakera")},
+        "threshold": 0.8,
+        "pause-on": ["kakera"],
+    })
+
+
+def test_fixture_accuracy_and_latency(reader: Reader,
+                                      expected: dict[str, Any]) -> None:
+    """Nearly every fixture is read exactly, well within the cooldown."""
+    frames = expected["frames"]
+    right = 0
+    latencies = []
+    for name, labels in frames.items():
+        frame = _load_image(FIXTURES / name)
+        start = time.perf_counter()
+        reading = reader.classify(frame)
+        latencies.append(time.perf_counter() - start)
+        if reading.labels == frozenset(labels):
+            right += 1
+    accuracy = right / len(frames)
+    assert accuracy >= MIN_ACCURACY
+    assert max(latencies) < LATENCY_BUDGET
+    assert reader.latencies == pytest.approx(latencies, abs=0.01)
+
+
+def test_decoy_icons_and_text_dont_match(reader: Reader) -> None:
+    """Template scores stay low on frames without the icons."""
+    blank = np.full((260, 480, 3), (49, 51, 56), dtype=np.uint8)
+    reading = reader.classify(blank)
+    assert reading.labels == frozenset()
+    assert reading.scores["heart"] == 0.0
+
+
+def test_read_pauses_for_wanted_labels(reader: Reader,
+                                       expected: dict[str, Any]) -> None:
+    """A reply with a label of pause-on pauses the session."""
+    name = next(name for name, labels in expected["frames"].items()
+                if "kakera" in labels)
+    backend = RecordingBackend("#lobby | Test Server - Discord")
+    backend.frames.append(_load_image(FIXTURES / name))
+    set_backend(backend)
+
+    reading = core._read_result(reader, False)
+    assert "kakera" in reading.labels
+    assert backend.count("capture") == 1
+    assert core._Pauser.is_paused()
@@ -0,0 +1,61 @@
+"""test_scheduler.py
+
+Tests of the reset-aligned scheduler, on a virtual clock.
+"""
+
+import pytest
+
+from waifu.clock import VirtualClock
+from waifu.exceptions import NavigationError, SessionCancelled
+from waifu.parser import SessionEntry
+from waifu.scheduler import run_schedule
+
+OPTIONS = {
+    "interval-minutes": 60,
+    "offset-minutes": 5,
+    "daily-interval-minutes": 0,
+    "daily-offset-minutes": 0,
+}
+ENTRIES = [SessionEntry("wa", "general", 10, False)]
+
+
+def test_fires_on_the_cadence_without_drift(clock: VirtualClock) -> None:
+    """Firings stay on the hour plus the offset however long the
+    sessions take.
+    """
+    fired_at: list[float] = []
+
+    def run(due: list[SessionEntry]) -> None:
+        fired_at.append(clock.now)
+        clock.sleep(600)
+
+    run_schedule(OPTIONS, ENTRIES, run, False, clock, firings=4)
+    assert fired_at == pytest.approx([300 + 3600 * hour
+                                      for hour in range(4)])
+
+
+@pytest.mark.parametrize("error", [SessionCancelled("esc"),
+                                   NavigationError("lost")])
+def test_aborted_session_keeps_the_schedule(clock: VirtualClock,
+                                             error: Exception) -> None:
+    """A session cancelled with ESC or failing only skips to the next
+    firing.
+    """
+    calls: list[float] = []
+
+    def run(due: list[SessionEntry]) -> None:
+        calls.append(clock.now)
+        if len(calls) == 1:
+            raise error
+
+    run_schedule(OPTIONS, ENTRIES, run, False, clock, firings=3)
+    assert len(calls) == 3
+
+
+def test_interrupt_stops_the_schedule(clock: VirtualClock) -> None:
+    """^C still stops it, unlike the abort key."""
+    def run(due: list[SessionEntry]) -> None:
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_schedule(OPTIONS, ENTRIES, run, False, clock, firings=3)
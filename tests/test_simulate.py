@@ -0,0 +1,100 @@
+"""test_simulate.py
+
+Tests of the timing of whole sessions, as projected by --simulate.
+"""
+
+import re
+
+import pytest
+
+from waifu.config import _parse_config
+from waifu.config_template import CONFIG_TEMPLATE
+from waifu.core import REVERT_WINDOW_DELAY
+from waifu.inject import PASTE_SETTLE_DELAY
+from waifu.parser import SessionEntry
+from waifu.plan import compile_plan, optimize, project
+from waifu.simulate import run_simulation
+
+DURATION = re.compile(r"Projected duration: (\d+):(\d+\.\d+) for (\d+) "
+                      r"commands.*simulated in\s+(\d+\.\d+)\s+ms", re.DOTALL)
+MAX_REAL_MS = 1000.0  # real time allowed to simulate a 100-roll session
+
+
+@pytest.fixture
+def config() -> dict:
+    """Return the configuration of the template, unchanged."""
+    return _parse_config(CONFIG_TEMPLATE.encode())  # type: ignore
+
+
+def _simulate(capsys: pytest.CaptureFixture[str],
+              config: dict,
+              entries: list[SessionEntry]) -> tuple[float, int, float]:
+    """Return the projected seconds, the commands sent and the real
+    milliseconds it took to simulate them.
+    """
+    run_simulation(config, entries)  # type: ignore
+    output = capsys.readouterr().out
+    match = DURATION.search(output)
+    assert match is not None, output
+    minutes, seconds, sent, real_ms = match.groups()
+    return int(minutes) * 60 + float(seconds), int(sent), float(real_ms)
+
+
+def test_every_session_navigates(capsys: pytest.CaptureFixture[str],
+                                 config: dict) -> None:
+    run_simulation(config, [SessionEntry("wa", "general", 1, False)])
+    output = capsys.readouterr().out
+    assert "skipping navigation" not in output
+    assert "navigate_to_channel" in output
+
+
+def test_rolls_follow_the_rate_limit(capsys: pytest.CaptureFixture[str],
+                                     config: dict) -> None:
+    interval = 60 / config["rate-limit"]["rolls-per-minute"]
+    short, short_sent, _ = _simulate(
+        capsys, config, [SessionEntry("wa", "general", 10, False)]
+    )
+    long, long_sent, real_ms = _simulate(
+        capsys, config, [SessionEntry("wa", "general", 100, False)]
+    )
+    assert (short_sent, long_sent) == (10, 100)
+    # Every extra roll waits for one more token
+    assert long - short == pytest.approx(90 * interval, abs=1e-3)
+    assert real_ms < MAX_REAL_MS
+
+
+def test_daily_and_revert_add_their_waits(capsys: pytest.CaptureFixture[str],
+                                          config: dict) -> None:
+    interval = 60 / config["rate-limit"]["rolls-per-minute"]
+    plain, _, _ = _simulate(capsys, config,
+                            [SessionEntry("wa", "general", 5, False)])
+    daily, sent, _ = _simulate(capsys, config,
+                               [SessionEntry("wa", "general", 5, True)])
+    assert sent == 7
+    assert daily - plain == pytest.approx(2 * interval, abs=1e-3)
+
+    config["revert-window"] = True
+    reverted, _, _ = _simulate(capsys, config,
+                               [SessionEntry("wa", "general", 5, False)])
+    assert reverted - plain >= REVERT_WINDOW_DELAY
+
+
+def test_pastes_settle_on_the_virtual_clock(
+        capsys: pytest.CaptureFixture[str], config: dict) -> None:
+    """Pasting waits PASTE_SETTLE_DELAY after the query and every
+    command without taking real time, as the projection of the plan
+    counts it. The limiter absorbs the wait but for the last command.
+    """
+    entries = [SessionEntry("wa", "general", 100, False)]
+    batch, _, _ = _simulate(capsys, config, entries)
+    config["text-injection"] = "paste"
+    paste, sent, real_ms = _simulate(capsys, config, entries)
+    assert sent == 100
+    assert paste - batch == pytest.approx(2 * PASTE_SETTLE_DELAY, abs=1e-3)
+    assert real_ms < MAX_REAL_MS
+
+    interval = 60 / config["rate-limit"]["rolls-per-minute"]
+    plan = optimize(compile_plan(entries))
+    _, projected = project(plan, interval)
+    _, projected_paste = project(plan, interval, settle=PASTE_SETTLE_DELAY)
+    assert projected_paste - projected == pytest.approx(paste - batch)
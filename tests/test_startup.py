@@ -0,0 +1,69 @@
+"""test_startup.py
+
+Tests of the startup time of the command line paths, against the import
+time budgets of scripts/bench_startup.py.
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from .conftest import _load_script
+
+bench_startup = _load_script("bench_startup")
+
+RUNS = 3  # runs of each path, the fastest of which counts
+MAX_HELP_SECONDS = 2.0  # wall time of `waifu --help`, interpreter included
+
+
+@pytest.fixture(scope="module")
+def env(tmp_path_factory: pytest.TempPathFactory) -> dict[str, str]:
+    """Return the environment of a user with the template config file,
+    whose snapshot was already built.
+    """
+    home = tmp_path_factory.mktemp("home")
+    env = bench_startup.make_env(home)
+    assert (home / ".config" / "waifu-roller" / "config.snapshot").exists()
+    return env
+
+
+@pytest.mark.parametrize("path", bench_startup.PATHS,
+                         ids=lambda path: " ".join(path.args))
+def test_path_starts_within_budget(env: dict[str, str], path: Any) -> None:
+    """Each path imports nothing heavy and stays within its budget."""
+    runs = [bench_startup.measure(path.args, env) for _ in range(RUNS)]
+    total_ms = min(total for total, _ in runs)
+    assert bench_startup.forbidden_imports(path, runs[0][1]) == []
+    assert total_ms <= path.budget_ms
+
+
+def test_help_runs_quickly(env: dict[str, str]) -> None:
+    """`waifu --help` prints the usage without starting anything."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-m", "waifu.main", "--help"],
+                            capture_output=True, text=True, env=env)
+    elapsed = time.perf_counter() - start
+    assert result.returncode == 0, result.stderr
+    assert "usage" in result.stdout.lower()
+    assert elapsed < MAX_HELP_SECONDS
+
+
+def test_engine_modules_import_lazily() -> None:
+    """The session engine only imports the GUI automation libraries,
+    NumPy and PyYAML once it needs them.
+    """
+    code = ("import sys; import waifu.main, waifu.config, waifu.core, "
+            "waifu.plan; "
+            "print(' '.join(sorted(sys.modules)))")
+    result = subprocess.run([sys.executable, "-c", code],
+                            capture_output=True, text=True,
+                            cwd=Path(__file__).parent)
+    assert result.returncode == 0, result.stderr
+    modules = set(result.stdout.split())
+    heavy = {"pyautogui", "pygetwindow", "keyboard", "pyperclip", "numpy",
+             "yaml"}
+    assert heavy.isdisjoint(modules)
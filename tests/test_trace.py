@@ -0,0 +1,158 @@
+"""test_trace.py
+
+Tests of recording and exporting the spans of sessions with trace.py.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from waifu.backend import RecordingBackend, set_backend
+from waifu.clock import VirtualClock
+from waifu.core import run_manifest
+from waifu.history import HistoryWriter, connect
+from waifu.parser import SessionEntry
+from waifu.trace import (NullTracer, TraceRecorder, TracingBackend,
+                         set_tracer, traced)
+from waifu.transport import HTTPTransport
+from waifu.wishlist import Automaton, Wishlist, parse_entries
+
+from .conftest import FakeAPI
+
+ROLLS = 3
+
+
+def test_spans_are_timed_with_the_clock(clock: VirtualClock) -> None:
+    recorder = TraceRecorder(clock)
+    clock.advance(1.0)
+    with recorder.span("outer", "test", rolls=2):
+        with recorder.span("inner"):
+            clock.sleep(0.5)
+        clock.sleep(0.25)
+
+    inner, outer = recorder.spans
+    assert (inner.name, inner.start, inner.duration) == ("inner", 1.0, 0.5)
+    assert (outer.name, outer.start, outer.duration) == ("outer", 1.0, 0.75)
+    assert outer.category == "test" and outer.args == {"rolls": 2}
+
+
+def test_failed_span_records_the_error(clock: VirtualClock) -> None:
+    recorder = TraceRecorder(clock)
+    with pytest.raises(KeyError):
+        with recorder.span("lookup"):
+            raise KeyError("missing")
+    assert recorder.spans[0].args == {"error": "KeyError"}
+
+
+def test_null_tracer_allocates_nothing() -> None:
+    tracer = NullTracer()
+    assert tracer.span("a") is tracer.span("b", "backend", x=1)
+
+
+def test_traced_uses_tracer_in_use(clock: VirtualClock) -> None:
+    """The decorator looks the tracer up on every call."""
+    @traced("step")
+    def step() -> int:
+        return 42
+
+    assert step() == 42
+    recorder = TraceRecorder(clock)
+    set_tracer(recorder)
+    assert step() == 42
+    assert [span.name for span in recorder.spans] == ["step"]
+
+
+def test_tracing_backend_records_calls(clock: VirtualClock) -> None:
+    recorder = TraceRecorder(clock)
+    wrapped = RecordingBackend("Discord")
+    backend = TracingBackend(wrapped, recorder)
+    backend.write("$wa\n")
+    assert backend.get_active_window_title() == "Discord"
+    # Attributes other than methods are passed through untraced
+    assert backend.clipboard == ""
+
+    assert [(span.name, span.category) for span in recorder.spans] == \
+        [("write", "backend"), ("get_active_window_title", "backend")]
+    assert wrapped.typed_text() == "$wa\n"
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_export_formats(tmp_path: Path,
+                        clock: VirtualClock,
+                        suffix: str) -> None:
+    """.json exports Chrome trace events, anything else JSON Lines,
+    both sorted by start time.
+    """
+    recorder = TraceRecorder(clock)
+    with recorder.span("outer"):
+        clock.sleep(0.001)
+        with recorder.span("inner", "backend", key="esc"):
+            clock.sleep(0.002)
+    path = tmp_path / f"trace{suffix}"
+    recorder.export(path)
+
+    if suffix == ".json":
+        events = json.loads(path.read_text())["traceEvents"]
+        assert [event["name"] for event in events] == ["outer", "inner"]
+        inner = events[1]
+        assert inner["ph"] == "X" and inner["cat"] == "backend"
+        assert inner["ts"] == pytest.approx(1000.0)
+        assert inner["dur"] == pytest.approx(2000.0)
+        assert inner["args"] == {"key": "esc"}
+    else:
+        lines = path.read_text().splitlines()
+        spans = [json.loads(line) for line in lines]
+        assert [span["name"] for span in spans] == ["outer", "inner"]
+        assert spans[1]["duration"] == pytest.approx(0.002)
+
+
+def test_session_is_traced(backend: RecordingBackend,
+                           clock: VirtualClock) -> None:
+    """A traced session records its phases, waits and backend calls."""
+    recorder = TraceRecorder(clock)
+    set_tracer(recorder)
+    set_backend(TracingBackend(backend, recorder))
+    run_manifest([SessionEntry("wa", "bots", ROLLS, False)], False, False)
+
+    names = [span.name for span in recorder.spans]
+    for name in ("open_discord", "navigate_to_channel", "start_rolling",
+                 "limiter", "send", "wait"):
+        assert name in names
+    assert names.count("send") == ROLLS
+    sends = [span for span in recorder.spans if span.name == "send"]
+    assert all(span.args == {"content": "$wa"} for span in sends)
+    rolling = next(span for span in recorder.spans
+                   if span.name == "start_rolling")
+    # Each send lies within the phase it belongs to
+    assert all(rolling.start <= span.start <= span.start + span.duration
+               <= rolling.start + rolling.duration for span in sends)
+
+
+def test_reply_fetch_is_traced_apart_from_wishlist(
+        tmp_path: Path,
+        fake_api: FakeAPI,
+        backend: RecordingBackend,
+        clock: VirtualClock) -> None:
+    """The reply fetched once for the history and the wishlist has a span
+    of its own, separate from matching it against the wishlist.
+    """
+    fake_api.stats.reply = {"author": {"id": "mudae"}, "content": "Rem"}
+    recorder = TraceRecorder()
+    set_tracer(recorder)
+    history = HistoryWriter(connect(tmp_path / "history.sqlite3"))
+    wishlist = Wishlist(Automaton.compile(parse_entries(["Emilia"])), 1.0)
+    transport = HTTPTransport(fake_api.api_base, "token-a", "123")
+    try:
+        run_manifest([SessionEntry("wa", "lobby", ROLLS, False)], False,
+                     False, transport=transport, history=history,
+                     wishlist=wishlist)
+    finally:
+        transport.close()
+        history.flush()
+
+    spans = {name: [span for span in recorder.spans if span.name == name]
+             for name in ("fetch_reply", "check_wishlist")}
+    assert len(spans["fetch_reply"]) == len(spans["check_wishlist"]) == ROLLS
+    for fetch, check in zip(spans["fetch_reply"], spans["check_wishlist"]):
+        assert fetch.start + fetch.duration <= check.start
@@ -0,0 +1,169 @@
+"""test_transport.py
+
+Tests of the http transport against scripts/fake_api.py.
+"""
+
+import json
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import pytest
+
+from waifu.exceptions import TransportError
+from waifu.transport import HTTPTransport
+
+from .conftest import FakeAPI
+
+ERROR_OBJECT = {"message": "Missing Access", "code": 50001}
+
+MESSAGES = 200  # messages sent for measuring throughput
+MIN_THROUGHPUT = 200.0  # messages per second over a local keep-alive pool
+
+
+def test_sends_over_pooled_connections(fake_api: FakeAPI) -> None:
+    """Every message arrives, over the one connection kept alive."""
+    transport = HTTPTransport(fake_api.api_base, "token-a", "123")
+    try:
+        for attempt in range(MESSAGES):
+            transport.send(f"$wa {attempt}")
+        assert transport._pool._idle.qsize() == 1
+    finally:
+        transport.close()
+
+    assert transport.sent == MESSAGES
+    assert len(fake_api.stats.times["token-a"]) == MESSAGES
+    assert transport.messages_per_second() >= MIN_THROUGHPUT
+    assert transport._pool._idle.empty()
+
+
+class BrokenAPI(BaseHTTPRequestHandler):
+    """API accepting messages but answering reads with an error object,
+    and cutting the body of the response to "$truncate" short.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, payload: object, missing: int = 0) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body) + missing))
+        self.end_headers()
+        self.wfile.write(body)
+        if missing:
+            self.close_connection = True
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        content = json.loads(self.rfile.read(length))["content"]
+        message = {"id": "1", "author": {"id": "me"}, "content": content}
+        self._reply(message, missing=10 if content == "$truncate" else 0)
+
+    def do_GET(self) -> None:
+        self._reply(ERROR_OBJECT)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def broken_api() -> Iterator[str]:
+    """Serve BrokenAPI on a free local port, yielding its api-base."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BrokenAPI)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/api"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetches_reply_after_last_message(fake_api: FakeAPI) -> None:
+    """The first message of someone else after a send is its reply."""
+    fake_api.stats.reply = {"author": {"id": "mudae"}, "content": "Rem"}
+    transport = HTTPTransport(fake_api.api_base, "token-a", "123")
+    try:
+        assert transport.fetch_reply(0.0) is None  # nothing sent yet
+        transport.send("$wa")
+        reply = transport.fetch_reply(0.0)
+    finally:
+        transport.close()
+    assert reply is not None and reply["content"] == "Rem"
+
+
+def test_error_object_is_no_reply(broken_api: str) -> None:
+    """An object instead of a list of messages means no reply."""
+    transport = HTTPTransport(broken_api, "token-a", "123")
+    try:
+        transport.send("$wa")
+        assert transport.fetch_reply(0.0) is None
+    finally:
+        transport.close()
+
+
+def test_truncated_response_raises(broken_api: str) -> None:
+    """Protocol errors like an incomplete body surface as TransportError,
+    and the connection is dropped instead of pooled.
+    """
+    transport = HTTPTransport(broken_api, "token-a", "123")
+    try:
+        with pytest.raises(TransportError, match="Could not reach"):
+            transport.send("$truncate")
+        assert transport._pool._idle.empty()
+    finally:
+        transport.close()
+
+
+def test_waits_out_rate_limits(fake_api: FakeAPI) -> None:
+    """HTTP 429 is retried after its delay, which is reported."""
+    fake_api.stats.limit = 20.0
+    delays: list[float] = []
+    transport = HTTPTransport(fake_api.api_base, "token-a", "123")
+    transport.on_rate_limit = delays.append
+    try:
+        for _ in range(5):
+            transport.send("$wa")
+    finally:
+        transport.close()
+
+    assert transport.sent == 5
+    assert delays
+    assert fake_api.stats.limited["token-a"] == len(delays)
+    times = fake_api.stats.times["token-a"]
+    assert all(later - earlier >= 1 / 20.0 - 0.005
+               for earlier, later in zip(times, times[1:]))
+
+
+def test_rejected_message_raises(fake_api: FakeAPI) -> None:
+    """Errors other than rate limits aren't retried."""
+    transport = HTTPTransport(fake_api.api_base + "/missing", "token-a",
+                              "123")
+    with pytest.raises(TransportError, match="HTTP 404"):
+        transport.send("$wa")
+    transport.close()
+
+
+def test_unreachable_server_raises() -> None:
+    """Connection errors surface as TransportError."""
+    transport = HTTPTransport("http://127.0.0.1:9/api", "token-a", "123")
+    with pytest.raises(TransportError, match="Could not reach"):
+        transport.send("$wa")
+
+
+def test_bad_api_base_raises() -> None:
+    with pytest.raises(TransportError, match="not a valid"):
+        HTTPTransport("ftp://example.com", "token-a", "123")
+
+
+def test_default_backend_needs_no_display() -> None:
+    """The http transport only needs the hotkeys of the default backend,
+    which don't import PyAutoGUI and so work without a display.
+    """
+    code = ("import sys; from waifu.backend import get_backend; "
+            "get_backend(); assert 'pyautogui' not in sys.modules")
+    result = subprocess.run([sys.executable, "-c", code],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,108 @@
+"""test_wishlist.py
+
+Tests of matching wishlist names in roll results with wishlist.py.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from waifu.exceptions import WishlistError
+from waifu.wishlist import (Automaton, Wishlist, load_automaton, normalize,
+                            parse_entries)
+
+
+def _automaton(*lines: str) -> Automaton:
+    return Automaton.compile(parse_entries(lines))
+
+
+def test_normalize_folds_case_accents_and_punctuation() -> None:
+    assert normalize("Émilia-TAN!!") == " emilia tan "
+    assert normalize("  Łukasz  ") == " łukasz "
+    assert normalize("...") == " "
+
+
+def test_aliases_report_the_name() -> None:
+    automaton = _automaton("Rem | Rem-rin | Oni Sister")
+    assert automaton.find("The oni sister, again") == ["Rem"]
+    assert automaton.find("rem RIN") == ["Rem"]
+
+
+def test_diacritics_are_folded_both_ways() -> None:
+    automaton = _automaton("Kōsaka Kirino", "Rimuru Tempest")
+    assert automaton.find("kosaka kirino") == ["Kōsaka Kirino"]
+    assert automaton.find("Rímuru Témpest") == ["Rimuru Tempest"]
+
+
+def test_only_whole_words_match() -> None:
+    automaton = _automaton("Rem", "Ai")
+    assert automaton.find("Remilia Scarlet") == []
+    assert automaton.find("Said the maid") == []
+    assert automaton.find("Rem (Re:Zero)") == ["Rem"]
+
+
+def test_overlapping_names_are_all_found() -> None:
+    """Names within others, or sharing words, are each reported once,
+    in order of appearance.
+    """
+    automaton = _automaton("Saber", "Saber Alter", "Alter Ego", "Ego")
+    assert automaton.find("Saber Alter Ego") == \
+        ["Saber", "Saber Alter", "Alter Ego", "Ego"]
+    assert automaton.find("Ego, Saber and Saber again") == ["Ego", "Saber"]
+
+
+def test_comments_and_blank_lines_are_skipped() -> None:
+    assert parse_entries(["# favorites", "", "  Rem |  | Oni  "]) == \
+        [("Rem", "Rem"), ("Oni", "Rem")]
+    assert _automaton("# Rem").find("Rem") == []
+
+
+def test_serialization_round_trip() -> None:
+    automaton = _automaton("Rem | Oni", "Emilia")
+    loaded = Automaton.loads(automaton.dumps())
+    assert loaded.find("Emilia met the oni") == ["Emilia", "Rem"]
+    with pytest.raises(ValueError):
+        Automaton.loads(b"")
+
+
+def test_cached_automaton_is_rebuilt_when_wishlist_changes(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache_path = tmp_path / "wishlist.cache"
+    compiled: list[int] = []
+    compile_names = Automaton.compile.__func__  # type: ignore
+
+    def counting(cls: type, entries: list) -> Automaton:
+        compiled.append(len(entries))
+        return compile_names(cls, entries)
+
+    monkeypatch.setattr(Automaton, "compile", classmethod(counting))
+
+    assert load_automaton(["Rem"], cache_path).find("Rem") == ["Rem"]
+    assert load_automaton(["Rem"], cache_path).find("Rem") == ["Rem"]
+    assert compiled == [1]
+
+    changed = load_automaton(["Rem", "Emilia"], cache_path)
+    assert changed.find("Rem and Emilia") == ["Rem", "Emilia"]
+    assert compiled == [1, 2]
+
+    cache_path.write_bytes(b"corrupt")
+    assert load_automaton(["Rem", "Emilia"], cache_path).find("Emilia") == \
+        ["Emilia"]
+    assert compiled == [1, 2, 2]
+
+
+def test_from_config_reads_names_and_files(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("waifu.wishlist.get_cache_path",
+                        lambda: tmp_path / "wishlist.cache")
+    names_file = tmp_path / "names.txt"
+    names_file.write_text("Emilia | EMT\n", encoding="utf-8")
+    options = {"names": ["Rem"], "files": [str(names_file)],
+               "reply-timeout": 2.0}
+    wishlist = Wishlist.from_config(options)
+    assert wishlist.find("EMT and Rem") == ["Emilia", "Rem"]
+    assert wishlist.reply_timeout == 2.0
+
+    options["files"] = [str(tmp_path / "missing.txt")]
+    with pytest.raises(WishlistError, match="missing.txt"):
+        Wishlist.from_config(options)